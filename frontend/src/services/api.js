@@ -83,6 +83,23 @@ apiClient.interceptors.response.use(
   }
 );
 
+// List endpoints return pages of {next, previous, results}; follow `next`
+// until the last page and return every result
+const getAllPages = async (url, params = {}) => {
+  const results = [];
+  let response = await apiClient.get(url, { params: { page_size: 100, ...params } });
+  for (;;) {
+    if (Array.isArray(response.data)) {
+      return results.concat(response.data);
+    }
+    results.push(...(response.data.results || []));
+    if (!response.data.next) {
+      return results;
+    }
+    response = await apiClient.get(response.data.next);
+  }
+};
+
 export const authAPI = {
   test: async () => {
     try {
@@ -144,9 +161,9 @@ export const authAPI = {
 export const destinationsAPI = {
   getDestinations: async (params = {}) => {
     try {
-      const response = await apiClient.get('/destinations/', { params });
-      console.log('Destinations API response:', response.data);
-      return response.data;
+      const results = await getAllPages('/destinations/', params);
+      console.log('Destinations API response:', results);
+      return { results };
     } catch (error) {
       console.error('Error fetching destinations:', error);
       return { results: [] };
@@ -201,9 +218,9 @@ export const destinationsAPI = {
 export const bookingsAPI = {
   getBookings: async () => {
     try {
-      const response = await apiClient.get('/bookings/');
-      console.log('Bookings response:', response.data);
-      return Array.isArray(response.data) ? response.data : [];
+      const bookings = await getAllPages('/bookings/');
+      console.log('Bookings response:', bookings);
+      return bookings;
     } catch (error) {
       console.error('Error fetching bookings:', error);
       throw error;
@@ -330,12 +347,11 @@ export const contactAPI = {
   // Get all contact submissions (admin only)
   getContacts: async (filters = {}) => {
     try {
-      const params = new URLSearchParams();
-      if (filters.status) params.append('status', filters.status);
-      if (filters.category) params.append('category', filters.category);
+      const params = {};
+      if (filters.status) params.status = filters.status;
+      if (filters.category) params.category = filters.category;
       
-      const response = await apiClient.get(`/contacts/?${params}`);
-      return response.data;
+      return await getAllPages('/contacts/', params);
     } catch (error) {
       console.error('Error fetching contacts:', error);
       throw error;
@@ -433,8 +449,7 @@ export const favoritesAPI = {
   // Get user's favorite lists
   getFavoriteLists: async () => {
     try {
-      const response = await apiClient.get('/favorites/lists/');
-      return response.data;
+      return await getAllPages('/favorites/lists/');
     } catch (error) {
       console.error('Error fetching favorite lists:', error);
       throw error;
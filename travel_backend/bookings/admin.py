@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Booking, BookingTraveler
+from .models import Booking, BookingTraveler, DepartureInventory, PricingRule
 
 class BookingTravelerInline(admin.TabularInline):
     model = BookingTraveler
@@ -23,3 +23,19 @@ class BookingTravelerAdmin(admin.ModelAdmin):
     list_display = ['booking', 'first_name', 'last_name', 'nationality']
     list_filter = ['nationality']
     search_fields = ['first_name', 'last_name', 'booking__booking_id']
+
+@admin.register(DepartureInventory)
+class DepartureInventoryAdmin(admin.ModelAdmin):
+    list_display = ['destination', 'departure_date', 'capacity', 'remaining', 'updated_at']
+    list_filter = ['departure_date']
+    search_fields = ['destination__name']
+    date_hierarchy = 'departure_date'
+    ordering = ['departure_date']
+
+@admin.register(PricingRule)
+class PricingRuleAdmin(admin.ModelAdmin):
+    list_display = ['name', 'kind', 'destination', 'adjustment_percent', 'is_active', 'updated_at']
+    list_filter = ['kind', 'is_active']
+    search_fields = ['name', 'destination__name']
+    list_editable = ['is_active']
+    raw_id_fields = ['destination']
@@ -0,0 +1,98 @@
+"""
+Per-destination availability calendars.
+
+A destination's calendar is two arrays, remaining seats and capacity,
+with a slot per day from today, AVAILABILITY_DAYS long, cached as a
+single entry. A booking form asking for a whole year is one cache read
+and a slice, however many departures have inventory. Prices come from
+bookings.pricing, which reads occupancy from the same arrays.
+
+Entries are stamped with a per-destination version. Booking and
+departure writes bump the version after they commit, so an entry
+built from data read before a write can never be served after it.
+"""
+import time
+from array import array
+from collections import namedtuple
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from .models import DepartureInventory
+
+# Slot value of a day whose departure has no seat limit
+UNLIMITED = -1
+
+Calendar = namedtuple('Calendar', 'start remaining capacity')
+
+
+def horizon():
+    return getattr(settings, 'AVAILABILITY_DAYS', 365)
+
+
+def _keys(destination_id):
+    return f'availability:{destination_id}:version', f'availability:{destination_id}'
+
+
+def invalidate_availability(destination_id):
+    cache.set(_keys(destination_id)[0], time.time_ns(), None)
+
+
+def build_calendar(destination_id, today):
+    """The calendar straight from the database, in one query."""
+    days = horizon()
+    # Departures without inventory are either created full on first booking or unlimited
+    remaining = array('i', [getattr(settings, 'DEPARTURE_CAPACITY', 0) or UNLIMITED]) * days
+    capacity = array('i', remaining)
+    departures = DepartureInventory.objects.filter(
+        destination_id=destination_id, departure_date__gte=today, departure_date__lt=today + timedelta(days=days),
+    ).values_list('departure_date', 'remaining', 'capacity')
+    for departure_date, seats, limit in departures:
+        slot = (departure_date - today).days
+        remaining[slot] = seats
+        capacity[slot] = limit
+    return Calendar(today, remaining, capacity)
+
+
+def occupancy(result, first, count):
+    """Percent of seats sold on each of ``count`` days from ``first``; 0 where unlimited or unknown."""
+    offset = (first - result.start).days
+    percents = []
+    for slot in range(offset, offset + count):
+        limit = result.capacity[slot] if 0 <= slot < len(result.capacity) else UNLIMITED
+        if limit <= 0:
+            percents.append(0)
+        else:
+            percents.append((limit - result.remaining[slot]) * 100 // limit)
+    return percents
+
+
+def calendar(destination_id, today=None):
+    """The destination's calendar starting today, from the cache when it is current."""
+    today = today or timezone.localdate()
+    version_key, key = _keys(destination_id)
+    cached = cache.get_many([version_key, key])
+    version = cached.get(version_key)
+    entry = cached.get(key)
+    if version is None:
+        version = time.time_ns()
+        if not cache.add(version_key, version, None):
+            version = cache.get(version_key)
+    elif entry is not None and entry[0] == version and entry[1] == today.toordinal():
+        _, start, remaining, capacity = entry
+        return Calendar(date.fromordinal(start), array('i', remaining), array('i', capacity))
+
+    result = build_calendar(destination_id, today)
+    cache.set(
+        key, (version, today.toordinal(), result.remaining.tobytes(), result.capacity.tobytes()),
+        getattr(settings, 'AVAILABILITY_CACHE_TIMEOUT', 3600),
+    )
+    return result
+
+
+def seats_left(result, first, last):
+    """Seats left on each day from ``first`` to ``last``, None where unlimited."""
+    window = result.remaining[(first - result.start).days:(last - result.start).days + 1]
+    return [None if seats == UNLIMITED else seats for seats in window]
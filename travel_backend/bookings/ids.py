@@ -0,0 +1,100 @@
+"""
+Booking references from block-reserved sequences.
+
+Each worker thread reserves a block of consecutive numbers with one
+UPDATE on the IdSequence row and hands them out from memory, so in steady
+state a new booking costs no query for its reference. No two workers get
+the same block and numbers are never reused, so references cannot
+collide. A worker that exits leaves a gap, which is harmless.
+
+A block reserved inside a transaction exists only if that transaction
+commits. Until it does, only the same transaction may draw from it;
+otherwise a rollback would hand the same block to another process.
+"""
+import threading
+
+from django.conf import settings
+from django.db import IntegrityError, connection, transaction
+from django.db.models import F
+
+BOOKING_ID_PREFIX = 'TT'
+# Nine digits, so references never clash with the older eight-digit random ones
+BOOKING_ID_START = 100000000
+
+
+class _Block:
+    __slots__ = ('next', 'end', 'pending')
+
+    def __init__(self, start, end, pending):
+        self.next = start
+        self.end = end
+        # Callback registered with the reservation until it commits, else None
+        self.pending = pending
+
+
+class SequenceAllocator:
+    """
+    Hands out numbers of a named sequence from blocks reserved in the database.
+
+    Every thread holds its own block. Threads have their own database
+    connections and so their own transactions, which decide when a block
+    can be trusted.
+    """
+
+    def __init__(self, name, start=1, block_size=None):
+        self.name = name
+        self.start = start
+        self.block_size = block_size
+        self._local = threading.local()
+
+    def _block_size(self):
+        return self.block_size or getattr(settings, 'BOOKING_ID_BLOCK_SIZE', 100)
+
+    def _usable(self, block):
+        if block is None or block.next >= block.end:
+            return False
+        if block.pending is None:
+            return True
+        # Rolling back the reservation's transaction (or savepoint) drops
+        # its on_commit callback, so this finds out whether we are still in it
+        return any(entry[1] is block.pending for entry in connection.run_on_commit)
+
+    def _reserve(self):
+        from .models import IdSequence
+
+        size = self._block_size()
+        sequence = IdSequence.objects.filter(name=self.name)
+        with transaction.atomic():
+            # Write before reading: the UPDATE's row lock (or SQLite's write
+            # lock) is what keeps two processes off the same block
+            if not sequence.update(next_value=F('next_value') + size):
+                try:
+                    with transaction.atomic():
+                        IdSequence.objects.create(name=self.name, next_value=self.start + size)
+                except IntegrityError:
+                    # Another process created it first
+                    sequence.update(next_value=F('next_value') + size)
+            end = sequence.values_list('next_value', flat=True).get()
+
+        def confirm():
+            block.pending = None
+
+        block = self._local.block = _Block(end - size, end, confirm)
+        # Runs straight away unless we are inside a transaction
+        transaction.on_commit(confirm)
+        return block
+
+    def next(self):
+        block = getattr(self._local, 'block', None)
+        if not self._usable(block):
+            block = self._reserve()
+        value = block.next
+        block.next += 1
+        return value
+
+
+booking_ids = SequenceAllocator('booking', start=BOOKING_ID_START)
+
+
+def next_booking_id():
+    return f'{BOOKING_ID_PREFIX}{booking_ids.next()}'
@@ -0,0 +1,67 @@
+"""
+Seat inventory per departure.
+
+A reservation is one conditional UPDATE that only matches while enough
+seats remain, so the database decides who gets the last seat: no row is
+read first, nothing is locked for longer than that statement, and
+bookings on different departures never wait for each other.
+"""
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.db.models.functions import Least
+from django.utils import timezone
+
+from .models import DepartureInventory
+
+
+class SoldOut(Exception):
+    def __init__(self, departure_date, requested, remaining):
+        self.departure_date = departure_date
+        self.requested = requested
+        self.remaining = remaining
+        super().__init__(
+            f'Only {remaining} seat(s) left on the {departure_date} departure, {requested} requested'
+        )
+
+
+def _ensure_departure(destination_id, departure_date):
+    """Create the departure's inventory with the default capacity if that is configured."""
+    capacity = getattr(settings, 'DEPARTURE_CAPACITY', 0)
+    if capacity:
+        DepartureInventory.objects.get_or_create(
+            destination_id=destination_id, departure_date=departure_date,
+            defaults={'capacity': capacity, 'remaining': capacity},
+        )
+
+
+def reserve(destination_id, departure_date, seats):
+    """
+    Take ``seats`` from a departure; returns how many were taken.
+
+    Departures without inventory are not capacity managed and take
+    nothing. Raises SoldOut when too few seats remain. Call inside the
+    transaction that creates the booking, so a failed booking gives its
+    seats back by rolling back.
+    """
+    with transaction.atomic():
+        _ensure_departure(destination_id, departure_date)
+        departure = DepartureInventory.objects.filter(destination_id=destination_id, departure_date=departure_date)
+        taken = departure.filter(remaining__gte=seats).update(
+            remaining=F('remaining') - seats, updated_at=timezone.now()
+        )
+        if taken:
+            return seats
+        remaining = departure.values_list('remaining', flat=True).first()
+        if remaining is None:
+            return 0
+        raise SoldOut(departure_date, seats, remaining)
+
+
+def release(destination_id, departure_date, seats):
+    """Give ``seats`` back to a departure, never beyond its capacity."""
+    if seats <= 0:
+        return
+    DepartureInventory.objects.filter(destination_id=destination_id, departure_date=departure_date).update(
+        remaining=Least(F('remaining') + seats, F('capacity')), updated_at=timezone.now()
+    )
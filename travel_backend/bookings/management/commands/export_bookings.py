@@ -0,0 +1,13 @@
+from bookings.serializers import BOOKING_EXPORT, TRAVELER_EXPORT
+from travel_backend.exports import ExportCommand
+
+
+class Command(ExportCommand):
+    help = 'Stream every booking, or with --travelers every booking traveler, to a CSV or JSON Lines file'
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument('--travelers', action='store_true', help='One row per traveler instead of per booking')
+
+    def get_export(self, options):
+        return TRAVELER_EXPORT if options['travelers'] else BOOKING_EXPORT
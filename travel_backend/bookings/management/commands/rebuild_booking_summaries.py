@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+from bookings.summary import materialized, rebuild_summaries
+
+
+class Command(BaseCommand):
+    help = 'Recompute every stored booking summary, e.g. after turning BOOKING_SUMMARY_MATERIALIZED on'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Users per bulk upsert')
+
+    def handle(self, *args, **options):
+        stored = rebuild_summaries(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Stored booking summaries for {stored} users'))
+        if not materialized():
+            self.stdout.write('BOOKING_SUMMARY_MATERIALIZED is off, so these rows will not be kept current')
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:16
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0003_remove_bookingtraveler_departure_date_and_more'),
+        ('destinations', '0005_keyset_pagination_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['user', '-created_at', '-id'], name='bookings_bo_user_id_2aa7a9_idx'),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:44
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0004_keyset_pagination_indexes'),
+        ('destinations', '0009_popularity'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='booking',
+            name='seats_reserved',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.CreateModel(
+            name='DepartureInventory',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('departure_date', models.DateField()),
+                ('capacity', models.PositiveIntegerField()),
+                ('remaining', models.PositiveIntegerField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('destination', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='departures', to='destinations.destination')),
+            ],
+            options={
+                'verbose_name_plural': 'Departure inventory',
+                'ordering': ['destination', 'departure_date'],
+                'unique_together': {('destination', 'departure_date')},
+            },
+        ),
+    ]
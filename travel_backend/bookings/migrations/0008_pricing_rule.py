@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:01
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0007_booking_summary'),
+        ('destinations', '0009_popularity'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PricingRule',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('kind', models.CharField(choices=[('seasonal', 'Seasonal'), ('occupancy', 'Occupancy'), ('group', 'Group discount'), ('early_bird', 'Early bird')], max_length=20)),
+                ('adjustment_percent', models.DecimalField(decimal_places=2, max_digits=5)),
+                ('start_date', models.DateField(blank=True, null=True)),
+                ('end_date', models.DateField(blank=True, null=True)),
+                ('min_occupancy_percent', models.PositiveSmallIntegerField(blank=True, null=True)),
+                ('min_travelers', models.PositiveSmallIntegerField(blank=True, null=True)),
+                ('min_days_ahead', models.PositiveSmallIntegerField(blank=True, null=True)),
+                ('is_active', models.BooleanField(default=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('destination', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='pricing_rules', to='destinations.destination')),
+            ],
+            options={
+                'ordering': ['kind', 'id'],
+            },
+        ),
+    ]
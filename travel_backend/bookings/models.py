@@ -1,3 +1,4 @@
+from django.core.exceptions import ValidationError
 from django.db import models
 from django.conf import settings
 from destinations.models import Destination
@@ -16,18 +17,22 @@ class Booking(models.Model):
     special_requirements = models.TextField(blank=True)
     dietary_restrictions = models.TextField(blank=True)
     status = models.CharField(max_length=20, default='confirmed')
+    # Seats taken from the departure's inventory, handed back on cancellation
+    seats_reserved = models.PositiveIntegerField(default=0, editable=False)
     payment_status = models.CharField(max_length=20, default='pending')
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', '-created_at', '-id']),
+        ]
     
     def save(self, *args, **kwargs):
         if not self.booking_id:
-            import random
-            import string
-            self.booking_id = 'TT' + ''.join(random.choices(string.digits, k=8))
+            from .ids import next_booking_id
+            self.booking_id = next_booking_id()
         super().save(*args, **kwargs)
     
     def __str__(self):
@@ -43,3 +48,107 @@ class BookingTraveler(models.Model):
     
     def __str__(self):
         return f"{self.first_name} {self.last_name}"
+
+class DepartureInventory(models.Model):
+    """Seats left on one departure of a destination."""
+    destination = models.ForeignKey(Destination, on_delete=models.CASCADE, related_name='departures')
+    departure_date = models.DateField()
+    capacity = models.PositiveIntegerField()
+    remaining = models.PositiveIntegerField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ['destination', 'departure_date']
+        ordering = ['destination', 'departure_date']
+        verbose_name_plural = 'Departure inventory'
+
+    def __str__(self):
+        return f"{self.destination} on {self.departure_date}: {self.remaining}/{self.capacity} left"
+
+class IdSequence(models.Model):
+    """Next unreserved value of a named sequence; processes reserve blocks of it."""
+    name = models.CharField(max_length=50, primary_key=True)
+    next_value = models.BigIntegerField()
+
+    def __str__(self):
+        return f"{self.name}: {self.next_value}"
+
+class BookingSummary(models.Model):
+    """
+    Per-user booking dashboard numbers, kept current by bookings.summary
+    when BOOKING_SUMMARY_MATERIALIZED is on.
+    """
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, primary_key=True, related_name='booking_summary'
+    )
+    total_bookings = models.PositiveIntegerField(default=0)
+    pending_bookings = models.PositiveIntegerField(default=0)
+    confirmed_bookings = models.PositiveIntegerField(default=0)
+    completed_bookings = models.PositiveIntegerField(default=0)
+    cancelled_bookings = models.PositiveIntegerField(default=0)
+    total_spent = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    # Start dates of trips not yet departed, so the upcoming count stays
+    # right as days pass without a write
+    upcoming_dates = models.JSONField(default=list)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Booking summary for {self.user}"
+
+class PricingRule(models.Model):
+    """
+    A percentage adjustment to the price per person, see bookings.pricing.
+
+    Seasonal rules apply to departures between their dates, occupancy rules
+    once a departure is at least that full, group rules from that many
+    travelers and early-bird rules that many days ahead. Rules without a
+    destination apply to every destination.
+    """
+    SEASONAL = 'seasonal'
+    OCCUPANCY = 'occupancy'
+    GROUP = 'group'
+    EARLY_BIRD = 'early_bird'
+    KIND_CHOICES = [
+        (SEASONAL, 'Seasonal'),
+        (OCCUPANCY, 'Occupancy'),
+        (GROUP, 'Group discount'),
+        (EARLY_BIRD, 'Early bird'),
+    ]
+    # The field each kind needs set
+    REQUIRED_FIELDS = {
+        SEASONAL: ('start_date', 'end_date'),
+        OCCUPANCY: ('min_occupancy_percent',),
+        GROUP: ('min_travelers',),
+        EARLY_BIRD: ('min_days_ahead',),
+    }
+
+    destination = models.ForeignKey(
+        Destination, on_delete=models.CASCADE, null=True, blank=True, related_name='pricing_rules'
+    )
+    name = models.CharField(max_length=100)
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    # e.g. 15.00 for a 15% surcharge, -10.00 for a 10% discount
+    adjustment_percent = models.DecimalField(max_digits=5, decimal_places=2)
+    start_date = models.DateField(null=True, blank=True)
+    end_date = models.DateField(null=True, blank=True)
+    min_occupancy_percent = models.PositiveSmallIntegerField(null=True, blank=True)
+    min_travelers = models.PositiveSmallIntegerField(null=True, blank=True)
+    min_days_ahead = models.PositiveSmallIntegerField(null=True, blank=True)
+    is_active = models.BooleanField(default=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['kind', 'id']
+
+    def clean(self):
+        missing = [field for field in self.REQUIRED_FIELDS.get(self.kind, ()) if getattr(self, field) is None]
+        if missing:
+            raise ValidationError({field: 'Required for this kind of rule' for field in missing})
+        if self.kind == self.SEASONAL and self.start_date > self.end_date:
+            raise ValidationError({'end_date': 'Must not be before the start date'})
+        if self.adjustment_percent is not None and self.adjustment_percent < -100:
+            raise ValidationError({'adjustment_percent': 'A discount cannot exceed 100%'})
+
+    def __str__(self):
+        return f"{self.name} ({self.get_kind_display()}, {self.adjustment_percent:+}%)"
@@ -0,0 +1,235 @@
+"""
+Rule-based trip pricing.
+
+A destination's active PricingRules, its own and the global ones, are
+compiled once into plain integer tuples and cached. Prices are integer
+cents throughout, and every adjustment rounds half up to the cent, so a
+quote is exact and the same however it is computed.
+
+Adjustments apply in a fixed order: seasonal, early bird, occupancy, then
+group. Every seasonal rule covering a date applies. Of the other kinds only
+the applicable rule with the highest threshold does, so tiers such as
+"4+ travelers -5%, 8+ travelers -10%" do not stack.
+
+``quote`` prices a whole grid of start dates by party sizes at once. Rules
+that depend on the date cover contiguous runs of days, so each is applied
+to a slice of the per-day price array rather than cell by cell. The work
+grows with the number of rules and party sizes, not with dates × rules.
+"""
+import time
+from bisect import bisect_right
+from collections import namedtuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Q
+from django.utils import timezone
+
+from destinations.models import Destination
+
+from . import availability
+from .models import PricingRule
+
+VERSION_KEY = 'pricing:version'
+
+CompiledRules = namedtuple('CompiledRules', 'base_cents seasonal early_bird occupancy group')
+# per_person[i][d] and totals[i][d] are for party_sizes[i] starting on first + d days
+Quote = namedtuple('Quote', 'first party_sizes per_person totals')
+
+
+def to_cents(amount):
+    return int((amount * 100).to_integral_value())
+
+
+def basis_points(percent):
+    return int((percent * 100).to_integral_value())
+
+
+def adjust(cents, points):
+    """``cents`` changed by ``points`` hundredths of a percent, rounded half up, never negative."""
+    return max((cents * (10000 + points) + 5000) // 10000, 0)
+
+
+def invalidate_pricing():
+    # Rules may be global, so every destination's compiled rules go at once
+    cache.set(VERSION_KEY, time.time_ns(), None)
+
+
+def _tiers(rules, threshold):
+    # Ascending thresholds; bisect finds the highest one reached
+    tiers = sorted((getattr(rule, threshold), basis_points(rule.adjustment_percent)) for rule in rules)
+    return tuple(value for value, _ in tiers), tuple(points for _, points in tiers)
+
+
+def compile_from(base_cents, rules):
+    """Compile ``rules``, in the order they apply, over a price per person in cents."""
+    by_kind = {kind: [] for kind, _ in PricingRule.KIND_CHOICES}
+    for rule in rules:
+        by_kind[rule.kind].append(rule)
+    return CompiledRules(
+        base_cents=base_cents,
+        seasonal=tuple(
+            (rule.start_date.toordinal(), rule.end_date.toordinal(), basis_points(rule.adjustment_percent))
+            for rule in by_kind[PricingRule.SEASONAL]
+        ),
+        early_bird=_tiers(by_kind[PricingRule.EARLY_BIRD], 'min_days_ahead'),
+        occupancy=_tiers(by_kind[PricingRule.OCCUPANCY], 'min_occupancy_percent'),
+        group=_tiers(by_kind[PricingRule.GROUP], 'min_travelers'),
+    )
+
+
+def compile_rules(destination_id):
+    """A destination's price and active rules as integers; raises Destination.DoesNotExist."""
+    price = Destination.objects.values_list('price_per_person', flat=True).get(pk=destination_id)
+    rules = PricingRule.objects.filter(
+        Q(destination_id=destination_id) | Q(destination__isnull=True), is_active=True
+    ).order_by('id')
+    return compile_from(to_cents(price), rules)
+
+
+def compile_many(destinations):
+    """Compile already-loaded destinations, reading all their rules in one query."""
+    own = {destination.pk: [] for destination in destinations}
+    shared = []
+    rules = PricingRule.objects.filter(
+        Q(destination_id__in=own) | Q(destination__isnull=True), is_active=True
+    ).order_by('id')
+    for rule in rules:
+        (shared if rule.destination_id is None else own[rule.destination_id]).append(rule)
+    return {
+        destination.pk: compile_from(
+            to_cents(destination.price_per_person),
+            # Rules apply in id order, as compile_rules reads them
+            sorted(own[destination.pk] + shared, key=lambda rule: rule.pk),
+        )
+        for destination in destinations
+    }
+
+
+def _version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        version = time.time_ns()
+        if not cache.add(VERSION_KEY, version, None):
+            version = cache.get(VERSION_KEY)
+    return version
+
+
+def rules_for(destination_id):
+    """The destination's compiled rules, compiled at most once per rule change."""
+    key = f'pricing:{_version()}:{destination_id}'
+    compiled = cache.get(key)
+    if compiled is None:
+        compiled = compile_rules(destination_id)
+        cache.set(key, compiled, getattr(settings, 'PRICING_CACHE_TIMEOUT', 3600))
+    return compiled
+
+
+def rules_for_many(destinations):
+    """
+    Compiled rules of already-loaded destinations, keyed by id.
+
+    Cached ones are one cache read for all of them; the rest are compiled
+    from the loaded prices with a single query for their rules.
+    """
+    version = _version()
+    keys = {destination.pk: f'pricing:{version}:{destination.pk}' for destination in destinations}
+    cached = cache.get_many(list(keys.values()))
+    result = {pk: cached[key] for pk, key in keys.items() if key in cached}
+    missing = [destination for destination in destinations if destination.pk not in result]
+    if missing:
+        compiled = compile_many(missing)
+        cache.set_many(
+            {keys[pk]: rules for pk, rules in compiled.items()},
+            getattr(settings, 'PRICING_CACHE_TIMEOUT', 3600),
+        )
+        result.update(compiled)
+    return result
+
+
+def _tier_points(tiers, value):
+    thresholds, points = tiers
+    position = bisect_right(thresholds, value)
+    return points[position - 1] if position else 0
+
+
+def _apply_to_slice(prices, start, stop, points):
+    if start < stop and points:
+        prices[start:stop] = [adjust(cents, points) for cents in prices[start:stop]]
+
+
+def quote(compiled, first, days, party_sizes, today, occupancy=None):
+    """
+    Price ``days`` start dates from ``first`` for each of ``party_sizes``.
+
+    ``occupancy`` gives the percent sold for each of those days; without
+    it occupancy rules do not apply.
+    """
+    prices = [compiled.base_cents] * days
+    first_ordinal = first.toordinal()
+
+    for start, end, points in compiled.seasonal:
+        _apply_to_slice(prices, max(start - first_ordinal, 0), min(end - first_ordinal + 1, days), points)
+
+    # Days ahead grow by one per slot, so each early-bird tier covers one run of slots
+    thresholds, tier_points = compiled.early_bird
+    lead = (first - today).days
+    for position, threshold in enumerate(thresholds):
+        stop = thresholds[position + 1] - lead if position + 1 < len(thresholds) else days
+        _apply_to_slice(prices, max(threshold - lead, 0), min(stop, days), tier_points[position])
+
+    if occupancy is not None and compiled.occupancy[0]:
+        prices = [
+            adjust(cents, _tier_points(compiled.occupancy, percent))
+            for cents, percent in zip(prices, occupancy)
+        ]
+
+    per_person, totals = [], []
+    for size in party_sizes:
+        points = _tier_points(compiled.group, size)
+        row = [adjust(cents, points) for cents in prices] if points else list(prices)
+        per_person.append(row)
+        totals.append([cents * size for cents in row])
+    return Quote(first, tuple(party_sizes), per_person, totals)
+
+
+def quote_destination(destination_id, first, days, party_sizes, today=None, compiled=None):
+    """
+    Quote a destination with its compiled rules and the occupancy in its
+    availability calendar. Pass ``compiled`` when the rules are already at hand.
+    """
+    today = today or timezone.localdate()
+    compiled = compiled or rules_for(destination_id)
+    percents = None
+    if compiled.occupancy[0]:
+        percents = availability.occupancy(availability.calendar(destination_id, today), first, days)
+    return quote(compiled, first, days, party_sizes, today, percents)
+
+
+def trip_price(destination_id, start_date, travelers, today=None, compiled=None):
+    """Total price in cents of one trip."""
+    return quote_destination(destination_id, start_date, 1, [travelers], today, compiled).totals[0][0]
+
+
+def price_cell(rules, base_cents, day, size, today, occupancy_percent=0):
+    """
+    One date and party size priced rule by rule from model instances.
+
+    The reference ``quote`` must agree with; slow, for checks and benchmarks.
+    """
+    cents = base_cents
+    for rule in rules:
+        if rule.kind == PricingRule.SEASONAL and rule.start_date <= day <= rule.end_date:
+            cents = adjust(cents, basis_points(rule.adjustment_percent))
+
+    def best(kind, threshold, value):
+        reached = [rule for rule in rules if rule.kind == kind and getattr(rule, threshold) <= value]
+        if not reached:
+            return 0
+        # Ties on the threshold go to the larger adjustment, as in compiled tiers
+        return max((getattr(rule, threshold), basis_points(rule.adjustment_percent)) for rule in reached)[1]
+
+    cents = adjust(cents, best(PricingRule.EARLY_BIRD, 'min_days_ahead', (day - today).days))
+    cents = adjust(cents, best(PricingRule.OCCUPANCY, 'min_occupancy_percent', occupancy_percent))
+    cents = adjust(cents, best(PricingRule.GROUP, 'min_travelers', size))
+    return cents * size
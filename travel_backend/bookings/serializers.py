@@ -1,6 +1,12 @@
+from django.db import transaction
 from rest_framework import serializers
+from decimal import Decimal
+from .inventory import reserve
 from .models import Booking, BookingTraveler
-from destinations.serializers import DestinationSerializer
+from .pricing import rules_for_many, trip_price
+from destinations.models import Destination
+from destinations.serializers import DestinationSerializer, image_url_from_values
+from travel_backend.exports import Export
 
 class BookingTravelerSerializer(serializers.ModelSerializer):
     class Meta:
@@ -27,7 +33,116 @@ class BookingSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['booking_id', 'user']
 
+# Columns of the compact list form, read with values() in the page query
+BOOKING_LIST_FIELDS = (
+    'id', 'booking_id', 'destination_id', 'start_date', 'end_date',
+    'number_of_travelers', 'total_price', 'status', 'payment_status',
+    'primary_contact_name', 'primary_contact_email', 'primary_contact_phone',
+    'created_at', 'updated_at',
+    'destination__name', 'destination__slug', 'destination__city', 'destination__country',
+    'destination__duration_days', 'destination__main_image', 'destination__category__name',
+)
+TRAVELER_FIELDS = BookingTravelerSerializer.Meta.fields
+
+# Staff exports, streamed by travel_backend.exports; one row per booking,
+# and one per traveler with its booking's reference. Passport numbers stay out
+BOOKING_EXPORT = Export(
+    'bookings',
+    lambda: Booking.objects.order_by('id'),
+    (
+        ('booking_id', 'booking_id'), ('created_at', 'created_at'), ('user_email', 'user__email'),
+        ('destination_id', 'destination_id'), ('destination', 'destination__name'),
+        ('start_date', 'start_date'), ('end_date', 'end_date'),
+        ('number_of_travelers', 'number_of_travelers'), ('total_price', 'total_price'),
+        ('status', 'status'), ('payment_status', 'payment_status'),
+        ('primary_contact_name', 'primary_contact_name'), ('primary_contact_email', 'primary_contact_email'),
+        ('primary_contact_phone', 'primary_contact_phone'),
+    ),
+    'created_at',
+)
+TRAVELER_EXPORT = Export(
+    'booking_travelers',
+    lambda: BookingTraveler.objects.order_by('booking_id', 'id'),
+    (
+        ('booking_id', 'booking__booking_id'), ('booking_created_at', 'booking__created_at'),
+        ('first_name', 'first_name'), ('last_name', 'last_name'),
+        ('date_of_birth', 'date_of_birth'), ('nationality', 'nationality'),
+    ),
+    'booking__created_at',
+)
+
+
+def booking_list_rows(rows, request):
+    """
+    Shape a page of BOOKING_LIST_FIELDS rows for the booking list.
+    
+    Destinations come as a short summary rather than the full nested
+    DestinationSerializer, and the travelers of the whole page are read
+    with one query, so a page costs two queries however long it is.
+    """
+    rows = list(rows)
+    travelers = {row['id']: [] for row in rows}
+    for traveler in BookingTraveler.objects.filter(booking_id__in=travelers).order_by('id').values(
+        'booking_id', *TRAVELER_FIELDS
+    ):
+        travelers[traveler.pop('booking_id')].append(traveler)
+    
+    user = request.user
+    bookings = []
+    for row in rows:
+        bookings.append({
+            'id': row['id'],
+            'booking_id': row['booking_id'],
+            'user': user.id,
+            'user_email': user.email,
+            'destination': row['destination_id'],
+            'destination_details': {
+                'id': row['destination_id'],
+                'name': row['destination__name'],
+                'slug': row['destination__slug'],
+                'city': row['destination__city'],
+                'country': row['destination__country'],
+                'duration_days': row['destination__duration_days'],
+                'main_image_url': image_url_from_values(
+                    row['destination__main_image'], row['destination__name'],
+                    row['destination__category__name'], request,
+                ),
+            },
+            'start_date': row['start_date'],
+            'end_date': row['end_date'],
+            'number_of_travelers': row['number_of_travelers'],
+            # Same string form DecimalField renders
+            'total_price': str(row['total_price']),
+            'primary_contact_name': row['primary_contact_name'],
+            'primary_contact_email': row['primary_contact_email'],
+            'primary_contact_phone': row['primary_contact_phone'],
+            'status': row['status'],
+            'payment_status': row['payment_status'],
+            'created_at': row['created_at'],
+            'updated_at': row['updated_at'],
+            'travelers': travelers[row['id']],
+        })
+    return bookings
+
+class DestinationField(serializers.PrimaryKeyRelatedField):
+    """
+    Destination by id, loaded with everything BookingSerializer renders so
+    the response after creating a booking needs no further query. A caller
+    that already fetched the destinations passes them as
+    ``context['destinations']``, keyed by id.
+    """
+    
+    def to_internal_value(self, data):
+        preloaded = self.context.get('destinations')
+        if preloaded is not None:
+            try:
+                return preloaded[int(data)]
+            except (KeyError, TypeError, ValueError):
+                pass
+        return super().to_internal_value(data)
+
 class CreateBookingSerializer(serializers.ModelSerializer):
+    destination = DestinationField(queryset=DestinationSerializer.setup_eager_loading(Destination.objects.all()))
     travelers = BookingTravelerSerializer(many=True, write_only=True)
     
     class Meta:
@@ -56,20 +171,39 @@ class CreateBookingSerializer(serializers.ModelSerializer):
     def create(self, validated_data):
         travelers_data = validated_data.pop('travelers')
         
-        # Calculate total price
+        # Price with the destination's pricing rules
         destination = validated_data['destination']
         number_of_travelers = validated_data['number_of_travelers']
-        total_price = destination.price_per_person * number_of_travelers
+        # A batch compiles every destination's rules up front; otherwise the
+        # destination loaded by DestinationField supplies the price
+        compiled = self.context.get('pricing', {}).get(destination.pk)
+        if compiled is None:
+            compiled = rules_for_many([destination])[destination.pk]
+        total_price = Decimal(
+            trip_price(destination.pk, validated_data['start_date'], number_of_travelers, compiled=compiled)
+        ).scaleb(-2)
         
-        # Create booking
-        booking = Booking.objects.create(
-            user=self.context['request'].user,
-            total_price=total_price,
-            **validated_data
-        )
-        
-        # Create travelers
-        for traveler_data in travelers_data:
-            BookingTraveler.objects.create(booking=booking, **traveler_data)
+        with transaction.atomic():
+            # Raises SoldOut; the seats come back if anything below fails
+            seats = reserve(destination.pk, validated_data['start_date'], number_of_travelers)
+            
+            # Create booking
+            booking = Booking.objects.create(
+                user=self.context['request'].user,
+                total_price=total_price,
+                seats_reserved=seats,
+                **validated_data
+            )
+            
+            # One INSERT for the whole group
+            travelers = BookingTraveler.objects.bulk_create([
+                BookingTraveler(booking=booking, **traveler_data)
+                for traveler_data in travelers_data
+            ])
         
+        # Serve booking.travelers from the rows just written
+        cached = booking.travelers.all()
+        cached._result_cache = travelers
+        cached._prefetch_done = True
+        booking._prefetched_objects_cache = {'travelers': cached}
         return booking
@@ -0,0 +1,55 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from destinations.models import Destination
+
+from . import pricing, summary, tasks
+from .availability import invalidate_availability
+from .models import Booking, DepartureInventory, PricingRule
+
+
+@receiver(post_save, sender=Booking)
+@receiver(post_delete, sender=Booking)
+def refresh_booking_summary(sender, instance, raw=False, origin=None, **kwargs):
+    # Creating, cancelling or otherwise changing a booking's status or price
+    # all go through save(), so the stored summary follows every one
+    if raw or not summary.materialized():
+        return
+    if isinstance(origin, get_user_model()):
+        # The user's summary row goes with them
+        return
+    user_id = instance.user_id
+    transaction.on_commit(lambda: summary.refresh_summary(user_id), robust=True)
+
+
+@receiver(post_save, sender=Booking)
+def queue_booking_created(sender, instance, created, raw=False, **kwargs):
+    # Queued in the booking's own transaction: the jobs exist exactly when the
+    # booking does, and the request pays for one INSERT however many there are
+    if created and not raw:
+        tasks.booking_created(instance)
+
+
+@receiver(post_save, sender=Booking)
+@receiver(post_save, sender=DepartureInventory)
+@receiver(post_delete, sender=DepartureInventory)
+def departure_changed(sender, instance, raw=False, **kwargs):
+    # Bookings take and cancellations give back seats; departures are also
+    # edited directly in the admin
+    if raw:
+        return
+    destination_id = instance.destination_id
+    transaction.on_commit(lambda: invalidate_availability(destination_id), robust=True)
+
+
+@receiver(post_save, sender=Destination)
+@receiver(post_delete, sender=Destination)
+@receiver(post_save, sender=PricingRule)
+@receiver(post_delete, sender=PricingRule)
+def pricing_changed(sender, instance, raw=False, **kwargs):
+    # Compiled rules carry the destination's price per person
+    if raw:
+        return
+    transaction.on_commit(pricing.invalidate_pricing, robust=True)
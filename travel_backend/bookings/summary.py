@@ -0,0 +1,129 @@
+"""
+The booking dashboard numbers for one user.
+
+Computing them is a single grouped aggregate over the user's bookings.
+With BOOKING_SUMMARY_MATERIALIZED on, they are also stored in one
+BookingSummary row per user, refreshed after every booking write, and the
+dashboard becomes a primary-key read.
+"""
+from bisect import bisect_left
+from decimal import Decimal
+
+from django.conf import settings
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+
+from .models import Booking, BookingSummary
+
+STATUSES = ('pending', 'confirmed', 'completed', 'cancelled')
+# Statuses that no longer count towards spend or upcoming trips
+INACTIVE_STATUSES = ('cancelled',)
+CENT = Decimal('0.01')
+
+
+def materialized():
+    return getattr(settings, 'BOOKING_SUMMARY_MATERIALIZED', False)
+
+
+def _grouped(bookings, today, *group_by):
+    return bookings.values(*group_by, 'status').annotate(
+        count=Count('id'),
+        spent=Sum('total_price'),
+        upcoming=Count('id', filter=Q(start_date__gte=today)),
+    ).order_by()
+
+
+def _empty():
+    summary = {f'{status}_bookings': 0 for status in STATUSES}
+    summary.update(total_bookings=0, total_spent=Decimal('0.00'), upcoming_trips=0)
+    return summary
+
+
+def _add(summary, row):
+    summary['total_bookings'] += row['count']
+    if row['status'] in STATUSES:
+        summary[f"{row['status']}_bookings"] = row['count']
+    if row['status'] not in INACTIVE_STATUSES:
+        # SQLite sums decimals as floats; back to cents
+        summary['total_spent'] = (summary['total_spent'] + (row['spent'] or 0)).quantize(CENT)
+        summary['upcoming_trips'] += row['upcoming']
+
+
+def compute_summary(user_id, today=None):
+    """The summary straight from the bookings table, in one query."""
+    summary = _empty()
+    for row in _grouped(Booking.objects.filter(user_id=user_id), today or timezone.localdate()):
+        _add(summary, row)
+    return summary
+
+
+def _upcoming_dates(bookings, today):
+    return bookings.filter(start_date__gte=today).exclude(status__in=INACTIVE_STATUSES)
+
+
+def _store(rows):
+    fields = [f'{status}_bookings' for status in STATUSES] + ['total_bookings', 'total_spent', 'upcoming_dates']
+    BookingSummary.objects.bulk_create(
+        rows, update_conflicts=True, unique_fields=['user'], update_fields=[*fields, 'updated_at'],
+    )
+
+
+def _row(user_id, summary, upcoming_dates):
+    fields = {key: value for key, value in summary.items() if key != 'upcoming_trips'}
+    return BookingSummary(user_id=user_id, upcoming_dates=sorted(upcoming_dates), **fields)
+
+
+def refresh_summary(user_id, today=None):
+    """Recompute and store one user's summary row."""
+    today = today or timezone.localdate()
+    summary = compute_summary(user_id, today)
+    upcoming_dates = [
+        start_date.isoformat() for start_date in
+        _upcoming_dates(Booking.objects.filter(user_id=user_id), today).values_list('start_date', flat=True)
+    ]
+    _store([_row(user_id, summary, upcoming_dates)])
+    return summary
+
+
+def rebuild_summaries(batch_size=1000, today=None):
+    """Recompute every user's row, two queries per batch of users; returns the number stored."""
+    from django.contrib.auth import get_user_model
+
+    today = today or timezone.localdate()
+    user_ids = get_user_model().objects.order_by('pk').values_list('pk', flat=True)
+    stored = 0
+    last = None
+    while True:
+        page = user_ids.filter(pk__gt=last) if last is not None else user_ids
+        chunk = list(page[:batch_size])
+        if not chunk:
+            return stored
+        last = chunk[-1]
+        bookings = Booking.objects.filter(user_id__in=chunk)
+        summaries = {user_id: _empty() for user_id in chunk}
+        dates = {user_id: [] for user_id in chunk}
+        for row in _grouped(bookings, today, 'user_id'):
+            _add(summaries[row['user_id']], row)
+        for user_id, start_date in _upcoming_dates(bookings, today).values_list('user_id', 'start_date'):
+            dates[user_id].append(start_date.isoformat())
+        _store([_row(user_id, summaries[user_id], dates[user_id]) for user_id in chunk])
+        stored += len(chunk)
+
+
+def summary_for(user_id, today=None):
+    """The dashboard numbers: one stored row when materialized, else one aggregate."""
+    if not materialized():
+        return compute_summary(user_id, today)
+    row = BookingSummary.objects.filter(user_id=user_id).first()
+    if row is None:
+        # Users whose bookings predate the setting, or who have none yet
+        return refresh_summary(user_id, today)
+
+    today = (today or timezone.localdate()).isoformat()
+    summary = {f'{status}_bookings': getattr(row, f'{status}_bookings') for status in STATUSES}
+    summary.update(
+        total_bookings=row.total_bookings,
+        total_spent=row.total_spent,
+        upcoming_trips=len(row.upcoming_dates) - bisect_left(row.upcoming_dates, today),
+    )
+    return summary
@@ -0,0 +1,149 @@
+"""
+Background work that follows a booking, run by the jobs worker.
+
+Every handler may run more than once for the same booking (a retry after
+a partial failure, or a reclaimed job), so each one either overwrites its
+result or is harmless to repeat.
+"""
+import logging
+from decimal import Decimal
+
+import requests
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.core.mail import send_mail
+from django.utils.crypto import salted_hmac
+from django.utils.html import escape, strip_tags
+from jobs.queue import enqueue_many, register_task
+
+from .models import Booking
+
+logger = logging.getLogger(__name__)
+
+SEND_CONFIRMATION = 'bookings.send_confirmation_email'
+GENERATE_INVOICE = 'bookings.generate_invoice'
+NOTIFY_PARTNER = 'bookings.notify_partner'
+# Everything queued for a new booking, in the order the worker picks it up
+BOOKING_CREATED_TASKS = (SEND_CONFIRMATION, GENERATE_INVOICE, NOTIFY_PARTNER)
+
+
+def booking_created(booking):
+    """Queue the follow-up work for a new booking in its own transaction, in one INSERT."""
+    enqueue_many((task, {'booking_id': booking.pk}) for task in BOOKING_CREATED_TASKS)
+
+
+def _booking(booking_id):
+    booking = Booking.objects.select_related('user', 'destination').filter(pk=booking_id).first()
+    if booking is None:
+        logger.info('Booking %s is gone, nothing to do', booking_id)
+    return booking
+
+
+def invoice_storage():
+    # Invoices hold contact and traveler names, so they live outside
+    # MEDIA_ROOT and are only served through the owner-checked invoice view
+    return FileSystemStorage(location=settings.INVOICE_ROOT)
+
+
+def invoice_path(booking):
+    # Booking references are sequential; the keyed suffix keeps file names
+    # unguessable should the directory ever be exposed
+    token = salted_hmac('bookings.invoice', booking.booking_id).hexdigest()[:20]
+    return f"{booking.booking_id}-{token}.html"
+
+
+@register_task(SEND_CONFIRMATION)
+def send_confirmation_email(booking_id):
+    booking = _booking(booking_id)
+    if booking is None:
+        return
+    html_message = f"""
+    <div style="font-family: Arial, sans-serif; max-width: 600px; margin: 0 auto;">
+        <div style="background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); padding: 30px; text-align: center;">
+            <h1 style="color: white; margin: 0;">Travel & Tourism</h1>
+            <p style="color: white; margin: 10px 0 0 0;">Your booking is confirmed!</p>
+        </div>
+
+        <div style="padding: 30px; background: #f8f9fa;">
+            <h2 style="color: #333;">Hi {escape(booking.primary_contact_name)},</h2>
+
+            <div style="background: white; padding: 20px; border-radius: 8px; margin: 20px 0;">
+                <p><strong>Booking reference:</strong> {booking.booking_id}</p>
+                <p><strong>Destination:</strong> {escape(booking.destination.name)}</p>
+                <p><strong>Dates:</strong> {booking.start_date:%d %b %Y} to {booking.end_date:%d %b %Y}</p>
+                <p><strong>Travelers:</strong> {booking.number_of_travelers}</p>
+                <p><strong>Total:</strong> ${booking.total_price}</p>
+            </div>
+
+            <p style="color: #999; font-size: 14px; border-top: 1px solid #eee; padding-top: 20px; margin-top: 30px;">
+                Best regards,<br>
+                The Travel & Tourism Team
+            </p>
+        </div>
+    </div>
+    """
+    send_mail(
+        subject=f"Booking confirmed - {booking.booking_id}",
+        message=strip_tags(html_message),
+        from_email=getattr(settings, 'DEFAULT_FROM_EMAIL', 'noreply@traveltour.com'),
+        recipient_list=[booking.primary_contact_email],
+        html_message=html_message,
+        fail_silently=False,
+    )
+
+
+@register_task(GENERATE_INVOICE)
+def generate_invoice(booking_id):
+    booking = _booking(booking_id)
+    if booking is None:
+        return
+    travelers = ''.join(
+        f"<li>{escape(traveler.first_name)} {escape(traveler.last_name)}</li>"
+        for traveler in booking.travelers.all()
+    )
+    # The total comes from the pricing rules in force when it was booked,
+    # so the destination's current list price may not add up to it
+    per_person = (booking.total_price / booking.number_of_travelers).quantize(Decimal('0.01'))
+    invoice = f"""<!DOCTYPE html>
+<html>
+<head><meta charset="utf-8"><title>Invoice {escape(booking.booking_id)}</title></head>
+<body style="font-family: Arial, sans-serif;">
+    <h1>Invoice {escape(booking.booking_id)}</h1>
+    <p>Issued {booking.created_at:%d %b %Y} to {escape(booking.primary_contact_name)} ({escape(booking.primary_contact_email)})</p>
+    <p>{escape(booking.destination.name)}, {booking.start_date:%d %b %Y} to {booking.end_date:%d %b %Y}</p>
+    <ul>{travelers}</ul>
+    <p>{booking.number_of_travelers} traveler(s) at ${per_person} each</p>
+    <p><strong>Total: ${booking.total_price}</strong></p>
+    <p>Payment status: {escape(booking.payment_status)}</p>
+</body>
+</html>
+"""
+    storage = invoice_storage()
+    path = invoice_path(booking)
+    # Storage would otherwise keep the first copy and save a renamed second one
+    if storage.exists(path):
+        storage.delete(path)
+    storage.save(path, ContentFile(invoice.encode()))
+
+
+@register_task(NOTIFY_PARTNER)
+def notify_partner(booking_id):
+    booking = _booking(booking_id)
+    if booking is None:
+        return
+    url = getattr(settings, 'BOOKING_PARTNER_WEBHOOK_URL', '')
+    if not url:
+        logger.info('No partner webhook configured, skipping notification for %s', booking.booking_id)
+        return
+    # A failed or refused delivery raises, and the worker retries it later
+    response = requests.post(url, json={
+        'event': 'booking.created',
+        'booking_id': booking.booking_id,
+        'destination': booking.destination.name,
+        'start_date': booking.start_date.isoformat(),
+        'end_date': booking.end_date.isoformat(),
+        'number_of_travelers': booking.number_of_travelers,
+        'total_price': str(booking.total_price),
+    }, timeout=10)
+    response.raise_for_status()
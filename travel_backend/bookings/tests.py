@@ -1,3 +1,724 @@
-from django.test import TestCase
+import csv
+import gzip
+import json
+import threading
+from contextlib import redirect_stdout
+from datetime import date, timedelta
+from decimal import Decimal
+from io import StringIO
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import OperationalError, connection, transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from destinations.models import Category, Destination
+from .ids import SequenceAllocator
+from .inventory import SoldOut, release, reserve
+from .models import Booking, BookingSummary, BookingTraveler, DepartureInventory, IdSequence, PricingRule
+from .pricing import compile_from, compile_rules, price_cell, quote, rules_for_many
+
+User = get_user_model()
+
+
+class BookingQueryCountTests(TestCase):
+    """Booking list and detail must cost the same number of queries however many bookings there are"""
+
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(name='Beach', icon='beach')
+        cls.destinations = [
+            Destination.objects.create(
+                name=f'Destination {i}',
+                city=f'City {i}',
+                country='Country',
+                category=category,
+                short_description='A short description',
+                long_description='A long description ' * 50,
+                price_per_person=100 + i,
+                duration_days=5,
+            )
+            for i in range(3)
+        ]
+        cls.user = User.objects.create_user(
+            username='traveler', email='traveler@example.com', password='password'
+        )
+        cls.other = User.objects.create_user(
+            username='other', email='other@example.com', password='password'
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def create_bookings(self, count, user=None, travelers=2):
+        bookings = []
+        for i in range(count):
+            destination = self.destinations[i % len(self.destinations)]
+            booking = Booking.objects.create(
+                user=user or self.user,
+                destination=destination,
+                start_date=date(2030, 1, 1) + timedelta(days=i),
+                end_date=date(2030, 1, 8) + timedelta(days=i),
+                number_of_travelers=travelers,
+                total_price=destination.price_per_person * travelers,
+                primary_contact_name='Test Traveler',
+                primary_contact_email='traveler@example.com',
+                primary_contact_phone='+15550100',
+            )
+            BookingTraveler.objects.bulk_create([
+                BookingTraveler(
+                    booking=booking, first_name=f'Traveler {n}', last_name=f'Booking {i}',
+                    date_of_birth=date(1990, 1, 1), nationality='Testland',
+                )
+                for n in range(travelers)
+            ])
+            bookings.append(booking)
+        return bookings
+
+    def test_list_query_count_is_independent_of_booking_count(self):
+        for total in (1, 5, 15):
+            with self.subTest(bookings=total):
+                self.create_bookings(total - Booking.objects.filter(user=self.user).count())
+                # One query for the page of bookings, one for their travelers
+                with self.assertNumQueries(2):
+                    response = self.client.get(reverse('booking-list-create'))
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(len(response.json()['results']), total)
+
+    def test_list_rows_are_compact_and_complete(self):
+        booking = self.create_bookings(1, travelers=3)[0]
+        self.create_bookings(2, user=self.other)
+        row, = self.client.get(reverse('booking-list-create')).json()['results']
+
+        self.assertEqual(row['booking_id'], booking.booking_id)
+        self.assertEqual(row['user_email'], 'traveler@example.com')
+        self.assertEqual(Decimal(row['total_price']), booking.total_price)
+        self.assertEqual(row['destination_details']['name'], 'Destination 0')
+        self.assertNotIn('long_description', row['destination_details'])
+        self.assertTrue(row['destination_details']['main_image_url'].startswith('https://'))
+        self.assertEqual(
+            [traveler['first_name'] for traveler in row['travelers']],
+            ['Traveler 0', 'Traveler 1', 'Traveler 2'],
+        )
+
+    def test_detail_query_count_is_independent_of_traveler_count(self):
+        small, = self.create_bookings(1, travelers=1)
+        large, = self.create_bookings(1, travelers=10)
+        for booking in (small, large):
+            with self.subTest(travelers=booking.number_of_travelers):
+                # The booking with its user, destination and category, then its travelers
+                with self.assertNumQueries(2):
+                    response = self.client.get(reverse('booking-detail', args=[booking.pk]))
+                data = response.json()
+                self.assertEqual(len(data['travelers']), booking.number_of_travelers)
+                self.assertEqual(data['destination_details']['long_description'], 'A long description ' * 50)
+
+
+class BookingSummaryTests(TestCase):
+    """The booking dashboard is one aggregate, or one stored row when materialized"""
+
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(name='Beach', icon='beach')
+        cls.destination = Destination.objects.create(
+            name='Destination', city='City', country='Country', category=category,
+            short_description='A short description', long_description='A long description',
+            price_per_person=100, duration_days=5,
+        )
+        cls.user = User.objects.create_user(
+            username='traveler', email='traveler@example.com', password='password'
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def book(self, start, status='pending', price=200):
+        return Booking.objects.create(
+            user=self.user, destination=self.destination, start_date=start, end_date=start + timedelta(days=5),
+            number_of_travelers=2, total_price=price, status=status, primary_contact_name='Test Traveler',
+            primary_contact_email='traveler@example.com', primary_contact_phone='+15550100',
+        )
+
+    def book_mix(self):
+        today = date.today()
+        self.book(today + timedelta(days=30), 'confirmed', 300)
+        self.book(today + timedelta(days=60))
+        self.book(today - timedelta(days=60), 'completed', 150)
+        self.book(today + timedelta(days=90), 'cancelled', 500)
+
+    def summary(self, queries):
+        with self.assertNumQueries(queries):
+            response = self.client.get(reverse('booking-summary'))
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_summary_is_one_query(self):
+        self.book_mix()
+        self.assertEqual(self.summary(1), {
+            'total_bookings': 4, 'pending_bookings': 1, 'confirmed_bookings': 1,
+            'completed_bookings': 1, 'cancelled_bookings': 1,
+            'total_spent': '650.00', 'upcoming_trips': 2,
+        })
+
+    @override_settings(BOOKING_SUMMARY_MATERIALIZED=True)
+    def test_materialized_summary_follows_booking_writes(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.book_mix()
+        self.assertTrue(BookingSummary.objects.filter(user=self.user).exists())
+        expected = self.summary(1)
+        self.assertEqual(expected['upcoming_trips'], 2)
+        self.assertEqual(expected['total_spent'], '650.00')
+
+        booking = Booking.objects.get(status='confirmed')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('cancel-booking', args=[booking.pk]))
+        data = self.summary(1)
+        self.assertEqual(data['cancelled_bookings'], 2)
+        self.assertEqual(data['confirmed_bookings'], 0)
+        self.assertEqual(data['total_spent'], '350.00')
+        self.assertEqual(data['upcoming_trips'], 1)
+
+
+class AvailabilityTests(TestCase):
+    """A destination's calendar is one cache read and follows bookings and cancellations"""
+
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(name='Beach', icon='beach')
+        cls.destination = Destination.objects.create(
+            name='Destination', city='City', country='Country', category=category,
+            short_description='A short description', long_description='A long description',
+            price_per_person=120, duration_days=5,
+        )
+        cls.user = User.objects.create_user(
+            username='traveler', email='traveler@example.com', password='password'
+        )
+        cls.departure = date.today() + timedelta(days=10)
+        DepartureInventory.objects.create(
+            destination=cls.destination, departure_date=cls.departure, capacity=5, remaining=5
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def availability(self, **params):
+        return self.client.get(reverse('destination-availability', args=[self.destination.pk]), params)
+
+    def remaining_on_departure(self):
+        data = self.availability(**{'from': self.departure.isoformat(), 'to': self.departure.isoformat()}).json()
+        return data['days'][0]['remaining']
+
+    def test_year_is_one_cache_read(self):
+        first, last = date.today(), date.today() + timedelta(days=364)
+        params = {'from': first.isoformat(), 'to': last.isoformat()}
+        self.assertEqual(self.availability(**params).status_code, 200)
+        with self.assertNumQueries(0):
+            data = self.availability(**params).json()
+        self.assertEqual(len(data['days']), 365)
+        self.assertEqual(data['days'][0], {
+            'date': first.isoformat(), 'remaining': None, 'available': True, 'price': '120.00',
+        })
+        self.assertEqual(data['days'][10]['remaining'], 5)
+
+    def test_bookings_and_cancellations_update_the_calendar(self):
+        self.assertEqual(self.remaining_on_departure(), 5)
+        # The create view prints debugging output
+        with self.captureOnCommitCallbacks(execute=True), redirect_stdout(StringIO()):
+            response = self.client.post(reverse('booking-list-create'), {
+                'destination': self.destination.pk,
+                'start_date': self.departure.isoformat(),
+                'end_date': (self.departure + timedelta(days=5)).isoformat(),
+                'number_of_travelers': 2,
+                'primary_contact_name': 'Test Traveler',
+                'primary_contact_phone': '+15550100',
+                'travelers': [
+                    {'first_name': f'Traveler {n}', 'last_name': 'Test', 'date_of_birth': '1990-01-01',
+                     'nationality': 'Testland'}
+                    for n in range(2)
+                ],
+            }, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(self.remaining_on_departure(), 3)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('cancel-booking', args=[response.json()['booking']['id']]))
+        self.assertEqual(self.remaining_on_departure(), 5)
+
+    def test_invalid_ranges(self):
+        today = date.today()
+        for params in (
+            {'from': 'soon'},
+            {'from': (today - timedelta(days=1)).isoformat()},
+            {'from': today.isoformat(), 'to': (today + timedelta(days=400)).isoformat()},
+            {'from': (today + timedelta(days=5)).isoformat(), 'to': today.isoformat()},
+        ):
+            with self.subTest(**params):
+                self.assertEqual(self.availability(**params).status_code, 400)
+        response = self.client.get(reverse('destination-availability', args=[self.destination.pk + 1000]))
+        self.assertEqual(response.status_code, 404)
+
+    def test_travelers_is_one_party_size(self):
+        self.assertEqual(self.availability(travelers='3').status_code, 200)
+        for travelers in ('1,2', 'two', '0', '11'):
+            with self.subTest(travelers=travelers):
+                response = self.availability(travelers=travelers)
+                self.assertEqual(response.status_code, 400)
+                self.assertTrue(response.json()['error'].startswith('travelers must be'))
+
+
+class InventoryTests(TestCase):
+    """Seats are taken by bookings, refused at capacity and given back on cancellation or rollback"""
+
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(name='Beach', icon='beach')
+        cls.destination = Destination.objects.create(
+            name='Destination', city='City', country='Country', category=category,
+            short_description='A short description', long_description='A long description',
+            price_per_person=120, duration_days=5,
+        )
+        cls.user = User.objects.create_user(
+            username='traveler', email='traveler@example.com', password='password'
+        )
+        cls.departure = date.today() + timedelta(days=10)
+        DepartureInventory.objects.create(
+            destination=cls.destination, departure_date=cls.departure, capacity=3, remaining=3
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def remaining(self, departure_date=None):
+        return DepartureInventory.objects.get(
+            destination=self.destination, departure_date=departure_date or self.departure
+        ).remaining
+
+    def book(self, travelers):
+        # The create view prints debugging output
+        with self.captureOnCommitCallbacks(execute=True), redirect_stdout(StringIO()):
+            return self.client.post(reverse('booking-list-create'), {
+                'destination': self.destination.pk,
+                'start_date': self.departure.isoformat(),
+                'end_date': (self.departure + timedelta(days=5)).isoformat(),
+                'number_of_travelers': travelers,
+                'primary_contact_name': 'Test Traveler',
+                'primary_contact_phone': '+15550100',
+                'travelers': [
+                    {'first_name': f'Traveler {n}', 'last_name': 'Test', 'date_of_birth': '1990-01-01',
+                     'nationality': 'Testland'}
+                    for n in range(travelers)
+                ],
+            }, format='json')
+
+    def test_sold_out_at_capacity(self):
+        self.assertEqual(reserve(self.destination.pk, self.departure, 2), 2)
+        with self.assertRaises(SoldOut) as raised:
+            reserve(self.destination.pk, self.departure, 2)
+        self.assertEqual((raised.exception.requested, raised.exception.remaining), (2, 1))
+        self.assertEqual(self.remaining(), 1)
+
+        self.assertEqual(reserve(self.destination.pk, self.departure, 1), 1)
+        self.assertEqual(self.remaining(), 0)
+        response = self.book(1)
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()['seats_remaining'], 0)
+        self.assertFalse(Booking.objects.exists())
+
+    def test_unmanaged_departures_take_nothing(self):
+        other_day = self.departure + timedelta(days=1)
+        self.assertEqual(reserve(self.destination.pk, other_day, 50), 0)
+        self.assertFalse(DepartureInventory.objects.filter(departure_date=other_day).exists())
+
+        with override_settings(DEPARTURE_CAPACITY=4):
+            self.assertEqual(reserve(self.destination.pk, other_day, 3), 3)
+            self.assertEqual(self.remaining(other_day), 1)
+            with self.assertRaises(SoldOut):
+                reserve(self.destination.pk, other_day, 2)
+
+    def test_cancel_releases_the_seats_once(self):
+        response = self.book(2)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(self.remaining(), 1)
+        booking_id = response.json()['booking']['id']
+        self.assertEqual(Booking.objects.get(pk=booking_id).seats_reserved, 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse('cancel-booking', args=[booking_id]))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.remaining(), 3)
+        self.assertEqual(Booking.objects.get(pk=booking_id).seats_reserved, 0)
+
+        response = self.client.post(reverse('cancel-booking', args=[booking_id]))
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.remaining(), 3)
+
+    def test_release_never_exceeds_capacity(self):
+        reserve(self.destination.pk, self.departure, 1)
+        release(self.destination.pk, self.departure, 5)
+        self.assertEqual(self.remaining(), 3)
+        release(self.destination.pk, self.departure + timedelta(days=1), 2)
+        self.assertEqual(DepartureInventory.objects.count(), 1)
+
+    def test_rolled_back_booking_returns_its_seats(self):
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                reserve(self.destination.pk, self.departure, 3)
+                Booking.objects.create(
+                    user=self.user, destination=self.destination, start_date=self.departure,
+                    end_date=self.departure + timedelta(days=5), number_of_travelers=3,
+                    total_price=360, primary_contact_name='Test Traveler',
+                    primary_contact_email='traveler@example.com', primary_contact_phone='+15550100',
+                    seats_reserved=3,
+                )
+                self.assertEqual(self.remaining(), 0)
+                raise RuntimeError('booking failed')
+        self.assertEqual(self.remaining(), 3)
+        self.assertFalse(Booking.objects.exists())
+
+        # A row created for the default capacity goes with it
+        other_day = self.departure + timedelta(days=1)
+        with override_settings(DEPARTURE_CAPACITY=4), self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                reserve(self.destination.pk, other_day, 2)
+                raise RuntimeError('booking failed')
+        self.assertFalse(DepartureInventory.objects.filter(departure_date=other_day).exists())
+
+    def test_batch_item_sold_out_rolls_back_alone(self):
+        item = {
+            'destination': self.destination.pk,
+            'start_date': self.departure.isoformat(),
+            'end_date': (self.departure + timedelta(days=5)).isoformat(),
+            'number_of_travelers': 2,
+            'primary_contact_name': 'Test Traveler',
+            'primary_contact_phone': '+15550100',
+            'travelers': [
+                {'first_name': f'Traveler {n}', 'last_name': 'Test', 'date_of_birth': '1990-01-01',
+                 'nationality': 'Testland'}
+                for n in range(2)
+            ],
+        }
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse('booking-batch'), {'bookings': [item, item]}, format='json')
+        self.assertEqual(response.status_code, 207)
+        self.assertEqual([result['success'] for result in response.json()['results']], [True, False])
+        self.assertEqual(response.json()['results'][1]['seats_remaining'], 1)
+        self.assertEqual(self.remaining(), 1)
+        self.assertEqual(Booking.objects.count(), 1)
+
+
+class SequenceAllocatorTests(TestCase):
+    """Blocks are drawn from memory, and one reserved in a rolled back transaction is never reused"""
+
+    def setUp(self):
+        self.allocator = SequenceAllocator('test', start=1, block_size=5)
+
+    def next_value(self):
+        return IdSequence.objects.get(name='test').next_value
+
+    def test_block_is_drawn_from_memory(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(self.allocator.next(), 1)
+        with self.assertNumQueries(0):
+            self.assertEqual([self.allocator.next() for _ in range(4)], [2, 3, 4, 5])
+        self.assertEqual(self.allocator.next(), 6)
+        self.assertEqual(self.next_value(), 11)
+
+    def test_pending_block_is_usable_within_its_transaction(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.assertEqual(self.allocator.next(), 1)
+            with transaction.atomic():
+                self.assertEqual(self.allocator.next(), 2)
+            self.assertEqual(self.allocator.next(), 3)
+        self.assertEqual(self.next_value(), 6)
+        for callback in callbacks:
+            callback()
+        self.assertEqual(self.allocator.next(), 4)
+        self.assertEqual(self.next_value(), 6)
+
+    def test_rolled_back_block_is_abandoned(self):
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                self.assertEqual(self.allocator.next(), 1)
+                raise RuntimeError('booking failed')
+        self.assertFalse(IdSequence.objects.filter(name='test').exists())
+        # The block left in memory died with the savepoint, so the numbers
+        # come from the sequence again, as they would in any other process
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(self.allocator.next(), 1)
+        self.assertEqual(self.next_value(), 6)
+
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                self.allocator.next()
+                self.allocator.next()
+                self.allocator.next()
+                self.allocator.next()
+                # The block runs out and the next one is reserved in here
+                self.assertEqual(self.allocator.next(), 6)
+                raise RuntimeError('booking failed')
+        self.assertEqual(self.next_value(), 6)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(self.allocator.next(), 6)
+
+
+class SequenceAllocatorThreadTests(TransactionTestCase):
+    """Threads reserving blocks concurrently never hand out the same number"""
+
+    def test_numbers_are_unique_across_threads(self):
+        allocator = SequenceAllocator('test', start=1, block_size=7)
+        workers, per_worker = 4, 50
+        start = threading.Barrier(workers)
+        numbers, errors = [], []
+
+        def draw():
+            while True:
+                try:
+                    return allocator.next()
+                except OperationalError as e:
+                    # SQLite's shared in-memory test database reports a
+                    # locked table at once instead of waiting for it
+                    if 'locked' not in str(e):
+                        raise
+
+        def work():
+            try:
+                start.wait()
+                drawn = [draw() for _ in range(per_worker)]
+                numbers.extend(drawn)
+            except Exception as e:
+                errors.append(e)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=work) for _ in range(workers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(len(set(numbers)), workers * per_worker)
+        self.assertLessEqual(max(numbers), IdSequence.objects.get(name='test').next_value - 1)
+
+
+class IdempotentBookingTests(TestCase):
+    """A retried booking with the same Idempotency-Key is created once, per user"""
+
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(name='Beach', icon='beach')
+        cls.destination = Destination.objects.create(
+            name='Destination', city='City', country='Country', category=category,
+            short_description='A short description', long_description='A long description',
+            price_per_person=120, duration_days=5,
+        )
+        cls.user = User.objects.create_user(
+            username='traveler', email='traveler@example.com', password='password'
+        )
+        cls.other = User.objects.create_user(
+            username='other', email='other@example.com', password='password'
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def book(self, user, key='booking-1'):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(user)}')
+        with redirect_stdout(StringIO()):
+            return client.post(reverse('booking-list-create'), {
+                'destination': self.destination.pk,
+                'start_date': '2030-01-01',
+                'end_date': '2030-01-08',
+                'number_of_travelers': 1,
+                'primary_contact_name': 'Test Traveler',
+                'primary_contact_phone': '+15550100',
+                'travelers': [
+                    {'first_name': 'Traveler', 'last_name': 'Test', 'date_of_birth': '1990-01-01',
+                     'nationality': 'Testland'}
+                ],
+            }, format='json', HTTP_IDEMPOTENCY_KEY=key)
+
+    def test_replay_skips_authentication_and_the_serializer(self):
+        first = self.book(self.user)
+        self.assertEqual(first.status_code, 201)
+        with self.assertNumQueries(0):
+            replay = self.book(self.user)
+        self.assertEqual(replay.json()['booking']['booking_id'], first.json()['booking']['booking_id'])
+        self.assertEqual(Booking.objects.count(), 1)
+
+    def test_keys_are_per_user(self):
+        self.book(self.user)
+        response = self.book(self.other)
+        self.assertEqual(response.status_code, 201)
+        self.assertNotIn('Idempotent-Replayed', response)
+        self.assertEqual(Booking.objects.filter(user=self.other).count(), 1)
+
+
+class PricingTests(TestCase):
+    """Compiled rules price whole grids exactly as rule-by-rule pricing does"""
+
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(name='Beach', icon='beach')
+        cls.destination = Destination.objects.create(
+            name='Destination', city='City', country='Country', category=category,
+            short_description='A short description', long_description='A long description',
+            price_per_person=Decimal('99.99'), duration_days=5,
+        )
+        cls.user = User.objects.create_user(
+            username='traveler', email='traveler@example.com', password='password'
+        )
+        cls.today = date.today()
+        cls.rules = [
+            PricingRule(name='Summer', kind=PricingRule.SEASONAL, adjustment_percent=Decimal('25.00'),
+                        start_date=cls.today + timedelta(days=30), end_date=cls.today + timedelta(days=90)),
+            PricingRule(name='Peak', kind=PricingRule.SEASONAL, adjustment_percent=Decimal('7.50'),
+                        start_date=cls.today + timedelta(days=60), end_date=cls.today + timedelta(days=400)),
+            PricingRule(name='Early', kind=PricingRule.EARLY_BIRD, adjustment_percent=Decimal('-5.00'),
+                        min_days_ahead=45),
+            PricingRule(name='Very early', kind=PricingRule.EARLY_BIRD, adjustment_percent=Decimal('-12.00'),
+                        min_days_ahead=180),
+            PricingRule(name='Filling up', kind=PricingRule.OCCUPANCY, adjustment_percent=Decimal('10.00'),
+                        min_occupancy_percent=50),
+            PricingRule(name='Group', kind=PricingRule.GROUP, adjustment_percent=Decimal('-3.33'),
+                        min_travelers=4),
+            PricingRule(name='Big group', kind=PricingRule.GROUP, adjustment_percent=Decimal('-10.00'),
+                        min_travelers=8),
+        ]
+        for rule in cls.rules:
+            rule.destination = cls.destination
+            rule.save()
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_grid_matches_rule_by_rule_pricing(self):
+        first = self.today - timedelta(days=5)
+        occupancy = [(day * 7) % 101 for day in range(365)]
+        result = quote(compile_from(9999, self.rules), first, 365, range(1, 11), self.today, occupancy)
+        for row, size in enumerate(range(1, 11)):
+            for day in range(365):
+                expected = price_cell(
+                    self.rules, 9999, first + timedelta(days=day), size, self.today, occupancy[day]
+                )
+                self.assertEqual(result.totals[row][day], expected, (size, day))
+
+    def test_quote_endpoint(self):
+        first = self.today + timedelta(days=200)
+        params = {'destination': self.destination.pk, 'from': first.isoformat(), 'travelers': '8,1'}
+        data = self.client.get(reverse('booking-quote'), params).json()
+        self.assertEqual(data['travelers'], [1, 8])
+        self.assertEqual(len(data['days']), 90)
+        # 99.99 +7.5% = 107.49, -12% = 94.59; the big group takes 10% off that
+        self.assertEqual(data['days'][0]['prices']['1'], {'per_person': '94.59', 'total': '94.59'})
+        self.assertEqual(data['days'][0]['prices']['8'], {'per_person': '85.13', 'total': '681.04'})
+
+        with self.assertNumQueries(0):
+            self.client.get(reverse('booking-quote'), params)
+        for bad in ({'travelers': '0'}, {'travelers': '11'}, {'from': 'soon'}, {}):
+            with self.subTest(**bad):
+                query = dict(params, **bad) if bad else {}
+                self.assertEqual(self.client.get(reverse('booking-quote'), query).status_code, 400)
+
+    def test_loaded_destinations_compile_with_one_query(self):
+        other = Destination.objects.create(
+            name='Other', city='City', country='Country', category=self.destination.category,
+            short_description='A short description', long_description='A long description',
+            price_per_person=Decimal('10.00'), duration_days=3,
+        )
+        PricingRule.objects.create(
+            name='Everywhere', kind=PricingRule.SEASONAL, adjustment_percent=Decimal('-1.00'),
+            start_date=self.today, end_date=self.today + timedelta(days=100),
+        )
+        cache.clear()
+        with self.assertNumQueries(1):
+            compiled = rules_for_many([self.destination, other])
+        self.assertEqual(compiled, {pk: compile_rules(pk) for pk in (self.destination.pk, other.pk)})
+        with self.assertNumQueries(0):
+            self.assertEqual(rules_for_many([self.destination, other]), compiled)
+
+    def test_rule_changes_reach_quotes_and_bookings(self):
+        start = self.today + timedelta(days=10)
+        params = {'destination': self.destination.pk, 'from': start.isoformat(), 'to': start.isoformat()}
+
+        def total():
+            return self.client.get(reverse('booking-quote'), params).json()['days'][0]['prices']['1']['total']
+
+        self.assertEqual(total(), '99.99')
+        with self.captureOnCommitCallbacks(execute=True):
+            PricingRule.objects.create(
+                name='Holiday', kind=PricingRule.SEASONAL, adjustment_percent=Decimal('100.00'),
+                start_date=start, end_date=start,
+            )
+        self.assertEqual(total(), '199.98')
+
+        with redirect_stdout(StringIO()):
+            response = self.client.post(reverse('booking-list-create'), {
+                'destination': self.destination.pk,
+                'start_date': start.isoformat(),
+                'end_date': (start + timedelta(days=5)).isoformat(),
+                'number_of_travelers': 1,
+                'primary_contact_name': 'Test Traveler',
+                'primary_contact_phone': '+15550100',
+                'travelers': [
+                    {'first_name': 'Traveler', 'last_name': 'Test', 'date_of_birth': '1990-01-01',
+                     'nationality': 'Testland'}
+                ],
+            }, format='json')
+        self.assertEqual(Decimal(response.json()['booking']['total_price']), Decimal('199.98'))
+
+
+class BookingExportTests(TestCase):
+    """Staff stream bookings and travelers as CSV or JSON Lines"""
+
+    @classmethod
+    def setUpTestData(cls):
+        BookingQueryCountTests.setUpTestData.__func__(cls)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    create_bookings = BookingQueryCountTests.create_bookings
+
+    def export(self, name='booking-export', **params):
+        response = self.client.get(reverse(name), params)
+        self.assertEqual(response.status_code, 200)
+        content = b''.join(response.streaming_content)
+        return gzip.decompress(content) if params.get('gzip') else content
+
+    def test_staff_only(self):
+        self.assertEqual(self.client.get(reverse('booking-export')).status_code, 403)
+
+    def test_bookings_and_travelers(self):
+        self.user.is_staff = True
+        bookings = self.create_bookings(3, travelers=2) + self.create_bookings(1, user=self.other)
+
+        rows = list(csv.DictReader(StringIO(self.export().decode())))
+        self.assertEqual([row['booking_id'] for row in rows], [booking.booking_id for booking in bookings])
+        self.assertEqual(rows[3]['user_email'], 'other@example.com')
+        self.assertEqual(Decimal(rows[0]['total_price']), bookings[0].total_price)
+
+        lines = self.export('booking-traveler-export', type='jsonl', gzip='1').decode().splitlines()
+        travelers = [json.loads(line) for line in lines]
+        self.assertEqual(len(travelers), 8)
+        self.assertEqual(travelers[0]['booking_id'], bookings[0].booking_id)
+        self.assertNotIn('passport_number', travelers[0])
+
+        Booking.objects.filter(pk=bookings[0].pk).update(created_at=timezone.now() - timedelta(days=40))
+        since = (timezone.localdate() - timedelta(days=1)).isoformat()
+        self.assertEqual(len(self.export(since=since).decode().splitlines()), 1 + 3)
+        self.assertEqual(self.client.get(reverse('booking-export'), {'type': 'xml'}).status_code, 400)
@@ -5,5 +5,10 @@ urlpatterns = [
     path('', views.BookingListCreateView.as_view(), name='booking-list-create'),
     path('<int:pk>/', views.BookingDetailView.as_view(), name='booking-detail'),
     path('<int:pk>/cancel/', views.cancel_booking, name='cancel-booking'),
+    path('<int:pk>/invoice/', views.booking_invoice, name='booking-invoice'),
     path('summary/', views.booking_summary, name='booking-summary'),
+    path('batch/', views.create_bookings_batch, name='booking-batch'),
+    path('quote/', views.booking_quote, name='booking-quote'),
+    path('export/', views.export_bookings, name='booking-export'),
+    path('export/travelers/', views.export_bookings, {'travelers': True}, name='booking-traveler-export'),
 ]
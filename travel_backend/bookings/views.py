@@ -1,11 +1,39 @@
 from rest_framework import generics, permissions, status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
+from django.db import transaction
+from django.http import FileResponse
 from django.shortcuts import get_object_or_404
+from django.utils.decorators import method_decorator
+from django.utils import timezone
+from datetime import date, timedelta
+from decimal import Decimal
+from destinations.models import Destination
+from destinations.serializers import DestinationSerializer
+from travel_backend.exports import parse_export_request, streaming_response
+from travel_backend.idempotency import idempotent
+from .availability import calendar, horizon, seats_left
+from .inventory import SoldOut, release
+from .pricing import quote_destination, rules_for_many
 from .models import Booking
-from .serializers import BookingSerializer, CreateBookingSerializer
+from .serializers import (
+    BOOKING_EXPORT, BOOKING_LIST_FIELDS, TRAVELER_EXPORT, BookingSerializer, CreateBookingSerializer,
+    booking_list_rows,
+)
+from .summary import summary_for
+from .tasks import invoice_path, invoice_storage
 import json
 
+# Most bookings one batch request may create
+MAX_BATCH_BOOKINGS = 50
+# Days of availability, and of quotes, returned when no end date is given
+DEFAULT_AVAILABILITY_DAYS = 31
+DEFAULT_QUOTE_DAYS = 90
+# Largest party a quote prices
+MAX_QUOTE_TRAVELERS = 10
+
+# Retried creates with the same Idempotency-Key get the first response back
+@method_decorator(idempotent, name='dispatch')
 class BookingListCreateView(generics.ListCreateAPIView):
     permission_classes = [permissions.IsAuthenticated]
     
@@ -17,6 +45,14 @@ class BookingListCreateView(generics.ListCreateAPIView):
     def get_queryset(self):
         return Booking.objects.filter(user=self.request.user)
     
+    def list(self, request, *args, **kwargs):
+        # Compact rows straight from values(); the full nested form is on the detail view
+        queryset = self.filter_queryset(self.get_queryset()).values(*BOOKING_LIST_FIELDS)
+        page = self.paginate_queryset(queryset)
+        if page is None:
+            return Response(booking_list_rows(queryset, request))
+        return self.get_paginated_response(booking_list_rows(page, request))
+    
     def create(self, request, *args, **kwargs):
         print("=== BOOKING DEBUG ===")
         print(f"Request data: {request.data}")
@@ -43,6 +79,11 @@ class BookingListCreateView(generics.ListCreateAPIView):
                 'message': 'Booking created successfully',
                 'booking': BookingSerializer(booking).data
             }, status=status.HTTP_201_CREATED)
+        except SoldOut as e:
+            return Response({
+                'error': str(e),
+                'seats_remaining': e.remaining
+            }, status=status.HTTP_409_CONFLICT)
         except Exception as e:
             print(f"Error creating booking: {str(e)}")
             return Response({
@@ -54,29 +95,35 @@ class BookingDetailView(generics.RetrieveUpdateAPIView):
     serializer_class = BookingSerializer
     
     def get_queryset(self):
-        return Booking.objects.filter(user=self.request.user)
+        return Booking.objects.filter(user=self.request.user).select_related(
+            'user', 'destination__category'
+        ).prefetch_related('travelers')
 
 @api_view(['POST'])
 @permission_classes([permissions.IsAuthenticated])
 def cancel_booking(request, pk):
     """Cancel a booking"""
     try:
-        booking = get_object_or_404(Booking, pk=pk, user=request.user)
-        
-        if booking.status == 'cancelled':
-            return Response(
-                {'error': 'Booking is already cancelled'}, 
-                status=status.HTTP_400_BAD_REQUEST
-            )
-        
-        if booking.status == 'completed':
-            return Response(
-                {'error': 'Cannot cancel completed booking'}, 
-                status=status.HTTP_400_BAD_REQUEST
-            )
-        
-        booking.status = 'cancelled'
-        booking.save()
+        with transaction.atomic():
+            # Locked so two cancellations cannot both release the seats
+            booking = get_object_or_404(Booking.objects.select_for_update(), pk=pk, user=request.user)
+            
+            if booking.status == 'cancelled':
+                return Response(
+                    {'error': 'Booking is already cancelled'}, 
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            
+            if booking.status == 'completed':
+                return Response(
+                    {'error': 'Cannot cancel completed booking'}, 
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            
+            release(booking.destination_id, booking.start_date, booking.seats_reserved)
+            booking.status = 'cancelled'
+            booking.seats_reserved = 0
+            booking.save()
         
         serializer = BookingSerializer(booking)
         return Response({
@@ -92,19 +139,128 @@ def cancel_booking(request, pk):
 
 @api_view(['GET'])
 @permission_classes([permissions.IsAuthenticated])
-def booking_summary(request):
-    """Get booking summary for the user"""
+def booking_invoice(request, pk):
+    """
+    The booking's invoice, once the jobs worker has generated it
+    GET /api/bookings/{id}/invoice/
+    """
+    booking = get_object_or_404(Booking.objects.only('booking_id'), pk=pk, user=request.user)
+    storage = invoice_storage()
+    path = invoice_path(booking)
+    if not storage.exists(path):
+        return Response(
+            {'error': 'The invoice is not ready yet'},
+            status=status.HTTP_404_NOT_FOUND
+        )
+    return FileResponse(
+        storage.open(path, 'rb'), content_type='text/html; charset=utf-8',
+        filename=f'invoice-{booking.booking_id}.html',
+    )
+
+@idempotent
+@api_view(['POST'])
+@permission_classes([permissions.IsAuthenticated])
+def create_bookings_batch(request):
+    """
+    Create several bookings in one request, e.g. for agency partners
+    POST /api/bookings/batch/
+    Body: {"bookings": [{...booking...}, ...]}
+    
+    Each booking succeeds or fails on its own; the response lists the
+    outcome of every item in request order.
+    """
+    items = request.data.get('bookings') if isinstance(request.data, dict) else None
+    if not isinstance(items, list) or not items:
+        return Response(
+            {'error': 'bookings must be a non-empty list'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    if len(items) > MAX_BATCH_BOOKINGS:
+        return Response(
+            {'error': f'At most {MAX_BATCH_BOOKINGS} bookings per request'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
     try:
-        user_bookings = Booking.objects.filter(user=request.user)
-        
-        summary = {
-            'total_bookings': user_bookings.count(),
-            'pending_bookings': user_bookings.filter(status='pending').count(),
-            'confirmed_bookings': user_bookings.filter(status='confirmed').count(),
-            'completed_bookings': user_bookings.filter(status='completed').count(),
-            'cancelled_bookings': user_bookings.filter(status='cancelled').count(),
+        # Every destination in the batch in one query
+        destination_ids = set()
+        for item in items:
+            try:
+                destination_ids.add(int(item.get('destination')))
+            except (AttributeError, TypeError, ValueError):
+                pass
+        destinations = DestinationSerializer.setup_eager_loading(Destination.objects.all()).in_bulk(destination_ids)
+        # and their pricing rules in one more, unless already cached
+        context = {
+            'request': request, 'destinations': destinations,
+            'pricing': rules_for_many(list(destinations.values())),
         }
         
+        results = []
+        # One transaction for the batch with a savepoint per booking, so a
+        # failed item rolls back alone and the rest commit together
+        with transaction.atomic():
+            for index, item in enumerate(items):
+                if not isinstance(item, dict):
+                    results.append({'index': index, 'success': False, 'error': 'Each booking must be an object'})
+                    continue
+                if 'primary_contact_email' not in item and request.user.email:
+                    item = {**item, 'primary_contact_email': request.user.email}
+                serializer = CreateBookingSerializer(data=item, context=context)
+                if not serializer.is_valid():
+                    results.append({'index': index, 'success': False, 'errors': serializer.errors})
+                    continue
+                try:
+                    with transaction.atomic():
+                        booking = serializer.save()
+                except SoldOut as e:
+                    results.append({
+                        'index': index, 'success': False,
+                        'error': str(e), 'seats_remaining': e.remaining
+                    })
+                    continue
+                results.append({
+                    'index': index,
+                    'success': True,
+                    'booking': {
+                        'id': booking.id,
+                        'booking_id': booking.booking_id,
+                        'destination': booking.destination_id,
+                        'start_date': booking.start_date,
+                        'number_of_travelers': booking.number_of_travelers,
+                        'total_price': str(booking.total_price),
+                        'status': booking.status,
+                    }
+                })
+        
+        created = sum(1 for result in results if result['success'])
+        if created == len(results):
+            response_status = status.HTTP_201_CREATED
+        elif created:
+            response_status = status.HTTP_207_MULTI_STATUS
+        else:
+            response_status = status.HTTP_400_BAD_REQUEST
+        return Response({
+            'success': created == len(results),
+            'created': created,
+            'failed': len(results) - created,
+            'results': results
+        }, status=response_status)
+        
+    except Exception as e:
+        print(f"Error in create_bookings_batch: {str(e)}")
+        return Response(
+            {'error': 'Error creating bookings'},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def booking_summary(request):
+    """Get booking summary for the user"""
+    try:
+        summary = summary_for(request.user.id)
+        summary['total_spent'] = str(summary['total_spent'])
         return Response(summary)
         
     except Exception as e:
@@ -112,3 +268,160 @@ def booking_summary(request):
             {'error': str(e)}, 
             status=status.HTTP_500_INTERNAL_SERVER_ERROR
         )
+
+def parse_date_range(request, today, default_days):
+    """Inclusive from/to query dates within the availability horizon; raises ValueError."""
+    try:
+        first = date.fromisoformat(request.GET['from']) if request.GET.get('from') else today
+        last = (
+            date.fromisoformat(request.GET['to']) if request.GET.get('to')
+            else first + timedelta(days=default_days - 1)
+        )
+    except ValueError:
+        raise ValueError('from and to must be dates like 2025-07-01')
+    end = today + timedelta(days=horizon() - 1)
+    if first < today or last > end or last < first:
+        raise ValueError(f'Give a range between {today.isoformat()} and {end.isoformat()}, from before to')
+    return first, last
+
+
+def parse_party_sizes(value):
+    try:
+        sizes = sorted({int(size) for size in value.split(',')})
+    except ValueError:
+        raise ValueError('travelers must be a number or a comma-separated list of numbers')
+    if not sizes or sizes[0] < 1 or sizes[-1] > MAX_QUOTE_TRAVELERS:
+        raise ValueError(f'travelers must be between 1 and {MAX_QUOTE_TRAVELERS}')
+    return sizes
+
+
+def parse_party_size(value):
+    try:
+        size = int(value)
+    except ValueError:
+        raise ValueError('travelers must be a single whole number; use the quote endpoint for several party sizes')
+    if not 1 <= size <= MAX_QUOTE_TRAVELERS:
+        raise ValueError(f'travelers must be between 1 and {MAX_QUOTE_TRAVELERS}')
+    return size
+
+
+def format_cents(cents):
+    return str(Decimal(cents).scaleb(-2))
+
+
+@api_view(['GET'])
+@permission_classes([permissions.AllowAny])
+def destination_availability(request, pk):
+    """
+    Seats left and price per person for each day of a date range
+    GET /api/destinations/<pk>/availability/?from=2025-07-01&to=2025-07-31&travelers=2
+    
+    remaining is null on days without a seat limit. Both dates are
+    inclusive; from defaults to today and to to a month after from.
+    Prices are for a party of travelers, 1 by default.
+    """
+    today = timezone.localdate()
+    try:
+        first, last = parse_date_range(request, today, DEFAULT_AVAILABILITY_DAYS)
+        size = parse_party_size(request.GET.get('travelers', '1'))
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    
+    count = (last - first).days + 1
+    try:
+        prices = quote_destination(pk, first, count, [size], today).per_person[0]
+        result = calendar(pk, today)
+    except Destination.DoesNotExist:
+        return Response({'error': 'Destination not found'}, status=status.HTTP_404_NOT_FOUND)
+    except Exception as e:
+        print(f"Error in destination_availability: {str(e)}")
+        return Response(
+            {'error': 'Error fetching availability'},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+    
+    return Response({
+        'destination': pk,
+        'from': first.isoformat(),
+        'to': last.isoformat(),
+        'days': [
+            {
+                'date': (first + timedelta(days=offset)).isoformat(),
+                'remaining': remaining,
+                'available': remaining is None or remaining >= size,
+                'price': format_cents(price),
+            }
+            for offset, (remaining, price) in enumerate(zip(seats_left(result, first, last), prices))
+        ],
+    })
+
+@api_view(['GET'])
+@permission_classes([permissions.AllowAny])
+def booking_quote(request):
+    """
+    Price every start date in a range for one or more party sizes
+    GET /api/bookings/quote/?destination=3&from=2025-07-01&to=2025-09-28&travelers=1,2,4
+    
+    Dates are inclusive; from defaults to today and to to 90 days on.
+    travelers defaults to 1.
+    """
+    today = timezone.localdate()
+    try:
+        destination_id = int(request.GET.get('destination', ''))
+    except ValueError:
+        return Response({'error': 'destination is required'}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        first, last = parse_date_range(request, today, DEFAULT_QUOTE_DAYS)
+        sizes = parse_party_sizes(request.GET.get('travelers', '1'))
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    
+    try:
+        quote = quote_destination(destination_id, first, (last - first).days + 1, sizes, today)
+        result = calendar(destination_id, today)
+    except Destination.DoesNotExist:
+        return Response({'error': 'Destination not found'}, status=status.HTTP_404_NOT_FOUND)
+    except Exception as e:
+        print(f"Error in booking_quote: {str(e)}")
+        return Response(
+            {'error': 'Error pricing trips'},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+    
+    return Response({
+        'destination': destination_id,
+        'from': first.isoformat(),
+        'to': last.isoformat(),
+        'travelers': sizes,
+        'days': [
+            {
+                'date': (first + timedelta(days=offset)).isoformat(),
+                'remaining': remaining,
+                'prices': {
+                    str(size): {
+                        'per_person': format_cents(quote.per_person[row][offset]),
+                        'total': format_cents(quote.totals[row][offset]),
+                    }
+                    for row, size in enumerate(sizes)
+                },
+            }
+            for offset, remaining in enumerate(seats_left(result, first, last))
+        ],
+    })
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAdminUser])
+def export_bookings(request, travelers=False):
+    """
+    Stream every booking, or every booking traveler, as a download (staff only)
+    GET /api/bookings/export/?type=csv|jsonl&gzip=1&since=2025-06-01&until=2025-06-30
+    GET /api/bookings/export/travelers/?...
+    
+    since and until filter on when the booking was made, both inclusive.
+    """
+    try:
+        file_format, compress, since, until = parse_export_request(request)
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    export = TRAVELER_EXPORT if travelers else BOOKING_EXPORT
+    return streaming_response(export, file_format, compress, since, until)
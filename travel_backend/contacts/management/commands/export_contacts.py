@@ -0,0 +1,7 @@
+from contacts.serializers import CONTACT_EXPORT
+from travel_backend.exports import ExportCommand
+
+
+class Command(ExportCommand):
+    help = 'Stream every contact submission to a CSV or JSON Lines file'
+    export = CONTACT_EXPORT
@@ -39,6 +39,10 @@ class Contact(models.Model):
         ordering = ['-created_at']
         verbose_name = 'Contact Submission'
         verbose_name_plural = 'Contact Submissions'
+        indexes = [
+            models.Index(fields=['-created_at', '-id']),
+            models.Index(fields=['status', '-created_at', '-id']),
+        ]
     
     def __str__(self):
         return f"{self.name} - {self.subject} ({self.status})"
@@ -1,6 +1,19 @@
 from rest_framework import serializers
+from travel_backend.exports import Export
 from .models import Contact
 
+# Staff export of every submission, streamed by travel_backend.exports
+CONTACT_EXPORT = Export(
+    'contacts',
+    lambda: Contact.objects.order_by('id'),
+    (
+        ('id', 'id'), ('created_at', 'created_at'), ('name', 'name'), ('email', 'email'),
+        ('phone', 'phone'), ('subject', 'subject'), ('category', 'category'), ('status', 'status'),
+        ('newsletter', 'newsletter'), ('message', 'message'), ('responded_at', 'responded_at'),
+    ),
+    'created_at',
+)
+
 class ContactSerializer(serializers.ModelSerializer):
     """Serializer for Contact model"""
     
@@ -1,3 +1,112 @@
-from django.test import TestCase
+import csv
+import hashlib
+import os
+import tempfile
+import threading
+from io import StringIO
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from travel_backend.idempotency import _keys
+from .models import Contact
+
+
+class IdempotentSubmitTests(TestCase):
+    """Retried contact submissions with the same Idempotency-Key run once"""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.body = {
+            'name': 'Visitor', 'email': 'visitor@example.com', 'subject': 'Question',
+            'category': 'general', 'message': 'Is there availability next spring?',
+        }
+
+    def submit(self, body=None, key='retry-1'):
+        return self.client.post(
+            reverse('contacts:submit_contact_form'), body or self.body, format='json',
+            HTTP_IDEMPOTENCY_KEY=key,
+        )
+
+    def test_replay_returns_the_first_response_without_queries(self):
+        first = self.submit()
+        self.assertEqual(first.status_code, 201)
+        with self.assertNumQueries(0):
+            replay = self.submit()
+        self.assertEqual(replay.status_code, 201)
+        self.assertEqual(replay.json(), first.json())
+        self.assertEqual(replay['Idempotent-Replayed'], 'true')
+        self.assertEqual(Contact.objects.count(), 1)
+        # The confirmation and the admin notification, sent once
+        self.assertEqual(len(mail.outbox), 2)
+
+    def test_reused_key_with_another_body_is_refused(self):
+        self.submit()
+        response = self.submit(dict(self.body, message='Something else entirely'))
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(Contact.objects.count(), 1)
+
+    def test_requests_without_a_key_or_failed_ones_are_not_stored(self):
+        self.client.post(reverse('contacts:submit_contact_form'), self.body, format='json')
+        self.client.post(reverse('contacts:submit_contact_form'), self.body, format='json')
+        self.assertEqual(Contact.objects.count(), 2)
+
+        invalid = dict(self.body, email='not an email')
+        self.assertEqual(self.submit(invalid, key='retry-2').status_code, 400)
+        self.assertEqual(self.submit(key='retry-2').status_code, 201)
+
+    @override_settings(IDEMPOTENCY_WAIT=5)
+    def test_duplicate_waits_for_the_in_flight_original(self):
+        response_key, lock_key = _keys('anonymous', reverse('contacts:submit_contact_form'), 'retry-1')
+        # Stand in for an original request that is still running
+        cache.add(lock_key, 'original', 30)
+        first = self.submit(key='retry-0')
+        fingerprint = hashlib.sha256(first.wsgi_request.body).hexdigest()
+        stored = (fingerprint, first.status_code, first.content, first['Content-Type'])
+        finisher = threading.Timer(0.2, lambda: cache.set(response_key, stored))
+        finisher.start()
+        try:
+            replay = self.submit()
+        finally:
+            finisher.join()
+        self.assertEqual(replay['Idempotent-Replayed'], 'true')
+        self.assertEqual(Contact.objects.count(), 1)
+
+    @override_settings(IDEMPOTENCY_WAIT=0.1)
+    def test_duplicate_gives_up_on_a_stuck_original(self):
+        cache.add(_keys('anonymous', reverse('contacts:submit_contact_form'), 'retry-1')[1], 'original', 30)
+        self.assertEqual(self.submit().status_code, 409)
+        self.assertFalse(Contact.objects.exists())
+
+
+class ContactExportTests(TestCase):
+    def setUp(self):
+        for number in range(3):
+            Contact.objects.create(
+                name=f'Visitor {number}', email=f'visitor{number}@example.com', subject='Question',
+                message='Line one,\nline "two"',
+            )
+
+    def test_staff_download(self):
+        client = APIClient()
+        client.force_authenticate(get_user_model().objects.create_user(
+            username='staff', email='staff@example.com', password='password', is_staff=True
+        ))
+        response = client.get(reverse('contacts:contact_export'))
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="contacts.csv"')
+        rows = list(csv.DictReader(StringIO(b''.join(response.streaming_content).decode())))
+        self.assertEqual([row['name'] for row in rows], ['Visitor 0', 'Visitor 1', 'Visitor 2'])
+        self.assertEqual(rows[0]['message'], 'Line one,\nline "two"')
+
+    def test_command_writes_a_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'contacts.jsonl')
+            call_command('export_contacts', '--format', 'jsonl', '--output', path, stdout=StringIO())
+            with open(path) as output:
+                self.assertEqual(len(output.readlines()), 3)
@@ -10,4 +10,5 @@ urlpatterns = [
     # Admin endpoints
     path('', views.ContactListView.as_view(), name='contact_list'),
     path('<int:pk>/', views.ContactDetailView.as_view(), name='contact_detail'),
+    path('export/', views.export_contacts, name='contact_export'),
 ]
\ No newline at end of file
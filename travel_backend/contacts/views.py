@@ -6,13 +6,16 @@ from django.core.mail import send_mail
 from django.conf import settings
 from django.template.loader import render_to_string
 from django.utils.html import strip_tags
+from travel_backend.exports import parse_export_request, streaming_response
+from travel_backend.idempotency import idempotent
 import logging
 
 from .models import Contact
-from .serializers import ContactSerializer, ContactListSerializer
+from .serializers import CONTACT_EXPORT, ContactSerializer, ContactListSerializer
 
 logger = logging.getLogger(__name__)
 
+@idempotent
 @api_view(['POST'])
 @permission_classes([AllowAny])
 def submit_contact_form(request):
@@ -204,3 +207,17 @@ class ContactDetailView(generics.RetrieveUpdateAPIView):
     queryset = Contact.objects.all()
     serializer_class = ContactSerializer
     permission_classes = [IsAdminUser]
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def export_contacts(request):
+    """
+    Stream every contact submission as a download (staff only)
+    GET /api/contacts/export/?type=csv|jsonl&gzip=1&since=2025-06-01&until=2025-06-30
+    """
+    try:
+        file_format, compress, since, until = parse_export_request(request)
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    return streaming_response(CONTACT_EXPORT, file_format, compress, since, until)
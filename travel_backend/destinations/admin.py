@@ -17,6 +17,8 @@ class DestinationAdmin(admin.ModelAdmin):
         'price_per_person', 
         'difficulty',
         'is_featured',  # Changed from 'is_active' to 'is_featured'
+        'average_rating',
+        'total_reviews',
         'created_at'
     ]
     list_filter = [
@@ -28,12 +30,19 @@ class DestinationAdmin(admin.ModelAdmin):
     ]
     search_fields = ['name', 'city', 'country', 'short_description']
     prepopulated_fields = {'slug': ('name',)}
+    readonly_fields = [
+        'average_rating', 'total_reviews', 'value_for_money_rating',
+        'service_quality_rating', 'cleanliness_rating', 'location_rating'
+    ]
     ordering = ['-created_at']
     
     fieldsets = (
         ('Basic Information', {
             'fields': ('name', 'slug', 'city', 'country', 'category')
         }),
+        ('Location', {
+            'fields': ('latitude', 'longitude')
+        }),
         ('Description', {
             'fields': ('short_description', 'long_description')
         }),
@@ -43,4 +52,11 @@ class DestinationAdmin(admin.ModelAdmin):
         ('Media & Features', {
             'fields': ('main_image', 'is_featured')
         }),
+        ('Ratings', {
+            'fields': (
+                'average_rating', 'total_reviews', 'value_for_money_rating',
+                'service_quality_rating', 'cleanliness_rating', 'location_rating'
+            ),
+            'classes': ('collapse',)
+        }),
     )
@@ -0,0 +1,351 @@
+"""
+In-process autocomplete index for destination names, cities, countries and
+categories.
+
+Lookups are a binary search over a sorted array of word-start keys, with a
+trigram similarity fallback for typos. Workers share the index through a
+compressed snapshot file plus an append-only journal of changes, so a save
+in one worker is picked up by the others without rebuilding from the
+database.
+"""
+import json
+import math
+import os
+import threading
+import unicodedata
+import zlib
+from bisect import bisect_left
+from collections import Counter, defaultdict
+from pathlib import Path
+
+from django.conf import settings
+from django.utils.text import slugify
+
+SNAPSHOT_NAME = 'autocomplete.snapshot'
+KIND_ORDER = {'destination': 0, 'city': 1, 'country': 2, 'category': 3}
+MIN_TRIGRAM_SIMILARITY = 0.45
+
+
+def normalize(text):
+    text = text or ''
+    if not text.isascii():
+        text = unicodedata.normalize('NFKD', text)
+        text = ''.join(ch for ch in text if not unicodedata.combining(ch))
+    return ' '.join(text.lower().split())
+
+
+def trigrams(text):
+    padded = f'  {text} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class AutocompleteIndex:
+    """Sorted-array prefix index with a trigram fallback."""
+
+    def __init__(self):
+        self._keys = []
+        self._entries = {}
+        self._texts = {}
+        self._trigrams = defaultdict(set)
+        self._trigram_counts = {}
+        self._refcounts = Counter()
+        self._destinations = {}
+        self._categories = {}
+        self._bulk = False
+
+    def __len__(self):
+        return len(self._entries)
+
+    # Building
+
+    def _add_entry(self, ref, text, payload):
+        self._refcounts[ref] += 1
+        if self._refcounts[ref] > 1:
+            return
+        self._entries[ref] = payload
+        self._texts[ref] = text
+        for start in self._word_starts(text):
+            key = (text[start:], ref)
+            if self._bulk:
+                self._keys.append(key)
+            else:
+                self._keys.insert(bisect_left(self._keys, key), key)
+        grams = trigrams(text)
+        self._trigram_counts[ref] = len(grams)
+        for gram in grams:
+            self._trigrams[gram].add(ref)
+
+    def _remove_entry(self, ref):
+        if not self._refcounts[ref]:
+            return
+        self._refcounts[ref] -= 1
+        if self._refcounts[ref]:
+            return
+        del self._refcounts[ref]
+        del self._entries[ref]
+        text = self._texts.pop(ref)
+        for start in self._word_starts(text):
+            key = (text[start:], ref)
+            position = bisect_left(self._keys, key)
+            if position < len(self._keys) and self._keys[position] == key:
+                del self._keys[position]
+        for gram in trigrams(text):
+            refs = self._trigrams.get(gram)
+            if refs is not None:
+                refs.discard(ref)
+                if not refs:
+                    del self._trigrams[gram]
+        del self._trigram_counts[ref]
+
+    @staticmethod
+    def _word_starts(text):
+        return [0] + [i + 1 for i, ch in enumerate(text) if ch == ' ']
+
+    def _add_place(self, kind, label):
+        # Cities and countries are shared by many destinations, so they are
+        # reference counted rather than indexed once per destination
+        text = normalize(label)
+        ref = (kind, text)
+        if ref in self._refcounts:
+            self._refcounts[ref] += 1
+            return
+        self._add_entry(ref, text, {'id': None, 'slug': slugify(label), 'label': label, 'kind': kind})
+
+    def set_destination(self, pk, slug, name, city, country):
+        row = (slug, name, city, country)
+        if self._destinations.get(pk) == row:
+            return
+        self.remove_destination(pk)
+        self._destinations[pk] = row
+        self._add_entry(
+            ('destination', pk), normalize(name),
+            {'id': pk, 'slug': slug, 'label': name, 'kind': 'destination'},
+        )
+        for kind, label in (('city', city), ('country', country)):
+            if label:
+                self._add_place(kind, label)
+
+    def remove_destination(self, pk):
+        row = self._destinations.pop(pk, None)
+        if row is None:
+            return
+        slug, name, city, country = row
+        self._remove_entry(('destination', pk))
+        for kind, label in (('city', city), ('country', country)):
+            if label:
+                self._remove_entry((kind, normalize(label)))
+
+    def set_category(self, pk, name):
+        if self._categories.get(pk) == name:
+            return
+        self.remove_category(pk)
+        self._categories[pk] = name
+        self._add_entry(
+            ('category', pk), normalize(name),
+            {'id': pk, 'slug': slugify(name), 'label': name, 'kind': 'category'},
+        )
+
+    def remove_category(self, pk):
+        if self._categories.pop(pk, None) is not None:
+            self._remove_entry(('category', pk))
+
+    def apply(self, op):
+        """Apply one journal operation."""
+        action, args = op[0], op[1:]
+        if action == 'd':
+            self.set_destination(*args)
+        elif action == '-d':
+            self.remove_destination(*args)
+        elif action == 'c':
+            self.set_category(*args)
+        elif action == '-c':
+            self.remove_category(*args)
+
+    # Querying
+
+    def search(self, query, limit=8):
+        text = normalize(query)
+        if not text:
+            return []
+
+        matches = {}
+        position = bisect_left(self._keys, (text,))
+        # Scan a bounded window so very short prefixes stay cheap
+        scan_limit = limit * 8
+        while position < len(self._keys) and len(matches) < scan_limit:
+            key, ref = self._keys[position]
+            if not key.startswith(text):
+                break
+            whole_label = len(key) == len(self._texts[ref])
+            rank = (0 if whole_label else 1, KIND_ORDER[ref[0]], len(key))
+            if ref not in matches or rank < matches[ref]:
+                matches[ref] = rank
+            position += 1
+
+        results = sorted(matches, key=matches.get)[:limit]
+        if not results and len(text) >= 3:
+            # Nothing starts with the query, so it probably has a typo
+            results = self._fuzzy(text, limit, exclude=set())
+        return [self._entries[ref] for ref in results]
+
+    def _fuzzy(self, text, limit, exclude):
+        grams = sorted(trigrams(text), key=lambda gram: len(self._trigrams.get(gram, ())))
+        # A label covering enough of the query must contain at least one of
+        # its rarest trigrams, so candidates only come from those postings
+        required = max(1, math.ceil(MIN_TRIGRAM_SIMILARITY * len(grams)))
+        candidates = set()
+        for gram in grams[:len(grams) - required + 1]:
+            candidates.update(self._trigrams.get(gram, ()))
+        candidates -= exclude
+
+        scored = []
+        postings = [self._trigrams.get(gram, set()) for gram in grams]
+        for ref in candidates:
+            common = sum(1 for refs in postings if ref in refs)
+            # How much of the query the label covers decides the cut-off;
+            # overall similarity breaks ties in favour of shorter labels
+            coverage = common / len(grams)
+            if coverage >= MIN_TRIGRAM_SIMILARITY:
+                similarity = common / (len(grams) + self._trigram_counts[ref] - common)
+                scored.append((-coverage, -similarity, KIND_ORDER[ref[0]], ref))
+        scored.sort(key=lambda item: item[:3])
+        return [item[-1] for item in scored[:limit]]
+
+    # Serialization
+
+    def dumps(self, generation):
+        data = {
+            'generation': generation,
+            'destinations': [[pk, *row] for pk, row in self._destinations.items()],
+            'categories': [[pk, name] for pk, name in self._categories.items()],
+        }
+        return zlib.compress(json.dumps(data, separators=(',', ':')).encode('utf-8'))
+
+    @classmethod
+    def loads(cls, blob):
+        data = json.loads(zlib.decompress(blob))
+        index = cls()
+        index.bulk_load(data['destinations'], data['categories'])
+        return index, data['generation']
+
+    def bulk_load(self, destinations, categories):
+        """Fill an empty index in one pass, sorting the keys once at the end."""
+        self._bulk = True
+        try:
+            for pk, slug, name, city, country in destinations:
+                self.set_destination(pk, slug, name, city, country)
+            for pk, name in categories:
+                self.set_category(pk, name)
+        finally:
+            self._bulk = False
+        self._keys.sort()
+
+
+# Sharing between workers
+#
+# A snapshot holds the source rows rather than the derived arrays, which keeps
+# it small and lets each worker rebuild its arrays with a single sort. Saves
+# and deletes are appended to a journal belonging to the current snapshot
+# generation, named in the CURRENT file, and every worker replays new journal
+# lines before answering a query.
+
+_lock = threading.Lock()
+_state = {'index': None, 'generation': None, 'pointer_mtime': None, 'offset': 0}
+
+
+def snapshot_dir():
+    return Path(getattr(settings, 'AUTOCOMPLETE_SNAPSHOT_DIR', settings.BASE_DIR / 'var' / 'autocomplete'))
+
+
+def _current_generation():
+    try:
+        return (snapshot_dir() / 'CURRENT').read_text().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def build_snapshot():
+    """Rebuild the index from the database and publish it as a new generation."""
+    from .models import Category, Destination
+
+    directory = snapshot_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+    previous = _current_generation()
+
+    index = AutocompleteIndex()
+    index.bulk_load(
+        Destination.objects.values_list('id', 'slug', 'name', 'city', 'country').iterator(chunk_size=5000),
+        Category.objects.values_list('id', 'name').iterator(),
+    )
+    generation = os.urandom(6).hex()
+    (directory / f'{generation}.snapshot').write_bytes(index.dumps(generation))
+    pointer = directory / f'CURRENT.{generation}.tmp'
+    pointer.write_text(generation)
+    os.replace(pointer, directory / 'CURRENT')
+
+    if previous:
+        # Carry over changes journaled while the rows above were being read;
+        # replaying them is harmless because every operation is idempotent
+        old_journal = directory / f'{previous}.journal'
+        if old_journal.exists():
+            with open(directory / f'{generation}.journal', 'ab') as handle:
+                handle.write(old_journal.read_bytes())
+    for path in directory.iterdir():
+        if path.suffix in ('.snapshot', '.journal') and path.stem != generation:
+            path.unlink(missing_ok=True)
+    return index
+
+
+def _replay_journal():
+    journal = snapshot_dir() / f"{_state['generation']}.journal"
+    try:
+        size = journal.stat().st_size
+    except FileNotFoundError:
+        return
+    if size <= _state['offset']:
+        return
+    with open(journal, 'rb') as handle:
+        handle.seek(_state['offset'])
+        chunk = handle.read(size - _state['offset'])
+    # Only consume complete lines; a concurrent append may be half written
+    complete = chunk[:chunk.rfind(b'\n') + 1]
+    for line in complete.splitlines():
+        _state['index'].apply(json.loads(line))
+    _state['offset'] += len(complete)
+
+
+def get_index():
+    """Return this worker's index, catching up with other workers first."""
+    pointer = snapshot_dir() / 'CURRENT'
+    with _lock:
+        try:
+            mtime = pointer.stat().st_mtime_ns
+        except FileNotFoundError:
+            build_snapshot()
+            mtime = pointer.stat().st_mtime_ns
+        if mtime != _state['pointer_mtime']:
+            generation = _current_generation()
+            blob = (snapshot_dir() / f'{generation}.snapshot').read_bytes()
+            index, generation = AutocompleteIndex.loads(blob)
+            _state.update(index=index, generation=generation, pointer_mtime=mtime, offset=0)
+        _replay_journal()
+        return _state['index']
+
+
+def record(op):
+    """Append a change to the current generation's journal, if one is published."""
+    generation = _current_generation()
+    if generation is None:
+        return
+    line = json.dumps(op, separators=(',', ':')).encode('utf-8') + b'\n'
+    # O_APPEND writes of a single short line are atomic, so workers can share it
+    path = snapshot_dir() / f'{generation}.journal'
+    fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    try:
+        os.write(fd, line)
+    finally:
+        os.close(fd)
+
+
+def search(query, limit=8):
+    return get_index().search(query, limit)
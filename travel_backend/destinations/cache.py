@@ -0,0 +1,74 @@
+"""
+Response cache for public, rarely changing read endpoints.
+
+Rendered JSON bytes are stored per endpoint, host and query string. Every
+endpoint belongs to one or more groups, and each group has a version key;
+bumping a group's version from a model signal invalidates every response
+cached under it without having to know the individual keys.
+"""
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+
+
+def _version_key(group):
+    return f'responses:{group}:version'
+
+
+def invalidate_responses(*groups):
+    cache.set_many({_version_key(group): time.time_ns() for group in groups}, None)
+
+
+def _group_versions(groups):
+    keys = [_version_key(group) for group in groups]
+    versions = cache.get_many(keys)
+    missing = {key: time.time_ns() for key in keys if key not in versions}
+    if missing:
+        cache.set_many(missing, None)
+        versions.update(missing)
+    return '.'.join(str(versions[key]) for key in keys)
+
+
+def cached_response(*groups, timeout=None):
+    """
+    Cache a GET view's rendered JSON until one of ``groups`` is invalidated.
+
+    Apply it on top of ``@api_view`` so the wrapped view returns a response
+    that has already been through content negotiation. Absolute URLs in the
+    payload come from ``request.build_absolute_uri``, so the scheme and host
+    are part of the key.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapped(request, *args, **kwargs):
+            accept = request.META.get('HTTP_ACCEPT', '')
+            if request.method != 'GET' or 'text/html' in accept:
+                return view(request, *args, **kwargs)
+
+            key = 'responses:{}:{}:{}:{}'.format(
+                view.__name__,
+                _group_versions(groups),
+                request.build_absolute_uri('/'),
+                request.GET.urlencode(),
+            )
+            content = cache.get(key)
+            if content is not None:
+                response = HttpResponse(content, content_type='application/json')
+                response['X-Cache'] = 'HIT'
+                return response
+
+            response = view(request, *args, **kwargs)
+            renderer = getattr(response, 'accepted_renderer', None)
+            if response.status_code == 200 and getattr(renderer, 'format', None) == 'json':
+                response.render()
+                cache.set(
+                    key, response.content,
+                    timeout if timeout is not None else getattr(settings, 'RESPONSE_CACHE_TIMEOUT', 300),
+                )
+                response['X-Cache'] = 'MISS'
+            return response
+        return wrapped
+    return decorator
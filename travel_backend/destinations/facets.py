@@ -0,0 +1,135 @@
+import time
+
+from django.core.cache import cache
+from django.db.models import Case, Count, IntegerField, Value, When
+
+from .models import Destination
+
+FACETS_CACHE_VERSION_KEY = 'destinations:facets:version'
+FACETS_CACHE_TIMEOUT = 60 * 60
+
+DURATION_BUCKETS = [
+    # (label, lower bound inclusive, upper bound exclusive)
+    ('1-3 days', 1, 4),
+    ('4-7 days', 4, 8),
+    ('8-14 days', 8, 15),
+    ('15+ days', 15, None),
+]
+
+PRICE_BUCKETS = [
+    ('Under $500', None, 500),
+    ('$500 - $1,000', 500, 1000),
+    ('$1,000 - $2,000', 1000, 2000),
+    ('$2,000 - $5,000', 2000, 5000),
+    ('$5,000+', 5000, None),
+]
+
+DIFFICULTY_LABELS = dict(Destination.DIFFICULTY_CHOICES)
+
+
+def _bucket_expression(field, buckets):
+    whens = []
+    for position, (label, lower, upper) in enumerate(buckets):
+        bounds = {}
+        if lower is not None:
+            bounds[f'{field}__gte'] = lower
+        if upper is not None:
+            bounds[f'{field}__lt'] = upper
+        whens.append(When(then=Value(position), **bounds))
+    return Case(*whens, default=Value(None), output_field=IntegerField())
+
+
+# facet name -> (columns to group by, function turning a grouped row into (key, label))
+FACETS = {
+    'category': (
+        ['category_id', 'category__name'],
+        lambda row: (row['category_id'], row['category__name']),
+    ),
+    'country': (['country'], lambda row: (row['country'], row['country'])),
+    'difficulty': (
+        ['difficulty'],
+        lambda row: (row['difficulty'], DIFFICULTY_LABELS.get(row['difficulty'], row['difficulty'])),
+    ),
+    'duration': (
+        ['duration_bucket'],
+        lambda row: (row['duration_bucket'], _bucket_label(DURATION_BUCKETS, row['duration_bucket'])),
+    ),
+    'price': (
+        ['price_bucket'],
+        lambda row: (row['price_bucket'], _bucket_label(PRICE_BUCKETS, row['price_bucket'])),
+    ),
+}
+
+
+def _bucket_label(buckets, position):
+    return buckets[position][0] if position is not None else None
+
+
+def parse_facets(value):
+    """Turn ``?facets=category,country`` into a tuple of known facet names."""
+    if not value:
+        return ()
+    names = []
+    for name in value.split(','):
+        name = name.strip()
+        if name in FACETS and name not in names:
+            names.append(name)
+    return tuple(names)
+
+
+def compute_facets(queryset, names):
+    """
+    Count destinations per value of each requested facet in one grouped query.
+
+    The query groups by the combination of all requested columns; each facet
+    is then a marginal sum over those groups, which is far fewer rows than
+    the destinations themselves.
+    """
+    columns = []
+    for name in names:
+        for column in FACETS[name][0]:
+            if column not in columns:
+                columns.append(column)
+
+    annotations = {}
+    if 'duration_bucket' in columns:
+        annotations['duration_bucket'] = _bucket_expression('duration_days', DURATION_BUCKETS)
+    if 'price_bucket' in columns:
+        annotations['price_bucket'] = _bucket_expression('price_per_person', PRICE_BUCKETS)
+
+    groups = (
+        queryset.order_by()
+        .annotate(**annotations)
+        .values(*columns)
+        .annotate(facet_count=Count('id'))
+    )
+
+    totals = {name: {} for name in names}
+    for row in groups:
+        for name in names:
+            key, label = FACETS[name][1](row)
+            if key is None:
+                continue
+            entry = totals[name].setdefault(key, {'value': key, 'label': label, 'count': 0})
+            entry['count'] += row['facet_count']
+
+    return {
+        name: sorted(values.values(), key=lambda entry: (-entry['count'], str(entry['label'])))
+        for name, values in totals.items()
+    }
+
+
+def catalog_facets(queryset, names):
+    """Facet counts for the whole catalog, cached until a destination changes."""
+    version = cache.get_or_set(FACETS_CACHE_VERSION_KEY, time.time_ns, None)
+    key = f"destinations:facets:{version}:{','.join(sorted(names))}"
+    facets = cache.get(key)
+    if facets is None:
+        facets = compute_facets(queryset, names)
+        cache.set(key, facets, FACETS_CACHE_TIMEOUT)
+    return facets
+
+
+def invalidate_catalog_facets():
+    # A fresh version orphans every cached combination of facets at once
+    cache.set(FACETS_CACHE_VERSION_KEY, time.time_ns(), None)
@@ -0,0 +1,274 @@
+"""
+In-process spatial index over destination coordinates.
+
+Points live in a uniform latitude/longitude grid. Each cell keeps packed
+arrays of ids and coordinates, so a query only looks at the cells its
+search circle overlaps. Every worker builds its own index from the
+database on first use, applies its own saves immediately, and rebuilds
+when another worker has changed coordinates (tracked by a cache version).
+"""
+import heapq
+import math
+import threading
+import time
+from array import array
+
+from django.conf import settings
+from django.core.cache import cache
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+GEO_VERSION_KEY = 'destinations:geo:version'
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = (
+        math.sin((lat2 - lat1) / 2) ** 2
+        + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+class _Cell:
+    __slots__ = ('ids', 'lats', 'lons')
+
+    def __init__(self):
+        self.ids = array('q')
+        self.lats = array('d')
+        self.lons = array('d')
+
+
+class GeoIndex:
+    """Uniform grid supporting radius, bounding-box and k-nearest queries."""
+
+    def __init__(self, cell_degrees=0.5):
+        self.cell_degrees = cell_degrees
+        self.lon_cells = int(round(360 / cell_degrees))
+        self.lat_cells = int(round(180 / cell_degrees))
+        self._cells = {}
+        self._positions = {}
+
+    def __len__(self):
+        return len(self._positions)
+
+    def _cell_of(self, lat, lon):
+        row = min(int((lat + 90) / self.cell_degrees), self.lat_cells - 1)
+        column = int(((lon + 180) % 360) / self.cell_degrees) % self.lon_cells
+        return row, column
+
+    # Maintenance
+
+    def add(self, pk, lat, lon):
+        self.remove(pk)
+        key = self._cell_of(lat, lon)
+        cell = self._cells.get(key)
+        if cell is None:
+            cell = self._cells[key] = _Cell()
+        cell.ids.append(pk)
+        cell.lats.append(lat)
+        cell.lons.append(lon)
+        self._positions[pk] = key
+
+    def remove(self, pk):
+        key = self._positions.pop(pk, None)
+        if key is None:
+            return
+        cell = self._cells[key]
+        index = cell.ids.index(pk)
+        # Swap with the last point so removal stays O(1) within the cell
+        for column in (cell.ids, cell.lats, cell.lons):
+            column[index] = column[-1]
+            column.pop()
+        if not cell.ids:
+            del self._cells[key]
+
+    # Queries
+
+    def _columns_for(self, lat, radius_km):
+        """Grid columns covering radius_km around a point at latitude lat."""
+        cos_lat = math.cos(math.radians(min(abs(lat) + radius_km / KM_PER_DEGREE, 89.9)))
+        span = radius_km / (KM_PER_DEGREE * max(cos_lat, 1e-6))
+        if span >= 180:
+            return None
+        return int(math.ceil(span / self.cell_degrees))
+
+    def _cells_within(self, lat, lon, radius_km):
+        row, column = self._cell_of(lat, lon)
+        row_span = int(math.ceil(radius_km / KM_PER_DEGREE / self.cell_degrees))
+        column_span = self._columns_for(lat, radius_km)
+        rows = range(max(0, row - row_span), min(self.lat_cells, row + row_span + 1))
+        if column_span is None or 2 * column_span + 1 >= self.lon_cells:
+            columns = range(self.lon_cells)
+        else:
+            columns = [(column + offset) % self.lon_cells for offset in range(-column_span, column_span + 1)]
+        for r in rows:
+            for c in columns:
+                cell = self._cells.get((r, c))
+                if cell is not None:
+                    yield cell
+
+    def within(self, lat, lon, radius_km, limit=None):
+        """(distance_km, id) pairs within radius_km, nearest first."""
+        found = []
+        for cell in self._cells_within(lat, lon, radius_km):
+            for pk, point_lat, point_lon in zip(cell.ids, cell.lats, cell.lons):
+                distance = haversine_km(lat, lon, point_lat, point_lon)
+                if distance <= radius_km:
+                    found.append((distance, pk))
+        if limit is not None:
+            return heapq.nsmallest(limit, found)
+        found.sort()
+        return found
+
+    def nearest(self, lat, lon, k=10, max_radius_km=None):
+        """
+        The k nearest (distance_km, id) pairs.
+
+        Searches rings of cells outward from the query point and stops once
+        the k-th best distance is closer than anything an unvisited ring
+        could hold.
+        """
+        if not self._positions or k <= 0:
+            return []
+        row, column = self._cell_of(lat, lon)
+        cell_km = self.cell_degrees * KM_PER_DEGREE
+        best = []  # max-heap of (-distance, id)
+        # Columns wrap around the antimeridian, so rings past half the grid
+        # width come back over cells already searched; skip those
+        visited = set()
+        points_seen = 0
+        ring = 0
+        max_ring = max(self.lat_cells, self.lon_cells // 2)
+        while ring <= max_ring:
+            # A sparse grid is cheaper to finish by visiting its occupied cells
+            # than by walking rings that are mostly empty
+            sparse = 8 * ring >= len(self._cells)
+            for key in (list(self._cells) if sparse else self._ring(row, column, ring)):
+                if key in visited:
+                    continue
+                visited.add(key)
+                cell = self._cells.get(key)
+                if cell is None:
+                    continue
+                points_seen += len(cell.ids)
+                for pk, point_lat, point_lon in zip(cell.ids, cell.lats, cell.lons):
+                    distance = haversine_km(lat, lon, point_lat, point_lon)
+                    if max_radius_km is not None and distance > max_radius_km:
+                        continue
+                    if len(best) < k:
+                        heapq.heappush(best, (-distance, pk))
+                    elif distance < -best[0][0]:
+                        heapq.heapreplace(best, (-distance, pk))
+            if points_seen == len(self._positions):
+                break
+            # Anything in ring n+1 is at least n cell heights away north/south;
+            # east/west cells shrink towards the poles, hence the cosine
+            reach = ring * cell_km * max(math.cos(math.radians(min(abs(lat) + ring * self.cell_degrees, 90))), 0)
+            if len(best) == k and -best[0][0] <= reach:
+                break
+            if max_radius_km is not None and reach > max_radius_km:
+                break
+            ring += 1
+        return sorted((-negative, pk) for negative, pk in best)
+
+    def _ring(self, row, column, ring):
+        if ring == 0:
+            yield row, column
+            return
+        if 2 * ring + 1 >= self.lon_cells:
+            columns = range(self.lon_cells)
+        else:
+            columns = [c % self.lon_cells for c in range(column - ring, column + ring + 1)]
+        for r in (row - ring, row + ring):
+            if 0 <= r < self.lat_cells:
+                for c in columns:
+                    yield r, c
+        for r in range(max(0, row - ring + 1), min(self.lat_cells, row + ring)):
+            yield r, (column - ring) % self.lon_cells
+            if 2 * ring < self.lon_cells:
+                yield r, (column + ring) % self.lon_cells
+
+    def bounding_box(self, south, west, north, east):
+        """Ids inside a latitude/longitude box; west > east crosses the antimeridian."""
+        south_row, west_column = self._cell_of(south, west)
+        north_row, east_column = self._cell_of(north, east)
+        if west <= east:
+            columns = range(west_column, east_column + 1)
+        else:
+            columns = list(range(west_column, self.lon_cells)) + list(range(0, east_column + 1))
+        found = []
+        for r in range(south_row, north_row + 1):
+            for c in columns:
+                cell = self._cells.get((r, c))
+                if cell is None:
+                    continue
+                for pk, point_lat, point_lon in zip(cell.ids, cell.lats, cell.lons):
+                    in_lon = west <= point_lon <= east if west <= east else (point_lon >= west or point_lon <= east)
+                    if south <= point_lat <= north and in_lon:
+                        found.append(pk)
+        return found
+
+
+# Process-wide index
+
+_lock = threading.Lock()
+_state = {'index': None, 'version': None, 'checked': 0.0}
+
+
+def _build():
+    from .models import Destination
+
+    index = GeoIndex(getattr(settings, 'GEO_INDEX_CELL_DEGREES', 0.5))
+    rows = (
+        Destination.objects.filter(latitude__isnull=False, longitude__isnull=False)
+        .values_list('id', 'latitude', 'longitude')
+    )
+    for pk, lat, lon in rows.iterator(chunk_size=10000):
+        index.add(pk, float(lat), float(lon))
+    return index
+
+
+def get_index():
+    """This worker's index, rebuilt if another worker changed coordinates."""
+    now = time.monotonic()
+    with _lock:
+        if _state['index'] is not None and now - _state['checked'] < getattr(settings, 'GEO_INDEX_CHECK_INTERVAL', 5):
+            return _state['index']
+        version = cache.get_or_set(GEO_VERSION_KEY, time.time_ns, None)
+        if _state['index'] is None or version != _state['version']:
+            _state['index'] = _build()
+            _state['version'] = version
+        _state['checked'] = now
+        return _state['index']
+
+
+def update_point(pk, lat, lon):
+    """Apply a coordinate change locally and tell other workers to rebuild."""
+    with _lock:
+        try:
+            # incr is a single step, so seeing our own version plus one means
+            # no other worker changed coordinates since this index was current
+            version = cache.incr(GEO_VERSION_KEY)
+        except ValueError:
+            version = None
+            cache.set(GEO_VERSION_KEY, time.time_ns(), None)
+        index = _state['index']
+        if index is None:
+            return
+        if _state['version'] is None or version != _state['version'] + 1:
+            # Another worker's change is missing here too; rebuild on next use
+            _state['index'] = None
+            return
+        if lat is None or lon is None:
+            index.remove(pk)
+        else:
+            index.add(pk, float(lat), float(lon))
+        _state['version'] = version
+
+
+def invalidate():
+    """Make every worker rebuild its index, e.g. after a bulk import."""
+    with _lock:
+        _state['index'] = None
+        cache.set(GEO_VERSION_KEY, time.time_ns(), None)
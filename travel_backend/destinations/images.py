@@ -0,0 +1,98 @@
+"""
+Responsive derivatives of Destination.main_image.
+
+Each upload is resized to a few fixed widths and encoded as WebP and JPEG.
+Derivative names are derived from a hash of the original's bytes, so
+regenerating is idempotent and identical uploads share files.
+"""
+import hashlib
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+
+DERIVATIVE_DIR = 'destinations/derivatives'
+
+# variant name -> target width in pixels
+VARIANT_WIDTHS = {
+    'thumbnail': 320,
+    'card': 640,
+    'hero': 1280,
+}
+
+FORMATS = {
+    'webp': {'format': 'WEBP', 'quality': 80, 'method': 4},
+    'jpeg': {'format': 'JPEG', 'quality': 82, 'optimize': True, 'progressive': True},
+}
+
+
+def _content_hash(data):
+    return hashlib.sha256(data).hexdigest()[:16]
+
+
+def _encode(image, extension):
+    options = dict(FORMATS[extension])
+    image_format = options.pop('format')
+    if image_format == 'JPEG' and image.mode == 'RGBA':
+        # JPEG has no alpha; converting would turn transparent areas black
+        background = Image.new('RGB', image.size, (255, 255, 255))
+        background.paste(image, mask=image.getchannel('A'))
+        image = background
+    elif image_format == 'JPEG' and image.mode != 'RGB':
+        image = image.convert('RGB')
+    buffer = BytesIO()
+    image.save(buffer, image_format, **options)
+    return buffer.getvalue()
+
+
+def generate_derivatives(source_name, storage=default_storage, force=False):
+    """
+    Build every variant of the stored image ``source_name``.
+
+    Returns the mapping kept in ``Destination.image_variants``. Derivatives
+    already present in storage are reused unless ``force`` is set.
+    """
+    with storage.open(source_name, 'rb') as source:
+        data = source.read()
+    digest = _content_hash(data)
+
+    original = Image.open(BytesIO(data))
+    original = ImageOps.exif_transpose(original)
+    if original.mode not in ('RGB', 'RGBA'):
+        original = original.convert('RGBA' if 'transparency' in original.info else 'RGB')
+    source_width, source_height = original.size
+
+    sizes = {}
+    for variant, target_width in VARIANT_WIDTHS.items():
+        # Never upscale; small originals are re-encoded at their own width
+        width = min(target_width, source_width)
+        height = max(1, round(source_height * width / source_width))
+        resized = None
+        entry = {'width': width, 'height': height}
+        for extension in FORMATS:
+            name = f'{DERIVATIVE_DIR}/{digest}-{width}w.{extension}'
+            if force or not storage.exists(name):
+                if resized is None:
+                    resized = original.resize((width, height), Image.Resampling.LANCZOS)
+                if storage.exists(name):
+                    storage.delete(name)
+                name = storage.save(name, ContentFile(_encode(resized, extension)))
+            entry[extension] = name
+        sizes[variant] = entry
+
+    return {'source': source_name, 'hash': digest, 'sizes': sizes}
+
+
+def variants_are_current(destination):
+    variants = destination.image_variants or {}
+    return bool(destination.main_image) and variants.get('source') == destination.main_image.name
+
+
+def srcset(variants, extension, build_url):
+    """Render an HTML srcset string for one format of a destination's variants."""
+    sizes = (variants or {}).get('sizes', {})
+    entries = sorted(
+        {(entry['width'], entry[extension]) for entry in sizes.values() if extension in entry}
+    )
+    return ', '.join(f'{build_url(name)} {width}w' for width, name in entries)
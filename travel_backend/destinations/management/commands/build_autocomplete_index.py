@@ -0,0 +1,9 @@
+from django.core.management.base import BaseCommand
+from destinations.autocomplete import build_snapshot
+
+class Command(BaseCommand):
+    help = 'Rebuild the autocomplete snapshot from the database and compact its journal'
+
+    def handle(self, *args, **options):
+        index = build_snapshot()
+        self.stdout.write(self.style.SUCCESS(f'Autocomplete index rebuilt with {len(index)} entries'))
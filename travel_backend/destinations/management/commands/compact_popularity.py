@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+from destinations.popularity import compact
+
+
+class Command(BaseCommand):
+    help = 'Fold pending popularity events into the trending scores; run every few minutes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Destinations per bulk upsert')
+
+    def handle(self, *args, **options):
+        events, updated, dropped = compact(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Folded {events} events into {updated} destination scores ({dropped} decayed scores dropped)'
+        ))
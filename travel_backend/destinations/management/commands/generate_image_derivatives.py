@@ -0,0 +1,75 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import django
+from django.core.management.base import BaseCommand
+from django.db import connections
+from destinations.images import generate_derivatives
+from destinations.models import Destination
+
+
+def _init_worker():
+    # Needed when worker processes are spawned rather than forked
+    django.setup()
+
+
+def _build(pk, image_name, force):
+    try:
+        return pk, generate_derivatives(image_name, force=force), None
+    except Exception as e:
+        return pk, None, str(e)
+
+
+class Command(BaseCommand):
+    help = 'Backfill resized WebP/JPEG derivatives for destination images in parallel'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Worker processes')
+        parser.add_argument('--force', action='store_true', help='Rebuild derivatives that already exist')
+        parser.add_argument('--batch-size', type=int, default=200, help='Destinations per bulk update')
+
+    def handle(self, *args, **options):
+        force = options['force']
+        rows = (
+            Destination.objects.exclude(main_image='')
+            .exclude(main_image__isnull=True)
+            .values_list('pk', 'main_image', 'image_variants')
+        )
+        pending = [
+            (pk, image_name)
+            for pk, image_name, variants in rows.iterator(chunk_size=2000)
+            if force or (variants or {}).get('source') != image_name
+        ]
+        if not pending:
+            self.stdout.write(self.style.SUCCESS('All destination images already have derivatives'))
+            return
+
+        self.stdout.write(f'Generating derivatives for {len(pending)} images with {options["workers"]} workers...')
+        started = time.perf_counter()
+        # Forked workers must not share the parent's database connection
+        connections.close_all()
+
+        done = failed = 0
+        batch = []
+        with ProcessPoolExecutor(max_workers=options['workers'], initializer=_init_worker) as pool:
+            futures = [pool.submit(_build, pk, image_name, force) for pk, image_name in pending]
+            for future in as_completed(futures):
+                pk, variants, error = future.result()
+                if error:
+                    failed += 1
+                    self.stderr.write(f'Destination {pk}: {error}')
+                    continue
+                batch.append(Destination(pk=pk, image_variants=variants))
+                if len(batch) >= options['batch_size']:
+                    Destination.objects.bulk_update(batch, ['image_variants'])
+                    done += len(batch)
+                    batch = []
+        if batch:
+            Destination.objects.bulk_update(batch, ['image_variants'])
+            done += len(batch)
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Generated derivatives for {done} images in {elapsed:.1f}s ({failed} failed)'
+        ))
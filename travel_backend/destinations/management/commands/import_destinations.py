@@ -0,0 +1,342 @@
+import csv
+import io
+import json
+import resource
+import sys
+import time
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+from pathlib import Path
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils.text import slugify
+from destinations import autocomplete, geo, similarity
+from destinations.cache import invalidate_responses
+from destinations.facets import invalidate_catalog_facets
+from destinations.models import Category, Destination
+
+REQUIRED_FIELDS = ['name', 'city', 'country', 'category', 'price_per_person', 'duration_days']
+# Columns overwritten when a row matches an existing destination
+UPDATE_FIELDS = [
+    'name', 'city', 'country', 'latitude', 'longitude', 'category',
+    'short_description', 'long_description', 'price_per_person', 'duration_days',
+    'difficulty', 'best_time_to_visit', 'is_featured', 'updated_at',
+]
+SLUG_MAX_LENGTH = Destination._meta.get_field('slug').max_length
+DIFFICULTIES = {choice for choice, _ in Destination.DIFFICULTY_CHOICES}
+TRUE_VALUES = {'1', 'true', 'yes', 'y', 't'}
+# Longest trip a feed may describe; anything longer is a data error
+MAX_DURATION_DAYS = 365
+
+
+class RowError(ValueError):
+    pass
+
+
+def read_rows(handle, input_format):
+    """Yield (line number, dict) from a CSV or JSON Lines stream."""
+    if input_format == 'csv':
+        reader = csv.DictReader(handle)
+        for row in reader:
+            yield reader.line_num, row
+        return
+    for line_number, line in enumerate(handle, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield line_number, json.loads(line)
+        except json.JSONDecodeError as e:
+            yield line_number, RowError(f'invalid JSON: {e}')
+
+
+def _text(row, field, default=''):
+    value = row.get(field)
+    return default if value is None else str(value).strip()
+
+
+def _decimal(row, field, required=False, round_to_field=False):
+    """
+    The value of ``field`` as a Decimal that fits its model field.
+
+    Coordinates are rounded to the field's decimal places, since feeds often
+    carry more precision than is stored; anything else that does not fit
+    (too many digits, NaN, infinity, out of range) is a RowError.
+    """
+    value = _text(row, field)
+    if not value:
+        if required:
+            raise RowError(f'{field} is required')
+        return None
+    try:
+        number = Decimal(value)
+    except InvalidOperation:
+        raise RowError(f'{field} is not a number: {value!r}')
+    if not number.is_finite():
+        raise RowError(f'{field} is not a number: {value!r}')
+    model_field = Destination._meta.get_field(field)
+    try:
+        if round_to_field:
+            number = number.quantize(Decimal(1).scaleb(-model_field.decimal_places))
+        return model_field.clean(number, None)
+    except InvalidOperation:
+        raise RowError(f'{field} is out of range: {value!r}')
+    except ValidationError as e:
+        raise RowError(f"{field} {value!r}: {' '.join(e.messages)}")
+
+
+def parse_row(row):
+    """Turn one input row into Destination field values (category still a name)."""
+    if isinstance(row, Exception):
+        raise row
+    if not isinstance(row, dict):
+        # A JSON line holding a list, number or string rather than an object
+        raise RowError(f'expected an object, got {type(row).__name__}')
+    missing = [field for field in REQUIRED_FIELDS if not _text(row, field)]
+    if missing:
+        raise RowError(f"missing {', '.join(missing)}")
+    try:
+        duration = int(_text(row, 'duration_days'))
+    except ValueError:
+        raise RowError(f"duration_days is not a whole number: {row.get('duration_days')!r}")
+    if not 0 <= duration <= MAX_DURATION_DAYS:
+        raise RowError(f'duration_days must be between 0 and {MAX_DURATION_DAYS}')
+    difficulty = _text(row, 'difficulty', 'easy').lower() or 'easy'
+    if difficulty not in DIFFICULTIES:
+        raise RowError(f'unknown difficulty {difficulty!r}')
+    latitude = _decimal(row, 'latitude', round_to_field=True)
+    longitude = _decimal(row, 'longitude', round_to_field=True)
+    price = _decimal(row, 'price_per_person', required=True)
+    if price < 0:
+        raise RowError('price_per_person must not be negative')
+
+    name = _text(row, 'name')
+    short_description = _text(row, 'short_description')
+    return {
+        'slug': slugify(_text(row, 'slug'))[:SLUG_MAX_LENGTH],
+        'name': name[:200],
+        'city': _text(row, 'city')[:100],
+        'country': _text(row, 'country')[:100],
+        'latitude': latitude,
+        'longitude': longitude,
+        'category': _text(row, 'category'),
+        'short_description': (short_description or name)[:500],
+        'long_description': _text(row, 'long_description') or short_description or name,
+        'price_per_person': price,
+        'duration_days': duration,
+        'difficulty': difficulty,
+        'best_time_to_visit': _text(row, 'best_time_to_visit')[:200],
+        'is_featured': _text(row, 'is_featured').lower() in TRUE_VALUES,
+    }
+
+
+def _identity(values):
+    return (values['name'], values['city'], values['country'])
+
+
+def _with_suffix(base, number):
+    suffix = f'-{number}'
+    return base[:SLUG_MAX_LENGTH - len(suffix)] + suffix
+
+
+def assign_slugs(batch):
+    """
+    Give every row in ``batch`` a slug: one query for the batch, plus one
+    index range scan per name that collides.
+
+    A row with an explicit slug upserts whatever has that slug. Otherwise the
+    slug comes from the name; if a different destination (same name, other
+    city or country) already has it, the row gets the first free ``-n``
+    suffix, or the suffixed slug it was given by an earlier import.
+    """
+    for values in batch:
+        values['explicit_slug'] = bool(values['slug'])
+        if not values['slug']:
+            values['slug'] = slugify(values['name'])[:SLUG_MAX_LENGTH] or 'destination'
+
+    bases = {values['slug'] for values in batch}
+    owners = {
+        slug: (name, city, country)
+        for slug, name, city, country in Destination.objects.filter(slug__in=bases)
+        .values_list('slug', 'name', 'city', 'country')
+    }
+
+    collided = []
+    for values in batch:
+        slug = values['slug']
+        owner = owners.get(slug)
+        if values['explicit_slug'] or owner is None or owner == _identity(values):
+            owners[slug] = _identity(values)
+        else:
+            collided.append(values)
+    if not collided:
+        return
+
+    # Everything already using one of the colliding bases with a suffix. '.'
+    # sorts right after '-', so each base is a short range scan of the slug
+    # index; OR-ing the ranges into one query defeats the index on SQLite
+    for base in {values['slug'] for values in collided}:
+        base = base[:SLUG_MAX_LENGTH - 2]
+        for slug, name, city, country in Destination.objects.filter(
+            slug__gt=f'{base}-', slug__lt=f'{base}.'
+        ).values_list('slug', 'name', 'city', 'country'):
+            owners.setdefault(slug, (name, city, country))
+
+    for values in collided:
+        base = values['slug']
+        identity = _identity(values)
+        number = 2
+        while True:
+            candidate = _with_suffix(base, number)
+            owner = owners.get(candidate)
+            if owner is None or owner == identity:
+                break
+            number += 1
+        values['slug'] = candidate
+        owners[candidate] = identity
+
+
+def peak_memory_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+class Command(BaseCommand):
+    help = 'Stream destinations from a CSV or JSON Lines file and upsert them in batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="CSV or JSONL file, or '-' for standard input")
+        parser.add_argument('--format', choices=['csv', 'jsonl'], help='Input format (default: from the file extension)')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rows per bulk upsert')
+        parser.add_argument(
+            '--no-create-categories', action='store_true',
+            help='Reject rows whose category does not exist instead of creating it'
+        )
+        parser.add_argument(
+            '--rebuild-similar', action='store_true',
+            help='Recompute similar-destination lists afterwards (slow for large catalogs)'
+        )
+        parser.add_argument('--max-errors', type=int, default=20, help='Row errors to print before going quiet')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        input_format = options['format']
+        if input_format is None:
+            suffix = Path(path).suffix.lower()
+            input_format = 'csv' if suffix == '.csv' else 'jsonl' if suffix in ('.jsonl', '.ndjson') else None
+            if input_format is None:
+                raise CommandError('Cannot tell the input format from the file name; pass --format')
+
+        if path == '-':
+            handle = io.TextIOWrapper(sys.stdin.buffer, encoding='utf-8-sig', newline='')
+        else:
+            try:
+                handle = open(path, encoding='utf-8-sig', newline='')
+            except OSError as e:
+                raise CommandError(f'Cannot open {path}: {e}')
+
+        self.categories = {name.lower(): pk for pk, name in Category.objects.values_list('id', 'name')}
+        self.create_categories = not options['no_create_categories']
+        self.max_errors = options['max_errors']
+        self.errors = 0
+
+        started = time.perf_counter()
+        rows = read_rows(handle, input_format)
+        imported = seen = batches = 0
+        try:
+            while True:
+                chunk = list(islice(rows, options['batch_size']))
+                if not chunk:
+                    break
+                seen += len(chunk)
+                imported += self.import_batch(chunk)
+                batches += 1
+                if batches % 10 == 0:
+                    elapsed = time.perf_counter() - started
+                    self.stdout.write(f'{seen} rows read, {imported} imported ({seen / elapsed:,.0f} rows/s)')
+        finally:
+            if handle is not sys.stdin:
+                handle.close()
+        elapsed = time.perf_counter() - started
+
+        if imported:
+            self.refresh_derived_data(options['rebuild_similar'])
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {imported} of {seen} rows in {elapsed:.1f}s '
+            f'({seen / elapsed if elapsed else 0:,.0f} rows/s, peak memory {peak_memory_mb():.0f} MB, '
+            f'{self.errors} rejected)'
+        ))
+
+    def reject(self, line_number, message):
+        self.errors += 1
+        if self.errors <= self.max_errors:
+            self.stderr.write(f'Line {line_number}: {message}')
+        elif self.errors == self.max_errors + 1:
+            self.stderr.write('Further row errors are counted but not shown')
+
+    def resolve_categories(self, names):
+        """Category ids for ``names``, creating missing categories in one insert."""
+        missing = {name for name in names if name.lower() not in self.categories}
+        if missing and self.create_categories:
+            Category.objects.bulk_create([Category(name=name) for name in missing], ignore_conflicts=True)
+            for pk, name in Category.objects.filter(name__in=missing).values_list('id', 'name'):
+                self.categories[name.lower()] = pk
+
+    def import_batch(self, chunk):
+        batch = []
+        for line_number, row in chunk:
+            try:
+                values = parse_row(row)
+            except RowError as e:
+                self.reject(line_number, e)
+                continue
+            values['line_number'] = line_number
+            batch.append(values)
+
+        self.resolve_categories({values['category'] for values in batch})
+        accepted = []
+        for values in batch:
+            category_id = self.categories.get(values['category'].lower())
+            if category_id is None:
+                self.reject(values['line_number'], f"unknown category {values['category']!r}")
+                continue
+            values['category_id'] = category_id
+            accepted.append(values)
+
+        # Later rows win when the feed repeats a destination within a batch
+        with transaction.atomic():
+            assign_slugs(accepted)
+            unique = {values['slug']: values for values in accepted}
+            Destination.objects.bulk_create(
+                [
+                    Destination(
+                        slug=slug,
+                        category_id=values['category_id'],
+                        **{field: values[field] for field in UPDATE_FIELDS if field not in ('category', 'updated_at')},
+                    )
+                    for slug, values in unique.items()
+                ],
+                update_conflicts=True,
+                unique_fields=['slug'],
+                update_fields=UPDATE_FIELDS,
+            )
+        return len(unique)
+
+    def refresh_derived_data(self, rebuild_similar):
+        # bulk_create skips the model signals that normally keep these current;
+        # the full-text index follows on its own through its triggers
+        self.stdout.write('Refreshing autocomplete, map, facets and cached responses...')
+        autocomplete.build_snapshot()
+        geo.invalidate()
+        invalidate_catalog_facets()
+        invalidate_responses('featured', 'trending', 'categories')
+        if rebuild_similar:
+            self.stdout.write('Recomputing similar destinations...')
+            similarity.rebuild()
+        else:
+            similarity.invalidate_model()
+            self.stdout.write('Run rebuild_similar_destinations to add new destinations to similar lists')
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+from destinations.search import ensure_search_index
+
+class Command(BaseCommand):
+    help = 'Create the destination full-text search index and rebuild its contents'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default='default', help='Database alias to index')
+
+    def handle(self, *args, **options):
+        ensure_search_index(using=options['database'], rebuild=True)
+        self.stdout.write(self.style.SUCCESS('Destination search index rebuilt'))
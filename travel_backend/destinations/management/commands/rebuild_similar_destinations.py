@@ -0,0 +1,70 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from destinations import similarity
+from destinations.models import Destination
+
+
+def synthetic_rows(count, seed=0, vocabulary_size=20000):
+    """Destination-like rows with Zipf-distributed words, for benchmarking."""
+    rng = random.Random(seed)
+    vocabulary = [f'w{index:05d}x' for index in range(vocabulary_size)]
+    cumulative = []
+    total = 0.0
+    for rank in range(1, vocabulary_size + 1):
+        total += 1 / rank ** 1.1
+        cumulative.append(total)
+    difficulties = [choice for choice, _ in Destination.DIFFICULTY_CHOICES]
+
+    def words(n):
+        return ' '.join(rng.choices(vocabulary, cum_weights=cumulative, k=n))
+
+    for pk in range(1, count + 1):
+        yield (
+            pk, words(3), words(20), words(120),
+            rng.randint(1, 12), rng.choice(difficulties),
+            rng.randint(1, 21), rng.randint(200, 8000),
+        )
+
+
+class Command(BaseCommand):
+    help = 'Recompute the stored similar-destination lists, or benchmark a rebuild on synthetic data'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=2000, help='Rows per bulk insert')
+        parser.add_argument(
+            '--benchmark', type=int, metavar='N',
+            help='Time vectorizing and neighbour search for N synthetic destinations; nothing is stored'
+        )
+
+    def handle(self, *args, **options):
+        k = similarity.neighbour_count()
+        if options['benchmark']:
+            self.benchmark(options['benchmark'], k)
+            return
+
+        started = time.perf_counter()
+        model = similarity.rebuild(k=k, batch_size=options['batch_size'])
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Stored up to {k} similar destinations for {len(model)} destinations in {elapsed:.1f}s'
+        ))
+
+    def benchmark(self, count, k):
+        rows = list(synthetic_rows(count))
+        started = time.perf_counter()
+        model = similarity.SimilarityModel().fit(rows)
+        fitted = time.perf_counter()
+        pairs = sum(len(neighbours) for _, neighbours in model.all_neighbours(k))
+        searched = time.perf_counter()
+        probe = rows[0][0]
+        model.update(probe, rows[0])
+        model.neighbours(probe, k)
+        updated = time.perf_counter()
+
+        self.stdout.write(f'Destinations:       {count}')
+        self.stdout.write(f'Vectorize:          {fitted - started:.1f}s')
+        self.stdout.write(f'Neighbour search:   {searched - fitted:.1f}s ({pairs} pairs)')
+        self.stdout.write(f'Total rebuild:      {searched - started:.1f}s')
+        self.stdout.write(f'Single update:      {(updated - searched) * 1000:.0f}ms')
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:22
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('destinations', '0007_destination_coordinates'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SimilarDestination',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField()),
+                ('rank', models.PositiveSmallIntegerField()),
+                ('destination', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='similar_entries', to='destinations.destination')),
+                ('similar', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='similar_to_entries', to='destinations.destination')),
+            ],
+            options={
+                'ordering': ['destination', 'rank'],
+                'unique_together': {('destination', 'rank')},
+            },
+        ),
+    ]
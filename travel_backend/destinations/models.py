@@ -1,4 +1,6 @@
+from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models
+from django.utils import timezone
 from django.utils.text import slugify
 
 class Category(models.Model):
@@ -25,6 +27,14 @@ class Destination(models.Model):
     slug = models.SlugField(max_length=250, unique=True, blank=True)
     city = models.CharField(max_length=100)
     country = models.CharField(max_length=100)
+    latitude = models.DecimalField(
+        max_digits=9, decimal_places=6, blank=True, null=True,
+        validators=[MinValueValidator(-90), MaxValueValidator(90)]
+    )
+    longitude = models.DecimalField(
+        max_digits=9, decimal_places=6, blank=True, null=True,
+        validators=[MinValueValidator(-180), MaxValueValidator(180)]
+    )
     category = models.ForeignKey(Category, on_delete=models.CASCADE, related_name='destinations')
     
     short_description = models.CharField(max_length=500)
@@ -36,13 +46,27 @@ class Destination(models.Model):
     best_time_to_visit = models.CharField(max_length=200, blank=True)
     
     main_image = models.ImageField(upload_to='destinations/images/', blank=True, null=True)
+    # Resized WebP/JPEG copies of main_image, see destinations.images
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
     is_featured = models.BooleanField(default=False)
     
+    # Review aggregates, denormalized from approved reviews.Review rows so
+    # listings can show ratings without querying reviews per destination
+    average_rating = models.DecimalField(max_digits=3, decimal_places=2, default=0)
+    total_reviews = models.PositiveIntegerField(default=0)
+    value_for_money_rating = models.DecimalField(max_digits=3, decimal_places=2, blank=True, null=True)
+    service_quality_rating = models.DecimalField(max_digits=3, decimal_places=2, blank=True, null=True)
+    cleanliness_rating = models.DecimalField(max_digits=3, decimal_places=2, blank=True, null=True)
+    location_rating = models.DecimalField(max_digits=3, decimal_places=2, blank=True, null=True)
+    
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['-created_at', '-id']),
+        ]
     
     def save(self, *args, **kwargs):
         if not self.slug:
@@ -51,3 +75,54 @@ class Destination(models.Model):
     
     def __str__(self):
         return f"{self.name} - {self.city}, {self.country}"
+
+class SimilarDestination(models.Model):
+    """Precomputed content-based neighbours of a destination, see destinations.similarity"""
+    
+    destination = models.ForeignKey(Destination, on_delete=models.CASCADE, related_name='similar_entries')
+    similar = models.ForeignKey(Destination, on_delete=models.CASCADE, related_name='similar_to_entries')
+    score = models.FloatField()
+    rank = models.PositiveSmallIntegerField()
+    
+    class Meta:
+        ordering = ['destination', 'rank']
+        unique_together = ['destination', 'rank']
+    
+    def __str__(self):
+        return f"{self.destination_id} -> {self.similar_id} ({self.score:.3f})"
+
+
+class DestinationPopularity(models.Model):
+    """Time-decayed popularity, folded in from PopularityEvent rows (see destinations.popularity)"""
+    
+    destination = models.OneToOneField(
+        Destination, on_delete=models.CASCADE, primary_key=True, related_name='popularity'
+    )
+    # Natural log of the decayed score scaled up to a fixed epoch: ordering by
+    # it is ordering by the current score, and it never needs rescaling
+    log_score = models.FloatField(db_index=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        verbose_name_plural = "destination popularity"
+    
+    def __str__(self):
+        return f"{self.destination_id} ({self.log_score:.3f})"
+
+class PopularityEvent(models.Model):
+    """Append-only record of something that makes a destination more (or less) popular"""
+    
+    KIND_CHOICES = [
+        ('booking', 'Booking created'),
+        ('favorite', 'Favorited'),
+        ('unfavorite', 'Unfavorited'),
+        ('review', 'Review created'),
+    ]
+    
+    destination = models.ForeignKey(Destination, on_delete=models.CASCADE, related_name='+')
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    weight = models.FloatField()
+    created_at = models.DateTimeField(default=timezone.now)
+    
+    def __str__(self):
+        return f"{self.kind} {self.destination_id} ({self.weight:+g})"
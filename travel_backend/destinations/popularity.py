@@ -0,0 +1,123 @@
+"""
+Trending destinations from exponentially decayed popularity.
+
+Bookings, favorites and reviews append PopularityEvent rows, which is a
+single insert with no contention on hot destinations. compact_popularity
+periodically folds those events into DestinationPopularity, one row per
+destination, and clears them.
+
+A score decays by half every TRENDING_HALF_LIFE_HOURS. Rather than decaying
+every row on every run, each row stores log(score) scaled up to a fixed
+epoch. Scaling multiplies every score by the same factor, so ordering by
+the stored value is ordering by the current score, and the top k is an
+index scan of k rows.
+"""
+import math
+from collections import defaultdict
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from .cache import invalidate_responses
+
+EPOCH = datetime(2024, 1, 1, tzinfo=dt_timezone.utc)
+
+EVENT_WEIGHTS = {
+    'booking': 5.0,
+    'favorite': 2.0,
+    'unfavorite': -2.0,
+    'review': 3.0,
+}
+
+# Rows that have decayed below this are dropped when compacting
+MIN_SCORE = 0.01
+
+
+def decay_rate():
+    """Decay constant per second for the configured half-life."""
+    half_life_hours = getattr(settings, 'TRENDING_HALF_LIFE_HOURS', 72)
+    return math.log(2) / (half_life_hours * 3600)
+
+
+def _epoch_offset(now, rate):
+    return rate * (now - EPOCH).total_seconds()
+
+
+def current_score(log_score, now=None, rate=None):
+    """The decayed score today of a stored ``log_score``."""
+    rate = rate or decay_rate()
+    return math.exp(log_score - _epoch_offset(now or timezone.now(), rate))
+
+
+def record_event(destination_id, kind):
+    from .models import PopularityEvent
+
+    PopularityEvent.objects.create(destination_id=destination_id, kind=kind, weight=EVENT_WEIGHTS[kind])
+
+
+def compact(now=None, batch_size=1000):
+    """
+    Fold pending events into DestinationPopularity and delete them.
+
+    Returns (events folded, destinations updated, destinations dropped).
+    """
+    from .models import DestinationPopularity, PopularityEvent
+
+    now = now or timezone.now()
+    rate = decay_rate()
+    offset = _epoch_offset(now, rate)
+
+    with transaction.atomic():
+        last_id = PopularityEvent.objects.aggregate(last=Max('id'))['last']
+        if last_id is None:
+            return 0, 0, 0
+        pending = PopularityEvent.objects.filter(id__lte=last_id)
+
+        # Each event's contribution as of now
+        deltas = defaultdict(float)
+        events = 0
+        for destination_id, weight, created_at in pending.values_list(
+            'destination_id', 'weight', 'created_at'
+        ).iterator(chunk_size=5000):
+            age = max((now - created_at).total_seconds(), 0)
+            deltas[destination_id] += weight * math.exp(-rate * age)
+            events += 1
+
+        updated = dropped = 0
+        destination_ids = list(deltas)
+        for start in range(0, len(destination_ids), batch_size):
+            chunk = destination_ids[start:start + batch_size]
+            existing = dict(
+                DestinationPopularity.objects.filter(destination_id__in=chunk)
+                .values_list('destination_id', 'log_score')
+            )
+            rows, gone = [], []
+            for destination_id in chunk:
+                score = deltas[destination_id]
+                if destination_id in existing:
+                    score += math.exp(existing[destination_id] - offset)
+                if score >= MIN_SCORE:
+                    rows.append(DestinationPopularity(
+                        destination_id=destination_id, log_score=math.log(score) + offset
+                    ))
+                elif destination_id in existing:
+                    gone.append(destination_id)
+            DestinationPopularity.objects.bulk_create(
+                rows, update_conflicts=True,
+                unique_fields=['destination'], update_fields=['log_score', 'updated_at'],
+            )
+            DestinationPopularity.objects.filter(destination_id__in=gone).delete()
+            updated += len(rows)
+            dropped += len(gone)
+
+        # Destinations nobody has touched for a long while fall off entirely
+        dropped += DestinationPopularity.objects.filter(
+            log_score__lt=math.log(MIN_SCORE) + offset
+        ).delete()[0]
+        pending.delete()
+        transaction.on_commit(lambda: invalidate_responses('trending'))
+
+    return events, updated, dropped
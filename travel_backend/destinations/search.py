@@ -0,0 +1,155 @@
+import re
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import BooleanField, FloatField, Q
+from django.db.models.expressions import RawSQL
+
+from .models import Destination
+
+FTS_TABLE = 'destinations_destination_fts'
+SEARCH_FIELDS = ['name', 'city', 'country', 'short_description']
+
+# bm25() column weights, in SEARCH_FIELDS order: a hit in the name counts
+# twice as much as one in the location and ten times one in the description
+BM25_WEIGHTS = (10.0, 5.0, 5.0, 1.0)
+
+PG_INDEX_NAME = 'destinations_destination_search_gin'
+PG_SEARCH_VECTOR = (
+    "to_tsvector('simple', "
+    "coalesce(destinations_destination.name, '') || ' ' || "
+    "coalesce(destinations_destination.city, '') || ' ' || "
+    "coalesce(destinations_destination.country, '') || ' ' || "
+    "coalesce(destinations_destination.short_description, ''))"
+)
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def _sqlite_trigger_sql():
+    table = Destination._meta.db_table
+    columns = ', '.join(SEARCH_FIELDS)
+    new_values = ', '.join(f'new.{field}' for field in SEARCH_FIELDS)
+    old_values = ', '.join(f'old.{field}' for field in SEARCH_FIELDS)
+    insert_new = f"INSERT INTO {FTS_TABLE}(rowid, {columns}) VALUES (new.id, {new_values});"
+    delete_old = (
+        f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {columns}) "
+        f"VALUES ('delete', old.id, {old_values});"
+    )
+    return [
+        f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON {table} "
+        f"BEGIN {insert_new} END",
+        f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON {table} "
+        f"BEGIN {delete_old} END",
+        f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF {columns} ON {table} "
+        f"BEGIN {delete_old} {insert_new} END",
+    ]
+
+
+def ensure_search_index(using='default', rebuild=False):
+    """
+    Create the full-text index for destinations if the backend supports one.
+
+    On SQLite this is an external-content FTS5 table kept in sync by triggers,
+    so it follows every save, delete, bulk_create and queryset update. SQLite
+    drops triggers whenever a migration rebuilds the destinations table, which
+    is why this runs after every migrate and uses IF NOT EXISTS throughout.
+    On PostgreSQL it is a GIN index over the same columns.
+    """
+    from django.db import connections
+
+    conn = connections[using]
+    with conn.cursor() as cursor:
+        if conn.vendor == 'sqlite':
+            existing = conn.introspection.table_names(cursor)
+            created = FTS_TABLE not in existing
+            if created:
+                cursor.execute(
+                    f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5("
+                    f"{', '.join(SEARCH_FIELDS)}, "
+                    f"content='{Destination._meta.db_table}', content_rowid='id', "
+                    f"tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+                )
+            for statement in _sqlite_trigger_sql():
+                cursor.execute(statement)
+            if created or rebuild:
+                cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+        elif conn.vendor == 'postgresql':
+            cursor.execute(
+                f"CREATE INDEX IF NOT EXISTS {PG_INDEX_NAME} "
+                f"ON {Destination._meta.db_table} USING GIN ({PG_SEARCH_VECTOR})"
+            )
+    _available.pop(using, None)
+
+
+_available = {}
+
+
+def full_text_search_available():
+    """Whether the default database has a usable full-text index."""
+    if not getattr(settings, 'DESTINATION_FULL_TEXT_SEARCH', True):
+        return False
+    if connection.alias not in _available:
+        if connection.vendor == 'sqlite':
+            with connection.cursor() as cursor:
+                _available[connection.alias] = (
+                    FTS_TABLE in connection.introspection.table_names(cursor)
+                )
+        else:
+            _available[connection.alias] = connection.vendor == 'postgresql'
+    return _available[connection.alias]
+
+
+def tokenize(query):
+    return _TOKEN_RE.findall(query.lower())
+
+
+def search_destinations(queryset, query):
+    """
+    Filter ``queryset`` down to destinations matching ``query``, best first.
+
+    Every term must match, and the last one may be a prefix so results keep
+    up with the user as they type. Without a full-text index this falls back
+    to the old case-insensitive substring search, ordered newest first.
+    """
+    if not full_text_search_available():
+        return queryset.filter(
+            Q(name__icontains=query) |
+            Q(city__icontains=query) |
+            Q(country__icontains=query) |
+            Q(short_description__icontains=query)
+        ).order_by('-created_at')
+
+    tokens = tokenize(query)
+    if not tokens:
+        return queryset.none()
+
+    if connection.vendor == 'sqlite':
+        match = ' '.join(f'"{token}"' for token in tokens[:-1])
+        match = f'{match} "{tokens[-1]}"*'.strip()
+        weights = ', '.join(str(weight) for weight in BM25_WEIGHTS)
+        # bm25() is lower-is-better, so ascending order puts the best hit first
+        return queryset.extra(
+            tables=[FTS_TABLE],
+            where=[
+                f'{FTS_TABLE}.rowid = {Destination._meta.db_table}.id',
+                f'{FTS_TABLE} MATCH %s',
+            ],
+            params=[match],
+            select={'search_rank': f'bm25({FTS_TABLE}, {weights})'},
+            order_by=['search_rank', '-created_at'],
+        )
+
+    ts_query = ' & '.join(f"{token}:*" for token in tokens)
+    return queryset.annotate(
+        search_match=RawSQL(
+            f"{PG_SEARCH_VECTOR} @@ to_tsquery('simple', %s)",
+            [ts_query],
+            output_field=BooleanField(),
+        ),
+        search_rank=RawSQL(
+            f"ts_rank({PG_SEARCH_VECTOR}, to_tsquery('simple', %s))",
+            [ts_query],
+            output_field=FloatField(),
+        ),
+    ).filter(search_match=True).order_by('-search_rank', '-created_at')
@@ -1,6 +1,61 @@
+from django.core.files.storage import default_storage
 from rest_framework import serializers
+from .images import FORMATS, srcset, variants_are_current
 from .models import Destination, Category
 
+# High-quality fallback images, by destination name first and then by category
+FALLBACK_IMAGES_BY_NAME = {
+    'Paris Luxury Experience': 'https://images.unsplash.com/photo-1502602898536-47ad22581b52?ixlib=rb-4.0.3&auto=format&fit=crop&w=800&h=600&q=80',
+    'Swiss Alps Nature Trek': 'https://images.unsplash.com/photo-1506905925346-21bda4d32df4?ixlib=rb-4.0.3&auto=format&fit=crop&w=800&h=600&q=80',
+    'New York City Explorer': 'https://images.unsplash.com/photo-1496568816309-51d7c20e3b21?ixlib=rb-4.0.3&auto=format&fit=crop&w=800&h=600&q=80',
+    'Tokyo Cultural Discovery': 'https://images.unsplash.com/photo-1549144511-f099e773c147?ixlib=rb-4.0.3&auto=format&fit=crop&w=800&h=600&q=80',
+    'Maldives Luxury Escape': 'https://images.unsplash.com/photo-1507525428034-b723cf961d3e?ixlib=rb-4.0.3&auto=format&fit=crop&w=800&h=600&q=80',
+}
+
+FALLBACK_IMAGES_BY_CATEGORY = {
+    'adventure': 'https://images.unsplash.com/photo-1551632811-561732d1e306?ixlib=rb-4.0.3&auto=format&fit=crop&w=800&h=600&q=80',
+    'beach': 'https://images.unsplash.com/photo-1507525428034-b723cf961d3e?ixlib=rb-4.0.3&auto=format&fit=crop&w=800&h=600&q=80',
+    'cultural': 'https://images.unsplash.com/photo-1549144511-f099e773c147?ixlib=rb-4.0.3&auto=format&fit=crop&w=800&h=600&q=80',
+    'mountain': 'https://images.unsplash.com/photo-1506905925346-21bda4d32df4?ixlib=rb-4.0.3&auto=format&fit=crop&w=800&h=600&q=80',
+    'city': 'https://images.unsplash.com/photo-1477959858617-67f85cf4f1df?ixlib=rb-4.0.3&auto=format&fit=crop&w=800&h=600&q=80',
+    'wildlife': 'https://images.unsplash.com/photo-1547036967-23d11aacaee0?ixlib=rb-4.0.3&auto=format&fit=crop&w=800&h=600&q=80',
+}
+
+# Columns DestinationSerializer reads, for setup_eager_loading()
+DESTINATION_LOADED_FIELDS = [
+    'id', 'name', 'slug', 'city', 'country', 'latitude', 'longitude',
+    'category', 'category__name', 'category__icon',
+    'short_description', 'long_description', 'price_per_person', 'duration_days',
+    'difficulty', 'best_time_to_visit', 'main_image', 'image_variants', 'is_featured',
+    'average_rating', 'total_reviews', 'value_for_money_rating', 'service_quality_rating',
+    'cleanliness_rating', 'location_rating', 'created_at', 'updated_at',
+]
+
+
+def resolve_image_url(destination, request=None):
+    """Absolute URL of the uploaded image, or a fallback picked by name or category"""
+    return image_url_from_values(
+        destination.main_image.name,
+        destination.name,
+        destination.category.name if destination.category_id else None,
+        request,
+    )
+
+def image_url_from_values(main_image, name, category_name, request=None):
+    """resolve_image_url() for callers holding column values rather than a Destination"""
+    if main_image:
+        url = Destination._meta.get_field('main_image').storage.url(main_image)
+        if request:
+            return request.build_absolute_uri(url)
+        return url
+    
+    fallback = FALLBACK_IMAGES_BY_NAME.get(name)
+    if fallback:
+        return fallback
+    
+    category_name = category_name.lower() if category_name else 'adventure'
+    return FALLBACK_IMAGES_BY_CATEGORY.get(category_name, FALLBACK_IMAGES_BY_CATEGORY['adventure'])
+
 class CategorySerializer(serializers.ModelSerializer):
     class Meta:
         model = Category
@@ -11,58 +66,70 @@ class DestinationSerializer(serializers.ModelSerializer):
     category_icon = serializers.CharField(source='category.icon', read_only=True)
     main_image_url = serializers.SerializerMethodField()
     image_url = serializers.SerializerMethodField()  # For backward compatibility
-    average_rating = serializers.SerializerMethodField()
-    total_reviews = serializers.SerializerMethodField()
+    image_variants = serializers.SerializerMethodField()
+    main_image_srcset = serializers.SerializerMethodField()
+    average_rating = serializers.FloatField(read_only=True)
+    value_for_money_rating = serializers.FloatField(read_only=True)
+    service_quality_rating = serializers.FloatField(read_only=True)
+    cleanliness_rating = serializers.FloatField(read_only=True)
+    location_rating = serializers.FloatField(read_only=True)
     
     class Meta:
         model = Destination
         fields = [
-            'id', 'name', 'slug', 'city', 'country', 'category', 'category_name', 
+            'id', 'name', 'slug', 'city', 'country', 'latitude', 'longitude',
+            'category', 'category_name', 
             'category_icon', 'short_description', 'long_description', 
             'price_per_person', 'duration_days', 'difficulty', 'best_time_to_visit',
-            'main_image_url', 'image_url', 'is_featured', 'average_rating', 'total_reviews',
-            'created_at', 'updated_at'
+            'main_image_url', 'image_url', 'image_variants', 'main_image_srcset', 'is_featured', 'average_rating', 'total_reviews',
+            'value_for_money_rating', 'service_quality_rating', 'cleanliness_rating',
+            'location_rating', 'created_at', 'updated_at'
         ]
+        read_only_fields = ['total_reviews']
+    
+    @staticmethod
+    def setup_eager_loading(queryset):
+        """
+        Load everything this serializer reads in the query itself.
+
+        Every view serializing destinations must pass its queryset through
+        here; otherwise each row costs an extra query for its category.
+        """
+        return queryset.select_related('category').only(*DESTINATION_LOADED_FIELDS)
     
     def get_main_image_url(self, obj):
-        if obj.main_image:
-            request = self.context.get('request')
-            if request:
-                return request.build_absolute_uri(obj.main_image.url)
-            return obj.main_image.url
-        
-        # Return high-quality fallback images based on destination name or category
-        fallback_images = {
-            'Paris Luxury Experience': 'https://images.unsplash.com/photo-1502602898536-47ad22581b52?ixlib=rb-4.0.3&auto=format&fit=crop&w=800&h=600&q=80',
-            'Swiss Alps Nature Trek': 'https://images.unsplash.com/photo-1506905925346-21bda4d32df4?ixlib=rb-4.0.3&auto=format&fit=crop&w=800&h=600&q=80',
-            'New York City Explorer': 'https://images.unsplash.com/photo-1496568816309-51d7c20e3b21?ixlib=rb-4.0.3&auto=format&fit=crop&w=800&h=600&q=80',
-            'Tokyo Cultural Discovery': 'https://images.unsplash.com/photo-1549144511-f099e773c147?ixlib=rb-4.0.3&auto=format&fit=crop&w=800&h=600&q=80',
-            'Maldives Luxury Escape': 'https://images.unsplash.com/photo-1507525428034-b723cf961d3e?ixlib=rb-4.0.3&auto=format&fit=crop&w=800&h=600&q=80',
-        }
-        
-        # Try to get image by destination name first
-        if obj.name in fallback_images:
-            return fallback_images[obj.name]
-        
-        # Fallback by category
-        category_images = {
-            'adventure': 'https://images.unsplash.com/photo-1551632811-561732d1e306?ixlib=rb-4.0.3&auto=format&fit=crop&w=800&h=600&q=80',
-            'beach': 'https://images.unsplash.com/photo-1507525428034-b723cf961d3e?ixlib=rb-4.0.3&auto=format&fit=crop&w=800&h=600&q=80',
-            'cultural': 'https://images.unsplash.com/photo-1549144511-f099e773c147?ixlib=rb-4.0.3&auto=format&fit=crop&w=800&h=600&q=80',
-            'mountain': 'https://images.unsplash.com/photo-1506905925346-21bda4d32df4?ixlib=rb-4.0.3&auto=format&fit=crop&w=800&h=600&q=80',
-            'city': 'https://images.unsplash.com/photo-1477959858617-67f85cf4f1df?ixlib=rb-4.0.3&auto=format&fit=crop&w=800&h=600&q=80',
-            'wildlife': 'https://images.unsplash.com/photo-1547036967-23d11aacaee0?ixlib=rb-4.0.3&auto=format&fit=crop&w=800&h=600&q=80',
-        }
-        
-        category_name = obj.category.name.lower() if obj.category else 'adventure'
-        return category_images.get(category_name, category_images['adventure'])
+        url = resolve_image_url(obj, self.context.get('request'))
+        # image_url is rendered right after this field; remember the result
+        self._resolved_image = (obj, url)
+        return url
     
     def get_image_url(self, obj):
         # Return same as main_image_url for backward compatibility
-        return self.get_main_image_url(obj)
+        resolved = getattr(self, '_resolved_image', None)
+        if resolved is not None and resolved[0] is obj:
+            return resolved[1]
+        return resolve_image_url(obj, self.context.get('request'))
+    
+    def _media_url(self, name):
+        url = default_storage.url(name)
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request else url
     
-    def get_average_rating(self, obj):
-        return 4.5
+    def get_image_variants(self, obj):
+        """Resized copies of main_image by variant name, e.g. {'card': {'width': 640, 'webp': url, 'jpeg': url}}"""
+        if not variants_are_current(obj):
+            return {}
+        return {
+            variant: {
+                'width': entry['width'],
+                'height': entry['height'],
+                **{extension: self._media_url(entry[extension]) for extension in FORMATS if extension in entry},
+            }
+            for variant, entry in obj.image_variants['sizes'].items()
+        }
     
-    def get_total_reviews(self, obj):
-        return 42
+    def get_main_image_srcset(self, obj):
+        """srcset strings per format, ready for <source>/<img> tags"""
+        if not variants_are_current(obj):
+            return {}
+        return {extension: srcset(obj.image_variants, extension, self._media_url) for extension in FORMATS}
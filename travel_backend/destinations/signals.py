@@ -0,0 +1,129 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_init, post_save, pre_delete
+from django.dispatch import receiver
+
+from . import autocomplete, geo, popularity, similarity, tasks
+from .cache import invalidate_responses
+from .facets import invalidate_catalog_facets
+from .images import variants_are_current
+from .models import Category, Destination, SimilarDestination
+
+
+@receiver(post_init, sender=Destination)
+def remember_loaded_state(sender, instance, **kwargs):
+    # Read __dict__ directly so deferred fields are not fetched one by one
+    values = instance.__dict__
+    instance._loaded_is_featured = values.get('is_featured')
+    instance._loaded_coordinates = (values.get('latitude'), values.get('longitude'))
+
+
+@receiver(post_save, sender=Destination)
+def destination_saved(sender, instance, **kwargs):
+    op = ['d', instance.pk, instance.slug, instance.name, instance.city, instance.country]
+    transaction.on_commit(lambda: autocomplete.record(op))
+    transaction.on_commit(invalidate_catalog_facets)
+    # Only a destination that is, or just stopped being, featured can change
+    # the featured response
+    groups = ['trending']
+    if instance.is_featured or instance._loaded_is_featured:
+        groups.append('featured')
+    transaction.on_commit(lambda: invalidate_responses(*groups))
+    instance._loaded_is_featured = instance.is_featured
+
+    coordinates = (instance.latitude, instance.longitude)
+    created_with_coordinates = kwargs.get('created') and coordinates != (None, None)
+    if created_with_coordinates or coordinates != instance._loaded_coordinates:
+        pk = instance.pk
+        transaction.on_commit(lambda: geo.update_point(pk, *coordinates))
+    instance._loaded_coordinates = coordinates
+
+
+@receiver(post_save, sender=Destination)
+def update_similar_destinations(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw:
+        return
+    if update_fields is not None and not similarity.FEATURE_FIELDS.intersection(update_fields):
+        return
+    # Queued in the save's own transaction; the worker does the refit, not the request
+    tasks.queue_similar_refresh(instance.pk)
+
+
+@receiver(pre_delete, sender=Destination)
+def remember_similar_holders(sender, instance, **kwargs):
+    # The cascade removes the rows pointing at this destination, so note
+    # whose lists need refilling before they disappear
+    instance._similar_holders = list(
+        SimilarDestination.objects.filter(similar_id=instance.pk).values_list('destination_id', flat=True)
+    )
+
+
+@receiver(post_save, sender=Destination)
+def build_image_derivatives(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    if not instance.main_image:
+        if instance.image_variants:
+            instance.image_variants = {}
+            Destination.objects.filter(pk=instance.pk).update(image_variants={})
+        return
+    if not variants_are_current(instance):
+        # Resizing runs in the jobs worker; the original is served until then
+        tasks.queue_image_derivatives(instance.pk)
+
+
+@receiver(post_delete, sender=Destination)
+def destination_deleted(sender, instance, **kwargs):
+    op = ['-d', instance.pk]
+    pk = instance.pk
+    transaction.on_commit(lambda: autocomplete.record(op))
+    transaction.on_commit(invalidate_catalog_facets)
+    transaction.on_commit(lambda: geo.update_point(pk, None, None))
+    tasks.queue_similar_refresh(pk, getattr(instance, '_similar_holders', []))
+    groups = ['trending', 'featured'] if instance.is_featured else ['trending']
+    transaction.on_commit(lambda: invalidate_responses(*groups))
+
+
+@receiver(post_save, sender=Category)
+def category_saved(sender, instance, **kwargs):
+    op = ['c', instance.pk, instance.name]
+    transaction.on_commit(lambda: autocomplete.record(op))
+    transaction.on_commit(invalidate_catalog_facets)
+    # Featured and trending destinations embed their category's name and icon
+    transaction.on_commit(lambda: invalidate_responses('categories', 'featured', 'trending'))
+
+
+@receiver(post_delete, sender=Category)
+def category_deleted(sender, instance, **kwargs):
+    op = ['-c', instance.pk]
+    transaction.on_commit(lambda: autocomplete.record(op))
+    transaction.on_commit(invalidate_catalog_facets)
+    transaction.on_commit(lambda: invalidate_responses('categories', 'featured', 'trending'))
+
+
+# Popularity events. Senders are given lazily so this app does not import
+# the bookings, favorites or reviews models.
+
+@receiver(post_save, sender='bookings.Booking')
+def booking_created(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        popularity.record_event(instance.destination_id, 'booking')
+
+
+@receiver(post_save, sender='favorites.Favorite')
+def favorite_added(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        popularity.record_event(instance.destination_id, 'favorite')
+
+
+@receiver(post_delete, sender='favorites.Favorite')
+def favorite_removed(sender, instance, origin=None, **kwargs):
+    # Only an explicit unfavorite counts; favorites swept away with their
+    # user or destination are not a signal about the destination
+    if origin is instance:
+        popularity.record_event(instance.destination_id, 'unfavorite')
+
+
+@receiver(post_save, sender='reviews.Review')
+def review_created(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        popularity.record_event(instance.destination_id, 'review')
@@ -0,0 +1,351 @@
+"""
+Content-based "similar destinations".
+
+Each destination becomes a sparse TF-IDF vector over the words of its name
+and descriptions, plus attribute tokens for its category, difficulty,
+duration band and price band. Neighbours by cosine similarity are computed
+in batch and stored as SimilarDestination rows, so serving them is one
+indexed query. Saving a destination queues a job (destinations.tasks) that
+updates its own list and the lists of the destinations it now appears in
+(or drops out of), so only the jobs worker ever fits a model.
+
+Vectors are packed arrays of term ids and weights rather than a NumPy
+matrix, which keeps the engine free of compiled dependencies.
+"""
+import heapq
+import math
+import threading
+import time
+from array import array
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .facets import DURATION_BUCKETS, PRICE_BUCKETS
+from .search import tokenize
+
+# Destination columns a vector is built from, in the order rows are passed around
+ROW_FIELDS = (
+    'id', 'name', 'short_description', 'long_description',
+    'category_id', 'difficulty', 'duration_days', 'price_per_person',
+)
+FEATURE_FIELDS = frozenset(ROW_FIELDS[1:]) | {'category'}
+
+SIMILARITY_VERSION_KEY = 'destinations:similarity:version'
+
+# How much one occurrence of a word counts, by field
+FIELD_WEIGHTS = {'name': 3.0, 'short_description': 2.0, 'long_description': 1.0}
+# Weight of each attribute token relative to a word seen once
+ATTRIBUTE_WEIGHTS = {'category': 3.0, 'difficulty': 1.5, 'duration': 1.5, 'price': 1.5}
+
+# Words kept per destination, highest TF-IDF first; attribute tokens are always kept
+MAX_WORDS = 32
+# Batch candidate generation: a destination's heaviest terms, and for each
+# term only the destinations weighing it most, propose the candidates that
+# are then scored exactly
+CANDIDATE_TERMS = 12
+POSTING_HEAD = 48
+CANDIDATES = 40
+# Destinations checked for whether a changed destination enters their list
+REVERSE_CANDIDATES = 100
+
+STOP_WORDS = frozenset("""
+    a an and are as at be by for from has have in into is it its of on or our
+    the their this to was were will with you your all any can more most over
+    than that these those through up very what when where which while who
+    day days tour trip travel experience
+""".split())
+
+
+def neighbour_count():
+    return getattr(settings, 'SIMILAR_DESTINATIONS_COUNT', 10)
+
+
+def _bucket(value, buckets):
+    for position, (label, lower, upper) in enumerate(buckets):
+        if (lower is None or value >= lower) and (upper is None or value < upper):
+            return position
+    return None
+
+
+class SimilarityModel:
+    """TF-IDF vectors for every destination plus an inverted index over them."""
+
+    def __init__(self):
+        self._term_ids = {}
+        self._df = array('l')
+        self._attribute_terms = set()
+        self._vectors = {}
+        self._postings = None
+        self._documents = 0
+
+    def __len__(self):
+        return len(self._vectors)
+
+    def __contains__(self, pk):
+        return pk in self._vectors
+
+    # Vectorizing
+
+    def _term(self, token, attribute=False):
+        term = self._term_ids.get(token)
+        if term is None:
+            term = self._term_ids[token] = len(self._df)
+            self._df.append(0)
+            if attribute:
+                self._attribute_terms.add(term)
+        return term
+
+    def _counts(self, row):
+        """Raw weighted term counts for one row of ROW_FIELDS."""
+        pk, name, short_description, long_description, category_id, difficulty, duration, price = row
+        counts = defaultdict(float)
+        for field, text in (
+            ('name', name), ('short_description', short_description), ('long_description', long_description)
+        ):
+            weight = FIELD_WEIGHTS[field]
+            for word in tokenize(text or ''):
+                if len(word) > 2 and word not in STOP_WORDS and not word.isdigit():
+                    counts[self._term(word)] += weight
+        # Sublinear term frequency, so a word repeated in a long description
+        # does not drown out the rest
+        counts = {term: 1 + math.log(count) if count > 1 else count for term, count in counts.items()}
+        attributes = {
+            'category': category_id,
+            'difficulty': difficulty,
+            'duration': _bucket(duration, DURATION_BUCKETS) if duration is not None else None,
+            'price': _bucket(price, PRICE_BUCKETS) if price is not None else None,
+        }
+        for attribute, value in attributes.items():
+            if value is not None:
+                counts[self._term(f'{attribute}={value}', attribute=True)] = ATTRIBUTE_WEIGHTS[attribute]
+        return counts
+
+    def _idf(self, term):
+        return math.log((1 + self._documents) / (1 + self._df[term])) + 1
+
+    def _vectorize(self, terms, counts):
+        weighted = [(count * self._idf(term), term) for term, count in zip(terms, counts)]
+        words = heapq.nlargest(MAX_WORDS, (item for item in weighted if item[1] not in self._attribute_terms))
+        kept = words + [item for item in weighted if item[1] in self._attribute_terms]
+        kept.sort(reverse=True)
+        norm = math.sqrt(sum(weight * weight for weight, _ in kept)) or 1.0
+        return array('l', [term for _, term in kept]), array('f', [weight / norm for weight, _ in kept])
+
+    def fit(self, rows):
+        """Build vectors for every row; document frequencies come from these rows only."""
+        # Counts are held as packed arrays until document frequencies are known
+        counts = {}
+        for row in rows:
+            row_counts = self._counts(row)
+            counts[row[0]] = (array('l', row_counts), array('f', row_counts.values()))
+            for term in row_counts:
+                self._df[term] += 1
+        self._documents = len(counts)
+        for pk in list(counts):
+            self._vectors[pk] = self._vectorize(*counts.pop(pk))
+        self._postings = None
+        return self
+
+    # Scoring
+
+    def _get_postings(self):
+        if self._postings is None:
+            postings = defaultdict(lambda: (array('l'), array('f')))
+            for pk, (terms, weights) in self._vectors.items():
+                for term, weight in zip(terms, weights):
+                    ids, term_weights = postings[term]
+                    ids.append(pk)
+                    term_weights.append(weight)
+            self._postings = postings
+        return self._postings
+
+    def scores(self, pk):
+        """Exact cosine similarity of ``pk`` with every destination sharing a term."""
+        postings = self._get_postings()
+        terms, weights = self._vectors[pk]
+        scores = defaultdict(float)
+        for term, weight in zip(terms, weights):
+            ids, term_weights = postings.get(term, ((), ()))
+            for other, other_weight in zip(ids, term_weights):
+                scores[other] += weight * other_weight
+        scores.pop(pk, None)
+        return scores
+
+    def neighbours(self, pk, k):
+        scores = self.scores(pk)
+        return [(score, other) for other, score in _top(scores, k)]
+
+    def all_neighbours(self, k):
+        """
+        Yield ``(pk, [(score, neighbour), ...])`` for every destination.
+
+        Scoring every pair is quadratic, so candidates come from truncated
+        postings of each destination's heaviest terms and only those
+        candidates are scored exactly.
+        """
+        heads = {
+            term: heapq.nlargest(POSTING_HEAD, zip(term_weights, ids))
+            for term, (ids, term_weights) in self._get_postings().items()
+        }
+        vectors = self._vectors
+        for pk, (terms, weights) in vectors.items():
+            partial = defaultdict(float)
+            for term, weight in zip(terms[:CANDIDATE_TERMS], weights[:CANDIDATE_TERMS]):
+                for other_weight, other in heads[term]:
+                    partial[other] += weight * other_weight
+            partial.pop(pk, None)
+            query = dict(zip(terms, weights))
+            scored = {}
+            for other in heapq.nlargest(CANDIDATES, partial, key=partial.get):
+                other_terms, other_weights = vectors[other]
+                scored[other] = sum(
+                    weight * query.get(term, 0.0) for term, weight in zip(other_terms, other_weights)
+                )
+            yield pk, [(score, other) for other, score in _top(scored, k)]
+
+    # Incremental changes
+
+    def update(self, pk, row):
+        """
+        Replace (or with ``row=None`` remove) one destination's vector.
+
+        Document frequencies stay as they were at the last full rebuild, so
+        one save never reweights every other vector.
+        """
+        postings = self._get_postings()
+        old = self._vectors.pop(pk, None)
+        if old is not None:
+            for term in old[0]:
+                ids, term_weights = postings[term]
+                position = ids.index(pk)
+                for column in (ids, term_weights):
+                    column[position] = column[-1]
+                    column.pop()
+        if row is None:
+            return
+        row_counts = self._counts(row)
+        vector = self._vectorize(row_counts.keys(), row_counts.values())
+        self._vectors[pk] = vector
+        for term, weight in zip(*vector):
+            ids, term_weights = postings[term]
+            ids.append(pk)
+            term_weights.append(weight)
+
+
+def _top(scores, k):
+    best = heapq.nlargest(k, scores.items(), key=lambda item: (item[1], -item[0]))
+    return [(other, score) for other, score in best if score > 0]
+
+
+def _rows(queryset):
+    return queryset.values_list(*ROW_FIELDS).iterator(chunk_size=2000)
+
+
+def _write(lists, k, batch_size=2000, replace_all=False):
+    """Store neighbour lists, replacing whatever the affected destinations had."""
+    from .models import SimilarDestination
+
+    with transaction.atomic():
+        if replace_all:
+            SimilarDestination.objects.all().delete()
+        else:
+            SimilarDestination.objects.filter(destination_id__in=[pk for pk, _ in lists]).delete()
+        batch = []
+        for pk, neighbours in lists:
+            batch.extend(
+                SimilarDestination(destination_id=pk, similar_id=other, score=round(score, 6), rank=rank)
+                for rank, (score, other) in enumerate(neighbours[:k])
+            )
+            if len(batch) >= batch_size:
+                SimilarDestination.objects.bulk_create(batch)
+                batch = []
+        if batch:
+            SimilarDestination.objects.bulk_create(batch)
+
+
+def rebuild(k=None, batch_size=2000):
+    """Recompute and store the neighbours of every destination."""
+    from .models import Destination
+
+    k = k or neighbour_count()
+    model = SimilarityModel().fit(_rows(Destination.objects.all()))
+    lists = model.all_neighbours(k)
+    _write(lists, k, batch_size=batch_size, replace_all=True)
+    with _lock:
+        _state['model'] = model
+        _state['version'] = _bump_version()
+    return model
+
+
+# Process-wide model, kept for incremental updates
+
+_lock = threading.Lock()
+_state = {'model': None, 'version': None}
+
+
+def _bump_version():
+    version = time.time_ns()
+    cache.set(SIMILARITY_VERSION_KEY, version, None)
+    return version
+
+
+def invalidate_model():
+    """Make every worker refit its model, e.g. after a bulk import."""
+    with _lock:
+        _state['model'] = None
+        _bump_version()
+
+
+def _get_model():
+    # Caller holds _lock. Another worker's update means ours is stale.
+    from .models import Destination
+
+    version = cache.get_or_set(SIMILARITY_VERSION_KEY, time.time_ns, None)
+    if _state['model'] is None or version != _state['version']:
+        _state['model'] = SimilarityModel().fit(_rows(Destination.objects.all()))
+        _state['version'] = version
+    return _state['model']
+
+
+def refresh_destination(pk, previous_holders=None):
+    """
+    Bring stored neighbour lists up to date after destination ``pk`` changed.
+
+    Recomputes its own list, the lists that contained it, and the lists it
+    now scores high enough to enter. ``previous_holders`` is passed for a
+    deleted destination, whose rows are already gone.
+    """
+    from .models import Destination, SimilarDestination
+
+    k = neighbour_count()
+    row = Destination.objects.filter(pk=pk).values_list(*ROW_FIELDS).first()
+    if previous_holders is None:
+        previous_holders = SimilarDestination.objects.filter(similar_id=pk).values_list('destination_id', flat=True)
+    affected = set(previous_holders)
+
+    with _lock:
+        model = _get_model()
+        model.update(pk, row)
+        if row is not None:
+            scores = model.scores(pk)
+            candidates = [other for other, _ in _top(scores, REVERSE_CANDIDATES)]
+            # Similarity is symmetric, so a candidate's score against pk is
+            # what pk would score in the candidate's own list
+            lowest = dict(
+                SimilarDestination.objects.filter(destination_id__in=candidates, rank=k - 1)
+                .values_list('destination_id', 'score')
+            )
+            affected.update(other for other in candidates if scores[other] > lowest.get(other, 0.0))
+            affected.add(pk)
+        affected.discard(None)
+        lists = [(other, model.neighbours(other, k)) for other in affected if other in model]
+        _state['version'] = _bump_version()
+
+    if row is None:
+        # Lists of destinations that are gone themselves are dropped by the cascade
+        lists = [(other, neighbours) for other, neighbours in lists if other != pk]
+    _write(lists, k)
+    return len(lists)
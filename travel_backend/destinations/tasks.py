@@ -0,0 +1,48 @@
+"""
+Background work that follows a destination change, run by the jobs worker.
+
+Refreshing similar destinations may refit the TF-IDF model over the whole
+catalog, which takes seconds on a large one, and resizing an uploaded
+image is CPU-bound Pillow work, so a save only queues them. The worker
+keeps its model warm between jobs. Every handler may run more than once
+for the same destination, and each overwrites its result.
+"""
+from jobs.queue import enqueue, register_task
+
+from . import similarity
+from .images import generate_derivatives, variants_are_current
+from .models import Destination
+
+REFRESH_SIMILAR = 'destinations.refresh_similar'
+BUILD_IMAGE_DERIVATIVES = 'destinations.build_image_derivatives'
+
+
+def queue_similar_refresh(pk, previous_holders=None):
+    """Queue a refresh of the neighbour lists ``pk`` affects, in the caller's transaction."""
+    payload = {'pk': pk}
+    if previous_holders is not None:
+        payload['previous_holders'] = list(previous_holders)
+    enqueue(REFRESH_SIMILAR, payload)
+
+
+def queue_image_derivatives(pk):
+    """Queue building the resized variants of ``pk``'s image, in the caller's transaction."""
+    enqueue(BUILD_IMAGE_DERIVATIVES, {'pk': pk})
+
+
+@register_task(REFRESH_SIMILAR)
+def refresh_similar(pk, previous_holders=None):
+    # A failure raises and the worker retries it; rebuild_similar_destinations
+    # corrects anything left stale by a job that went dead
+    similarity.refresh_destination(pk, previous_holders)
+
+
+@register_task(BUILD_IMAGE_DERIVATIVES)
+def build_image_derivatives(pk):
+    destination = Destination.objects.filter(pk=pk).only('main_image', 'image_variants').first()
+    if destination is None or not destination.main_image or variants_are_current(destination):
+        return
+    variants = generate_derivatives(destination.main_image.name)
+    # Only record them if the image was not replaced while they were built;
+    # a queryset update keeps this from re-entering the save signals
+    Destination.objects.filter(pk=pk, main_image=destination.main_image.name).update(image_variants=variants)
@@ -1,3 +1,672 @@
-from django.test import TestCase
+import json
+import os
+import tempfile
+from datetime import timedelta
+from io import BytesIO, StringIO
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from jobs.models import Job
+from jobs.queue import claim, run_job
+from PIL import Image
+
+from . import autocomplete, geo, popularity, similarity, tasks
+from .cache import invalidate_responses
+from .facets import catalog_facets, compute_facets, parse_facets
+from .models import Category, Destination, DestinationPopularity, PopularityEvent, SimilarDestination
+from .search import full_text_search_available
+
+User = get_user_model()
+
+
+class DestinationQueryCountTests(TestCase):
+    """Listing destinations must cost the same number of queries at any page size"""
+
+    @classmethod
+    def setUpTestData(cls):
+        categories = [
+            Category.objects.create(name=name, icon=name.lower())
+            for name in ['Beach', 'City', 'Mountain']
+        ]
+        for i in range(25):
+            Destination.objects.create(
+                name=f'Destination {i}',
+                city=f'City {i}',
+                country='Country',
+                category=categories[i % len(categories)],
+                short_description='A short description',
+                long_description='A long description',
+                price_per_person=100 + i,
+                duration_days=3,
+                is_featured=i < 6,
+            )
+
+    def setUp(self):
+        cache.clear()
+        # Probe the search index once so it does not count against a test
+        full_text_search_available()
+
+    def assertConstantQueries(self, url, sizes, expected):
+        for size in sizes:
+            with self.subTest(page_size=size), self.assertNumQueries(expected):
+                response = self.client.get(url, {'page_size': size})
+            self.assertEqual(response.status_code, 200)
+
+    def test_list_query_count_is_independent_of_page_size(self):
+        self.assertConstantQueries(reverse('destination-list'), [1, 5, 20], 1)
+
+    def test_filtered_list_query_count_is_independent_of_page_size(self):
+        url = reverse('destination-list') + '?category=beach'
+        self.assertConstantQueries(url, [1, 5], 1)
+
+    def test_search_query_count(self):
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('search-destinations'), {'q': 'destination'})
+        self.assertEqual(len(response.json()['results']), 10)
+
+    def test_featured_query_count(self):
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('featured-destinations'))
+        self.assertEqual(len(response.json()), 6)
+
+    def test_serialized_image_urls_use_fallbacks(self):
+        response = self.client.get(reverse('destination-list'), {'page_size': 3})
+        for destination in response.json()['results']:
+            self.assertTrue(destination['main_image_url'].startswith('https://images.unsplash.com/'))
+            self.assertEqual(destination['image_url'], destination['main_image_url'])
+
+
+class DestinationFacetCacheTests(TestCase):
+    """Facet counts of a filtered list must not be cached as the whole catalog's"""
+
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(name='City', icon='city')
+        for name, country, lat, lon in [('Paris', 'France', 48.8566, 2.3522), ('Tokyo', 'Japan', 35.6762, 139.6503)]:
+            Destination.objects.create(
+                name=name, city=name, country=country, category=category,
+                short_description='A short description', long_description='A long description',
+                price_per_person=100, duration_days=3, latitude=lat, longitude=lon,
+            )
+
+    def setUp(self):
+        cache.clear()
+        geo.invalidate()
+
+    def test_near_request_does_not_poison_catalog_facets(self):
+        url = reverse('destination-list')
+        near = self.client.get(url, {'near': '48.85,2.35', 'radius': 50, 'facets': 'country'}).json()
+        self.assertEqual([entry['label'] for entry in near['facets']['country']], ['France'])
+
+        catalog = self.client.get(url, {'facets': 'country'}).json()
+        self.assertEqual(len(catalog['results']), 2)
+        self.assertEqual(
+            sorted((entry['label'], entry['count']) for entry in catalog['facets']['country']),
+            [('France', 1), ('Japan', 1)],
+        )
+
+
+class FacetCountTests(TestCase):
+    """Facet counts come from one grouped query and the catalog's follow every change"""
+
+    @classmethod
+    def setUpTestData(cls):
+        beach = Category.objects.create(name='Beach', icon='beach')
+        city = Category.objects.create(name='City', icon='city')
+        for name, category, country, price, days in [
+            ('Bali', beach, 'Indonesia', 450, 3),
+            ('Lombok', beach, 'Indonesia', 500, 7),
+            ('Jakarta', city, 'Indonesia', 1500, 10),
+            ('Paris', city, 'France', 2500, 20),
+        ]:
+            Destination.objects.create(
+                name=name, city=name, country=country, category=category,
+                short_description='A short description', long_description='A long description',
+                price_per_person=price, duration_days=days,
+            )
+
+    def setUp(self):
+        cache.clear()
+
+    def counts(self, facets, name):
+        return [(entry['label'], entry['count']) for entry in facets[name]]
+
+    def test_every_facet_is_counted_in_one_query(self):
+        with self.assertNumQueries(1):
+            facets = compute_facets(Destination.objects.all(), parse_facets('country,price,duration,category,bogus'))
+        self.assertEqual(list(facets), ['country', 'price', 'duration', 'category'])
+        self.assertEqual(self.counts(facets, 'country'), [('Indonesia', 3), ('France', 1)])
+        self.assertEqual(self.counts(facets, 'category'), [('Beach', 2), ('City', 2)])
+        # Bucket bounds are inclusive below and exclusive above
+        self.assertEqual(
+            self.counts(facets, 'price'),
+            [('$1,000 - $2,000', 1), ('$2,000 - $5,000', 1), ('$500 - $1,000', 1), ('Under $500', 1)],
+        )
+        self.assertEqual(
+            self.counts(facets, 'duration'),
+            [('1-3 days', 1), ('15+ days', 1), ('4-7 days', 1), ('8-14 days', 1)],
+        )
+
+    def test_filtered_list_counts_its_own_results(self):
+        data = self.client.get(reverse('destination-list'), {'category': 'beach', 'facets': 'country,category'}).json()
+        self.assertEqual(self.counts(data['facets'], 'country'), [('Indonesia', 2)])
+        self.assertEqual(self.counts(data['facets'], 'category'), [('Beach', 2)])
+
+    def test_catalog_counts_are_cached_until_a_destination_changes(self):
+        self.assertEqual(self.counts(catalog_facets(Destination.objects.all(), ('country',)), 'country')[0], ('Indonesia', 3))
+        with self.assertNumQueries(0):
+            catalog_facets(Destination.objects.all(), ('country',))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Destination.objects.get(name='Paris').delete()
+        facets = catalog_facets(Destination.objects.all(), ('country',))
+        self.assertEqual(self.counts(facets, 'country'), [('Indonesia', 3)])
+        with self.captureOnCommitCallbacks(execute=True):
+            Destination.objects.filter(name='Bali').first().save()
+        with self.assertNumQueries(1):
+            catalog_facets(Destination.objects.all(), ('country',))
+
+
+class ResponseCacheTests(TestCase):
+    """Cached responses are dropped by their own groups' changes and no others"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.category = Category.objects.create(name='Beach', icon='beach')
+        cls.featured, cls.plain = [
+            Destination.objects.create(
+                name=name, city=name, country='Country', category=cls.category,
+                short_description='A short description', long_description='A long description',
+                price_per_person=100, duration_days=3, is_featured=is_featured,
+            )
+            for name, is_featured in [('Featured', True), ('Plain', False)]
+        ]
+
+    def setUp(self):
+        cache.clear()
+
+    def get(self, name, **params):
+        response = self.client.get(reverse(name), params)
+        self.assertEqual(response.status_code, 200)
+        return response['X-Cache']
+
+    def test_second_request_is_served_from_the_cache(self):
+        self.assertEqual(self.get('destination-categories'), 'MISS')
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('destination-categories'))
+        self.assertEqual(response['X-Cache'], 'HIT')
+        self.assertEqual([category['name'] for category in response.json()], ['Beach'])
+        # The query string is part of the key
+        self.assertEqual(self.get('trending-destinations', limit=5), 'MISS')
+        self.assertEqual(self.get('trending-destinations', limit=6), 'MISS')
+        self.assertEqual(self.get('trending-destinations', limit=5), 'HIT')
+
+    def test_invalidation_is_per_group(self):
+        for name in ('destination-categories', 'featured-destinations', 'trending-destinations'):
+            self.get(name)
+        invalidate_responses('featured')
+        self.assertEqual(self.get('featured-destinations'), 'MISS')
+        self.assertEqual(self.get('destination-categories'), 'HIT')
+        self.assertEqual(self.get('trending-destinations'), 'HIT')
+
+    def test_saves_invalidate_the_groups_they_affect(self):
+        for name in ('destination-categories', 'featured-destinations', 'trending-destinations'):
+            self.get(name)
+        # A destination that is not featured leaves the featured response alone
+        with self.captureOnCommitCallbacks(execute=True):
+            self.plain.save()
+        self.assertEqual(self.get('featured-destinations'), 'HIT')
+        self.assertEqual(self.get('trending-destinations'), 'MISS')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.featured.is_featured = False
+            self.featured.save()
+        self.assertEqual(self.client.get(reverse('featured-destinations')).json(), [])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.category.name = 'Coast'
+            self.category.save()
+        response = self.client.get(reverse('destination-categories'))
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual([category['name'] for category in response.json()], ['Coast'])
+
+    def test_browsable_api_is_not_cached(self):
+        response = self.client.get(reverse('destination-categories'), HTTP_ACCEPT='text/html')
+        self.assertNotIn('X-Cache', response)
+        self.assertEqual(self.get('destination-categories'), 'MISS')
+
+
+class GeoIndexNearestTests(SimpleTestCase):
+    def test_fewer_points_than_k_come_back_once_each(self):
+        index = geo.GeoIndex()
+        for pk, lat, lon in [(1, 48.8566, 2.3522), (2, 35.6762, 139.6503), (3, -33.8688, 151.2093)]:
+            index.add(pk, lat, lon)
+        self.assertEqual([pk for _, pk in index.nearest(40.7128, -74.0060, k=10)], [1, 2, 3])
+        self.assertEqual([pk for _, pk in index.nearest(40.7128, -74.0060, k=2)], [1, 2])
+        self.assertEqual(index.nearest(40.7128, -74.0060, k=10, max_radius_km=1000), [])
+
+
+class SimilarRefreshJobTests(TestCase):
+    """Saving a destination queues its similarity refresh instead of running it"""
+
+    def setUp(self):
+        cache.clear()
+        similarity.invalidate_model()
+        self.category = Category.objects.create(name='Beach', icon='beach')
+
+    def create(self, name):
+        return Destination.objects.create(
+            name=name, city=name, country='Country', category=self.category,
+            short_description='Sandy beach with clear water', long_description='Snorkelling and sailing',
+            price_per_person=100, duration_days=5,
+        )
+
+    def run_jobs(self):
+        return [run_job(job) for job in claim(limit=100)]
+
+    def test_save_queues_and_worker_refreshes(self):
+        first, second = self.create('Palm Cove'), self.create('Coral Bay')
+        self.assertEqual(Job.objects.filter(task=tasks.REFRESH_SIMILAR).count(), 2)
+        self.assertFalse(SimilarDestination.objects.exists())
+
+        self.assertEqual(self.run_jobs(), [Job.SUCCEEDED, Job.SUCCEEDED])
+        self.assertEqual(list(first.similar_entries.values_list('similar_id', flat=True)), [second.pk])
+
+        second.delete()
+        self.assertEqual(self.run_jobs(), [Job.SUCCEEDED])
+        self.assertFalse(SimilarDestination.objects.exists())
+
+
+class ImageDerivativeJobTests(TestCase):
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        settings = override_settings(MEDIA_ROOT=media.name)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def test_upload_is_resized_by_the_worker_with_a_white_background(self):
+        # A transparent image with one opaque red pixel
+        image = Image.new('RGBA', (400, 200), (0, 0, 0, 0))
+        image.putpixel((0, 0), (255, 0, 0, 255))
+        upload = BytesIO()
+        image.save(upload, 'PNG')
+
+        destination = Destination(
+            name='Lagoon', city='Lagoon', country='Country',
+            category=Category.objects.create(name='Beach', icon='beach'),
+            short_description='A short description', long_description='A long description',
+            price_per_person=100, duration_days=5,
+        )
+        destination.main_image.save('lagoon.png', ContentFile(upload.getvalue()))
+        destination.refresh_from_db()
+        self.assertEqual(destination.image_variants, {})
+        self.assertTrue(Job.objects.filter(task=tasks.BUILD_IMAGE_DERIVATIVES).exists())
+
+        for job in claim(limit=100):
+            self.assertEqual(run_job(job), Job.SUCCEEDED)
+        destination.refresh_from_db()
+        thumbnail = destination.image_variants['sizes']['thumbnail']
+        self.assertEqual((thumbnail['width'], thumbnail['height']), (320, 160))
+        with default_storage.open(thumbnail['jpeg']) as jpeg:
+            corner = Image.open(jpeg).convert('RGB').getpixel((319, 159))
+        self.assertTrue(all(channel > 245 for channel in corner))
+
+
+class ImportDestinationsTests(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        # The import rebuilds the autocomplete snapshot; keep it out of the source tree
+        settings = override_settings(AUTOCOMPLETE_SNAPSHOT_DIR=os.path.join(self.directory, 'autocomplete'))
+        settings.enable()
+        self.addCleanup(settings.disable)
+        Category.objects.create(name='Beach', icon='beach')
+
+    def import_lines(self, lines):
+        path = os.path.join(self.directory, 'destinations.jsonl')
+        with open(path, 'w') as feed:
+            feed.write('\n'.join(lines) + '\n')
+        output, errors = StringIO(), StringIO()
+        call_command('import_destinations', path, stdout=output, stderr=errors)
+        return output.getvalue(), errors.getvalue()
+
+    def row(self, **values):
+        row = {
+            'name': 'Palm Cove', 'city': 'Cairns', 'country': 'Australia', 'category': 'Beach',
+            'price_per_person': '120', 'duration_days': '4',
+        }
+        row.update(values)
+        return json.dumps(row)
+
+    def test_jsonl_lines_that_are_not_objects_are_skipped(self):
+        _, errors = self.import_lines(['[1, 2]', '42', '"text"', self.row()])
+        self.assertEqual(list(Destination.objects.values_list('name', flat=True)), ['Palm Cove'])
+        self.assertIn('Line 1: expected an object, got list', errors)
+        self.assertEqual(errors.count('expected an object'), 3)
+
+    def test_numbers_that_do_not_fit_are_rejected_per_row(self):
+        output, errors = self.import_lines([
+            self.row(name='Bad latitude', latitude='NaN'),
+            self.row(name='Bad price', price_per_person='NaN'),
+            self.row(name='Huge price', price_per_person='123456789012'),
+            self.row(name='Fine price', price_per_person='12.345'),
+            self.row(name='Negative price', price_per_person='-5'),
+            self.row(name='Long trip', duration_days='99999999999'),
+            self.row(name='Far north', latitude='91'),
+            self.row(name='Precise', latitude='48.856613123', longitude='2.352222456'),
+        ])
+        self.assertEqual(errors.count('Line '), 7)
+        destination = Destination.objects.get()
+        self.assertEqual(destination.name, 'Precise')
+        self.assertEqual(str(destination.latitude), '48.856613')
+        self.assertIn('Imported 1 of 8 rows', output)
+        self.assertEqual(self.client.get(reverse('destination-list')).status_code, 200)
+
+    def test_repeated_rows_count_once(self):
+        output, _ = self.import_lines([self.row(), self.row(price_per_person='130')])
+        self.assertEqual(Destination.objects.get().price_per_person, 130)
+        self.assertIn('Imported 1 of 2 rows', output)
+
+
+class AutocompleteSnapshotTests(TestCase):
+    """Workers share the index through a published snapshot plus a journal of changes"""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        settings = override_settings(AUTOCOMPLETE_SNAPSHOT_DIR=directory.name)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.directory = directory.name
+        self.new_worker()
+        self.addCleanup(self.new_worker)
+        self.category = Category.objects.create(name='Beach', icon='beach')
+        self.palm_cove = self.create('Palm Cove', 'Cairns', 'Australia')
+
+    def new_worker(self):
+        # What a freshly started worker holds: nothing loaded yet
+        autocomplete._state.update(index=None, generation=None, pointer_mtime=None, offset=0)
+
+    def create(self, name, city, country):
+        return Destination.objects.create(
+            name=name, city=city, country=country, category=self.category,
+            short_description='A short description', long_description='A long description',
+            price_per_person=100, duration_days=5,
+        )
+
+    def labels(self, query):
+        return [entry['label'] for entry in autocomplete.search(query)]
+
+    def test_first_query_publishes_a_snapshot(self):
+        self.assertEqual(self.labels('palm'), ['Palm Cove'])
+        generation = autocomplete._current_generation()
+        self.assertTrue(os.path.exists(os.path.join(self.directory, f'{generation}.snapshot')))
+        self.assertEqual(self.labels('cairn'), ['Cairns'])
+        # A typo falls back to trigram similarity
+        self.assertEqual(self.labels('palm cvoe'), ['Palm Cove'])
+
+    def test_changes_reach_other_workers_through_the_journal(self):
+        autocomplete.build_snapshot()
+        self.assertEqual(self.labels('coral'), [])
+
+        # Saved in another worker: only the journal line is shared
+        with self.captureOnCommitCallbacks(execute=True):
+            self.create('Coral Bay', 'Exmouth', 'Australia')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.palm_cove.delete()
+        self.assertEqual(self.labels('coral'), ['Coral Bay'])
+        self.assertEqual(self.labels('palm'), [])
+
+        # A worker starting now loads the snapshot and replays the same lines
+        self.new_worker()
+        self.assertEqual(self.labels('coral'), ['Coral Bay'])
+        self.assertEqual(self.labels('palm'), [])
+        self.assertEqual(self.labels('australia'), ['Australia'])
+
+    def test_rebuild_carries_the_journal_over_and_drops_old_files(self):
+        autocomplete.build_snapshot()
+        first = autocomplete._current_generation()
+        autocomplete.record(['d', 999, 'lagoon', 'Lagoon', 'Nowhere', 'Atlantis'])
+        autocomplete.build_snapshot()
+        second = autocomplete._current_generation()
+
+        self.assertNotEqual(first, second)
+        self.assertEqual(
+            sorted(os.listdir(self.directory)), sorted(['CURRENT', f'{second}.snapshot', f'{second}.journal'])
+        )
+        self.assertEqual(self.labels('lagoon'), ['Lagoon'])
+
+
+class GeoIndexVersionTests(TestCase):
+    """A worker applying its own save must not skip another worker's"""
+
+    def setUp(self):
+        cache.clear()
+        geo.invalidate()
+        category = Category.objects.create(name='City', icon='city')
+        self.paris = Destination.objects.create(
+            name='Paris', city='Paris', country='France', category=category,
+            short_description='A short description', long_description='A long description',
+            price_per_person=100, duration_days=3, latitude=48.8566, longitude=2.3522,
+        )
+
+    def test_own_update_is_applied_in_place(self):
+        index = geo.get_index()
+        geo.update_point(self.paris.pk, 35.6762, 139.6503)
+        self.assertIs(geo.get_index(), index)
+        self.assertEqual([pk for _, pk in index.nearest(35.6, 139.6, k=1)], [self.paris.pk])
+
+    def test_update_after_another_workers_change_rebuilds(self):
+        geo.get_index()
+        # Another worker moved Paris (committed) and bumped the version
+        Destination.objects.filter(pk=self.paris.pk).update(latitude=-33.8688, longitude=151.2093)
+        cache.incr(geo.GEO_VERSION_KEY)
+        geo.update_point(12345, 0, 0)
+        self.assertIsNone(geo._state['index'])
+        self.assertEqual([pk for _, pk in geo.get_index().nearest(-33.8, 151.2, k=1)], [self.paris.pk])
+
+    def test_nearby_rejects_a_bad_limit(self):
+        response = self.client.get(reverse('nearby-destinations'), {'lat': 48.8, 'lon': 2.3, 'limit': 'abc'})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'error': 'Limit must be a whole number from 1 to 50'})
+
+
+class FullTextSearchTests(TestCase):
+    """Search ranks name hits first and falls back to substring matching without an index"""
+
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(name='City', icon='city')
+        for name, country, description in [
+            ('Lisbon', 'Portugal', 'Trams and pastries'),
+            ('Évora', 'Portugal', 'Roman temple'),
+            ('Porto', 'Portugal', 'A short trip from Lisbon'),
+        ]:
+            Destination.objects.create(
+                name=name, city=name, country=country, category=category,
+                short_description=description, long_description='A long description',
+                price_per_person=100, duration_days=3,
+            )
+
+    def setUp(self):
+        cache.clear()
+
+    def names(self, query):
+        response = self.client.get(reverse('search-destinations'), {'q': query})
+        self.assertEqual(response.status_code, 200)
+        return [destination['name'] for destination in response.json()['results']]
+
+    def test_name_hits_rank_above_description_hits(self):
+        self.assertTrue(full_text_search_available())
+        # Porto is newer, so only the ranking puts Lisbon first
+        self.assertEqual(self.names('lisbon'), ['Lisbon', 'Porto'])
+
+    def test_every_term_must_match_and_the_last_may_be_a_prefix(self):
+        self.assertEqual(self.names('lis'), ['Lisbon', 'Porto'])
+        self.assertEqual(self.names('trams lis'), ['Lisbon'])
+        self.assertEqual(self.names('trams porto'), [])
+        self.assertEqual(self.names('evora'), ['Évora'])
+        self.assertEqual(self.names('!!!'), [])
+
+    def test_index_follows_saves_and_deletes(self):
+        porto = Destination.objects.get(name='Porto')
+        porto.short_description = 'Port wine cellars'
+        porto.save()
+        self.assertEqual(self.names('lisbon'), ['Lisbon'])
+        self.assertEqual(self.names('cellars'), ['Porto'])
+        Destination.objects.filter(name='Lisbon').update(name='Lisboa')
+        self.assertEqual(self.names('lisboa'), ['Lisboa'])
+        Destination.objects.filter(name='Lisboa').delete()
+        self.assertEqual(self.names('trams'), [])
+
+    @override_settings(DESTINATION_FULL_TEXT_SEARCH=False)
+    def test_fallback_matches_substrings_newest_first(self):
+        self.assertFalse(full_text_search_available())
+        self.assertEqual(self.names('lisbon'), ['Porto', 'Lisbon'])
+        self.assertEqual(self.names('trams lis'), [])
+        self.assertEqual(self.names('rto'), ['Porto'])
+
+
+class KeysetPaginationTests(TestCase):
+    """Lists page by cursor; only staff may ask for page numbers"""
+
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(name='City', icon='city')
+        cls.destinations = [
+            Destination.objects.create(
+                name=f'Destination {i}', city='City', country='Country', category=category,
+                short_description='A short description', long_description='A long description',
+                price_per_person=100, duration_days=3,
+            )
+            for i in range(7)
+        ]
+        cls.staff = User.objects.create_user(username='staff', email='staff@example.com', password='password', is_staff=True)
+        cls.traveler = User.objects.create_user(username='traveler', email='traveler@example.com', password='password')
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def walk(self, **params):
+        ids, url, params = [], reverse('destination-list'), {'page_size': 3, **params}
+        while url:
+            data = self.client.get(url, params).json()
+            self.assertNotIn('count', data)
+            ids.extend(destination['id'] for destination in data['results'])
+            url, params = data['next'], None
+        return ids
+
+    def test_cursor_walks_every_destination_once_newest_first(self):
+        self.assertEqual(self.walk(), [destination.pk for destination in reversed(self.destinations)])
+
+    def test_equal_timestamps_are_ordered_by_id(self):
+        Destination.objects.update(created_at=self.destinations[0].created_at)
+        self.assertEqual(self.walk(), sorted((destination.pk for destination in self.destinations), reverse=True))
+
+    def test_offset_pagination_is_for_staff(self):
+        params = {'pagination': 'offset', 'page': 2, 'page_size': 3}
+        self.assertNotIn('count', self.client.get(reverse('destination-list'), params).json())
+        self.client.force_authenticate(self.traveler)
+        self.assertNotIn('count', self.client.get(reverse('destination-list'), params).json())
+
+        self.client.force_authenticate(self.staff)
+        data = self.client.get(reverse('destination-list'), params).json()
+        self.assertEqual(data['count'], 7)
+        self.assertEqual(
+            [destination['id'] for destination in data['results']],
+            [destination.pk for destination in reversed(self.destinations[1:4])],
+        )
+
+    def test_ranked_search_results_use_page_numbers(self):
+        data = self.client.get(reverse('destination-list'), {'search': 'destination', 'page_size': 3}).json()
+        self.assertEqual(data['count'], 7)
+        self.assertIn('page=2', data['next'])
+
+
+@override_settings(TRENDING_HALF_LIFE_HOURS=72)
+class PopularityDecayTests(TestCase):
+    """Popularity halves every half-life, and compaction folds events into one score per destination"""
+
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(name='Beach', icon='beach')
+        cls.older, cls.newer = [
+            Destination.objects.create(
+                name=name, city=name, country='Country', category=category,
+                short_description='A short description', long_description='A long description',
+                price_per_person=100, duration_days=3,
+            )
+            for name in ['Older', 'Newer']
+        ]
+        cls.now = timezone.now()
+        cls.half_life = timedelta(hours=72)
+
+    def setUp(self):
+        cache.clear()
+
+    def event(self, destination, kind, age=timedelta(0)):
+        PopularityEvent.objects.create(
+            destination=destination, kind=kind, weight=popularity.EVENT_WEIGHTS[kind], created_at=self.now - age
+        )
+
+    def score(self, destination, at=None):
+        log_score = DestinationPopularity.objects.get(destination=destination).log_score
+        return popularity.current_score(log_score, now=at or self.now)
+
+    def test_scores_halve_every_half_life(self):
+        self.event(self.older, 'booking', age=self.half_life)
+        self.assertEqual(popularity.compact(now=self.now), (1, 1, 0))
+        self.assertAlmostEqual(self.score(self.older), 2.5)
+        self.assertAlmostEqual(self.score(self.older, at=self.now + self.half_life), 1.25)
+        self.assertFalse(PopularityEvent.objects.exists())
+
+    def test_compaction_adds_to_the_decayed_score(self):
+        self.event(self.older, 'booking')
+        popularity.compact(now=self.now)
+        later = self.now + self.half_life
+        PopularityEvent.objects.create(
+            destination=self.older, kind='favorite', weight=popularity.EVENT_WEIGHTS['favorite'], created_at=later
+        )
+        popularity.compact(now=later)
+        self.assertAlmostEqual(self.score(self.older, at=later), 4.5)
+
+    def test_trending_orders_by_the_current_score(self):
+        # A booking two half-lives ago (1.25) is now worth less than a fresh favorite (2)
+        self.event(self.older, 'booking', age=2 * self.half_life)
+        self.event(self.newer, 'favorite')
+        self.event(self.newer, 'favorite', age=self.half_life)
+        self.event(self.newer, 'unfavorite', age=self.half_life)
+        popularity.compact(now=self.now)
+        data = self.client.get(reverse('trending-destinations')).json()['results']
+        self.assertEqual([destination['name'] for destination in data], ['Newer', 'Older'])
+        self.assertAlmostEqual(data[0]['trending_score'], 2, places=2)
+
+    def test_decayed_scores_are_dropped(self):
+        self.event(self.older, 'favorite')
+        popularity.compact(now=self.now)
+        # 2 points are worth under MIN_SCORE ten half-lives later
+        later = self.now + 10 * self.half_life
+        PopularityEvent.objects.create(
+            destination=self.newer, kind='review', weight=popularity.EVENT_WEIGHTS['review'], created_at=later
+        )
+        self.assertEqual(popularity.compact(now=later), (1, 1, 1))
+        self.assertEqual(list(DestinationPopularity.objects.values_list('destination', flat=True)), [self.newer.pk])
+
+        # Events that cancel out never get a row
+        for kind in ('favorite', 'unfavorite'):
+            PopularityEvent.objects.create(
+                destination=self.older, kind=kind, weight=popularity.EVENT_WEIGHTS[kind], created_at=later
+            )
+        popularity.compact(now=later)
+        self.assertFalse(DestinationPopularity.objects.filter(destination=self.older).exists())
@@ -4,7 +4,11 @@ from . import views
 urlpatterns = [
     path('', views.DestinationListView.as_view(), name='destination-list'),
     path('<int:pk>/', views.DestinationDetailView.as_view(), name='destination-detail'),
+    path('<int:pk>/similar/', views.similar_destinations, name='similar-destinations'),
     path('featured/', views.featured_destinations, name='featured-destinations'),
+    path('trending/', views.trending_destinations, name='trending-destinations'),
     path('categories/', views.destination_categories, name='destination-categories'),
     path('search/', views.search_destinations, name='search-destinations'),
+    path('autocomplete/', views.autocomplete_destinations, name='autocomplete-destinations'),
+    path('nearby/', views.nearby_destinations, name='nearby-destinations'),
 ]
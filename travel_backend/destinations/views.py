@@ -1,44 +1,121 @@
+from django.db.models import F
 from rest_framework import generics, permissions, status
 from rest_framework.decorators import api_view, permission_classes
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
-from django.db.models import Q
+from . import autocomplete, geo, popularity
+from .cache import cached_response
+from .facets import catalog_facets, compute_facets, parse_facets
 from .models import Destination, Category
+from .search import search_destinations as filter_by_search
 from .serializers import DestinationSerializer, CategorySerializer
 
+# Most destinations a radius filter will pass on to the database, nearest first
+GEO_MAX_RESULTS = 5000
+DEFAULT_RADIUS_KM = 100
+MAX_RADIUS_KM = 20000
+# Query parameters that page or shape the list rather than filter it
+UNFILTERED_PARAMS = {'facets', 'page', 'page_size', 'cursor', 'pagination', 'format'}
+
+
+def parse_coordinates(lat, lon):
+    try:
+        lat, lon = float(lat), float(lon)
+    except (TypeError, ValueError):
+        raise ValueError('Expected numeric latitude and longitude')
+    if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+        raise ValueError('Coordinates out of range')
+    return lat, lon
+
+
+def parse_radius(value, default=DEFAULT_RADIUS_KM):
+    if value in (None, ''):
+        return default
+    try:
+        radius = float(value)
+    except ValueError:
+        raise ValueError('Radius must be a number of kilometres')
+    if not 0 < radius <= MAX_RADIUS_KM:
+        raise ValueError(f'Radius must be between 0 and {MAX_RADIUS_KM} km')
+    return radius
+
+
+def parse_limit(value, default, maximum):
+    if value in (None, ''):
+        return default
+    try:
+        limit = int(value)
+    except ValueError:
+        raise ValueError(f'Limit must be a whole number from 1 to {maximum}')
+    return min(max(limit, 1), maximum)
+
+
 class DestinationListView(generics.ListAPIView):
-    queryset = Destination.objects.all()
+    """
+    List destinations, optionally with facet counts for the current filter
+    GET /api/destinations/?facets=category,country,difficulty,duration,price
+    """
     serializer_class = DestinationSerializer
     permission_classes = [permissions.AllowAny]
     
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        serializer = self.get_serializer(page, many=True)
+        response = self.get_paginated_response(serializer.data)
+        
+        facets = parse_facets(request.query_params.get('facets'))
+        if facets:
+            # Only the whole catalog's counts are shared through the cache
+            filtered = any(
+                value for name, value in request.query_params.items() if name not in UNFILTERED_PARAMS
+            )
+            if filtered:
+                response.data['facets'] = compute_facets(queryset, facets)
+            else:
+                response.data['facets'] = catalog_facets(queryset, facets)
+        return response
+    
     def get_queryset(self):
-        queryset = Destination.objects.all()
+        queryset = DestinationSerializer.setup_eager_loading(Destination.objects.all())
         category = self.request.query_params.get('category', None)
         search = self.request.query_params.get('search', None)
+        near = self.request.query_params.get('near', None)
         
         if category:
             queryset = queryset.filter(category__name__icontains=category)
         
+        if near:
+            try:
+                lat, lon = parse_coordinates(*(near.split(',') + [None])[:2])
+                radius = parse_radius(self.request.query_params.get('radius'))
+            except ValueError as e:
+                raise ValidationError({'near': str(e)})
+            matches = geo.get_index().within(lat, lon, radius, limit=GEO_MAX_RESULTS)
+            queryset = queryset.filter(pk__in=[pk for _, pk in matches])
+        
         if search:
-            queryset = queryset.filter(
-                Q(name__icontains=search) | 
-                Q(city__icontains=search) | 
-                Q(country__icontains=search) |
-                Q(short_description__icontains=search)
-            )
+            # Search results come back ordered by relevance, which a
+            # created_at cursor cannot page through
+            self.offset_pagination = True
+            return filter_by_search(queryset, search)
         
         return queryset.order_by('-created_at')
 
 class DestinationDetailView(generics.RetrieveAPIView):
-    queryset = Destination.objects.all()
+    queryset = DestinationSerializer.setup_eager_loading(Destination.objects.all())
     serializer_class = DestinationSerializer
     permission_classes = [permissions.AllowAny]
 
+@cached_response('featured')
 @api_view(['GET'])
 @permission_classes([permissions.AllowAny])
 def featured_destinations(request):
     """Get featured destinations"""
     try:
-        destinations = Destination.objects.filter(is_featured=True)[:6]
+        destinations = DestinationSerializer.setup_eager_loading(
+            Destination.objects.filter(is_featured=True)
+        )[:6]
         serializer = DestinationSerializer(destinations, many=True, context={'request': request})
         return Response(serializer.data)
     except Exception as e:
@@ -48,6 +125,40 @@ def featured_destinations(request):
             status=status.HTTP_500_INTERNAL_SERVER_ERROR
         )
 
+@cached_response('trending')
+@api_view(['GET'])
+@permission_classes([permissions.AllowAny])
+def trending_destinations(request):
+    """
+    Destinations with the highest time-decayed popularity
+    GET /api/destinations/trending/?limit=10
+    """
+    try:
+        limit = min(max(int(request.GET.get('limit', 10)), 1), 20)
+    except ValueError:
+        limit = 10
+    
+    try:
+        destinations = list(
+            DestinationSerializer.setup_eager_loading(
+                Destination.objects.filter(popularity__isnull=False)
+            )
+            .annotate(popularity_log_score=F('popularity__log_score'))
+            .order_by('-popularity__log_score')[:limit]
+        )
+        serializer = DestinationSerializer(destinations, many=True, context={'request': request})
+        results = serializer.data
+        for destination, data in zip(destinations, results):
+            data['trending_score'] = round(popularity.current_score(destination.popularity_log_score), 3)
+        return Response({'results': results})
+    except Exception as e:
+        print(f"Error in trending_destinations: {str(e)}")
+        return Response(
+            {'error': 'Error fetching trending destinations'}, 
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+@cached_response('categories')
 @api_view(['GET'])
 @permission_classes([permissions.AllowAny])
 def destination_categories(request):
@@ -72,12 +183,8 @@ def search_destinations(request):
         return Response({'results': []})
     
     try:
-        destinations = Destination.objects.filter(
-            Q(name__icontains=query) | 
-            Q(city__icontains=query) | 
-            Q(country__icontains=query) |
-            Q(short_description__icontains=query)
-        )[:10]
+        queryset = DestinationSerializer.setup_eager_loading(Destination.objects.all())
+        destinations = filter_by_search(queryset, query)[:10]
         
         serializer = DestinationSerializer(destinations, many=True, context={'request': request})
         return Response({'results': serializer.data})
@@ -87,3 +194,83 @@ def search_destinations(request):
             {'error': 'Error searching destinations'}, 
             status=status.HTTP_500_INTERNAL_SERVER_ERROR
         )
+
+@api_view(['GET'])
+@permission_classes([permissions.AllowAny])
+def autocomplete_destinations(request):
+    """Suggest destinations, cities, countries and categories for a typed prefix"""
+    query = request.GET.get('q', '')
+    try:
+        limit = min(max(int(request.GET.get('limit', 8)), 1), 20)
+    except ValueError:
+        limit = 8
+    if not query.strip():
+        return Response({'results': []})
+    
+    try:
+        return Response({'results': autocomplete.search(query, limit)})
+    except Exception as e:
+        print(f"Error in autocomplete_destinations: {str(e)}")
+        return Response(
+            {'error': 'Error fetching suggestions'}, 
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+@api_view(['GET'])
+@permission_classes([permissions.AllowAny])
+def nearby_destinations(request):
+    """
+    Destinations nearest to a point, closest first
+    GET /api/destinations/nearby/?lat=48.85&lon=2.35&radius=300&limit=10
+    """
+    try:
+        lat, lon = parse_coordinates(request.GET.get('lat'), request.GET.get('lon'))
+        radius = parse_radius(request.GET.get('radius'), default=None)
+        limit = parse_limit(request.GET.get('limit'), default=10, maximum=50)
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    
+    matches = geo.get_index().nearest(lat, lon, k=limit, max_radius_km=radius)
+    distances = {pk: distance for distance, pk in matches}
+    destinations = DestinationSerializer.setup_eager_loading(
+        Destination.objects.filter(pk__in=distances)
+    )
+    destinations = sorted(destinations, key=lambda destination: distances[destination.pk])
+    
+    serializer = DestinationSerializer(destinations, many=True, context={'request': request})
+    results = serializer.data
+    for destination, data in zip(destinations, results):
+        data['distance_km'] = round(distances[destination.pk], 1)
+    return Response({'results': results})
+
+@api_view(['GET'])
+@permission_classes([permissions.AllowAny])
+def similar_destinations(request, pk):
+    """Destinations most like this one, from the precomputed neighbour lists"""
+    try:
+        limit = min(max(int(request.GET.get('limit', 6)), 1), 20)
+    except ValueError:
+        limit = 6
+    
+    try:
+        destinations = list(
+            DestinationSerializer.setup_eager_loading(
+                Destination.objects.filter(similar_to_entries__destination_id=pk)
+            )
+            .annotate(similarity=F('similar_to_entries__score'))
+            .order_by('similar_to_entries__rank')[:limit]
+        )
+        if not destinations and not Destination.objects.filter(pk=pk).exists():
+            return Response({'error': 'Destination not found'}, status=status.HTTP_404_NOT_FOUND)
+        
+        serializer = DestinationSerializer(destinations, many=True, context={'request': request})
+        results = serializer.data
+        for destination, data in zip(destinations, results):
+            data['similarity'] = round(destination.similarity, 3)
+        return Response({'results': results})
+    except Exception as e:
+        print(f"Error in similar_destinations: {str(e)}")
+        return Response(
+            {'error': 'Error fetching similar destinations'}, 
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
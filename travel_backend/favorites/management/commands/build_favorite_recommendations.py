@@ -0,0 +1,28 @@
+import time
+
+from django.core.management.base import BaseCommand
+from favorites.recommendations import NEIGHBOURS_PER_DESTINATION, rebuild
+
+
+class Command(BaseCommand):
+    help = 'Rebuild "travelers who favorited this also liked" neighbour lists from favorites, lists and bookings'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--neighbours', type=int, default=NEIGHBOURS_PER_DESTINATION,
+            help='Neighbours kept per destination'
+        )
+        parser.add_argument('--chunk-size', type=int, default=5000, help='Rows fetched per database round trip')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Neighbour lists per bulk insert')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        travelers, destinations = rebuild(
+            count=options['neighbours'],
+            chunk_size=options['chunk_size'],
+            batch_size=options['batch_size'],
+        )
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Stored neighbour lists for {destinations} destinations from {travelers} travelers in {elapsed:.1f}s'
+        ))
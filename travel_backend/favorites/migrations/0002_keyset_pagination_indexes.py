@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:16
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('destinations', '0005_keyset_pagination_indexes'),
+        ('favorites', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='favorite',
+            name='favorites_f_user_id_3c3f17_idx',
+        ),
+        migrations.AddIndex(
+            model_name='favorite',
+            index=models.Index(fields=['user', '-created_at', '-id'], name='favorites_f_user_id_f1e205_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='favoritelist',
+            index=models.Index(fields=['user', '-updated_at', '-id'], name='favorites_f_user_id_10ed66_idx'),
+        ),
+    ]
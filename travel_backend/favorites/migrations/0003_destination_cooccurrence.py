@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:27
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('destinations', '0008_similar_destinations'),
+        ('favorites', '0002_keyset_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DestinationCooccurrence',
+            fields=[
+                ('destination', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='cooccurrence', serialize=False, to='destinations.destination')),
+                ('neighbours', models.JSONField(default=list, help_text='[[destination_id, score], ...], most similar first')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
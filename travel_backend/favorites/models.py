@@ -29,7 +29,7 @@ class Favorite(models.Model):
         verbose_name = 'Favorite Destination'
         verbose_name_plural = 'Favorite Destinations'
         indexes = [
-            models.Index(fields=['user', '-created_at']),
+            models.Index(fields=['user', '-created_at', '-id']),
             models.Index(fields=['destination', '-created_at']),
         ]
     
@@ -67,6 +67,9 @@ class FavoriteList(models.Model):
     class Meta:
         ordering = ['-updated_at']
         unique_together = ['user', 'name']
+        indexes = [
+            models.Index(fields=['user', '-updated_at', '-id']),
+        ]
     
     def __str__(self):
         return f"{self.user.username} - {self.name}"
@@ -88,3 +91,21 @@ class FavoriteListItem(models.Model):
     
     def __str__(self):
         return f"{self.favorite_list.name} - {self.destination.name}"
+
+class DestinationCooccurrence(models.Model):
+    """Destinations most often favorited or booked by the same travelers (see favorites.recommendations)"""
+    
+    destination = models.OneToOneField(
+        Destination,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='cooccurrence'
+    )
+    neighbours = models.JSONField(
+        default=list,
+        help_text="[[destination_id, score], ...], most similar first"
+    )
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"{self.destination_id} - {len(self.neighbours)} neighbours"
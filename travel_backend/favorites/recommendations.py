@@ -0,0 +1,140 @@
+"""
+"Travelers who favorited this also liked" recommendations.
+
+Each traveler's favorites, favorite list items and bookings form one sparse
+row of a traveler x destination matrix R. The item-to-item co-occurrence
+matrix R^T R is accumulated traveler by traveler, normalized to cosine
+similarities, and the best neighbours of every destination are stored in
+DestinationCooccurrence. Recommending for a traveler is then one lookup of
+the neighbour lists of what they already like plus a merge in memory.
+"""
+import heapq
+import math
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Q
+
+# How strongly each kind of interaction ties a traveler to a destination
+INTERACTION_WEIGHTS = {'favorite': 1.0, 'list_item': 1.0, 'booking': 2.0}
+NEIGHBOURS_PER_DESTINATION = 50
+# Travelers with more destinations than this are left out: their pairs grow
+# quadratically and say little about any single pair
+MAX_DESTINATIONS_PER_TRAVELER = 500
+
+
+def interactions(chunk_size=5000):
+    """Stream (user_id, destination_id, weight) from every source."""
+    from bookings.models import Booking
+    from .models import Favorite, FavoriteListItem
+
+    sources = (
+        ('favorite', Favorite.objects.values_list('user_id', 'destination_id')),
+        ('list_item', FavoriteListItem.objects.values_list('favorite_list__user_id', 'destination_id')),
+        ('booking', Booking.objects.exclude(status='cancelled').values_list('user_id', 'destination_id')),
+    )
+    for kind, rows in sources:
+        weight = INTERACTION_WEIGHTS[kind]
+        for user_id, destination_id in rows.iterator(chunk_size=chunk_size):
+            yield user_id, destination_id, weight
+
+
+def traveler_rows(interactions):
+    """Sparse rows of R, user id -> {destination id: weight}; the strongest interaction wins."""
+    rows = defaultdict(dict)
+    for user_id, destination_id, weight in interactions:
+        row = rows[user_id]
+        if weight > row.get(destination_id, 0):
+            row[destination_id] = weight
+    return rows
+
+
+def cooccurrence(rows):
+    """R^T R as {destination id: {destination id: weight}}, diagonal included."""
+    matrix = defaultdict(lambda: defaultdict(float))
+    for row in rows.values():
+        if len(row) > MAX_DESTINATIONS_PER_TRAVELER:
+            continue
+        items = list(row.items())
+        for position, (first, first_weight) in enumerate(items):
+            column = matrix[first]
+            column[first] += first_weight * first_weight
+            for second, second_weight in items[position + 1:]:
+                product = first_weight * second_weight
+                column[second] += product
+                matrix[second][first] += product
+    return matrix
+
+
+def neighbour_lists(matrix, count=NEIGHBOURS_PER_DESTINATION):
+    """Yield (destination id, [[neighbour id, cosine], ...]) best first."""
+    norms = {item: math.sqrt(column[item]) for item, column in matrix.items()}
+    for item, column in matrix.items():
+        norm = norms[item]
+        best = heapq.nlargest(count, (
+            (weight / (norm * norms[other]), -other)
+            for other, weight in column.items() if other != item
+        ))
+        if best:
+            yield item, [[-negative, round(score, 4)] for score, negative in best]
+
+
+def rebuild(count=NEIGHBOURS_PER_DESTINATION, chunk_size=5000, batch_size=1000):
+    """Recompute every destination's neighbour list; returns (travelers, destinations)."""
+    from destinations.models import Destination
+    from .models import DestinationCooccurrence
+
+    rows = traveler_rows(interactions(chunk_size))
+    travelers = len(rows)
+    matrix = cooccurrence(rows)
+    del rows
+
+    existing = set(Destination.objects.values_list('id', flat=True).iterator(chunk_size=chunk_size))
+    stored = 0
+    with transaction.atomic():
+        DestinationCooccurrence.objects.all().delete()
+        batch = []
+        for item, neighbours in neighbour_lists(matrix, count):
+            if item not in existing:
+                continue
+            batch.append(DestinationCooccurrence(
+                destination_id=item,
+                neighbours=[pair for pair in neighbours if pair[0] in existing],
+            ))
+            if len(batch) >= batch_size:
+                DestinationCooccurrence.objects.bulk_create(batch)
+                stored += len(batch)
+                batch = []
+        if batch:
+            DestinationCooccurrence.objects.bulk_create(batch)
+            stored += len(batch)
+    return travelers, stored
+
+
+def recommend_for_user(user, limit=10):
+    """
+    [(destination id, score), ...] for destinations ``user`` has not
+    favorited, listed or booked, best first.
+
+    The neighbour lists of everything the user likes come back in one query,
+    and those destinations themselves are exactly the ones to leave out.
+    """
+    from bookings.models import Booking
+    from .models import DestinationCooccurrence, Favorite, FavoriteListItem
+
+    liked = (
+        Q(destination_id__in=Favorite.objects.filter(user=user).values('destination_id'))
+        | Q(destination_id__in=FavoriteListItem.objects.filter(favorite_list__user=user).values('destination_id'))
+        | Q(destination_id__in=Booking.objects.filter(user=user).exclude(status='cancelled').values('destination_id'))
+    )
+    seen = set()
+    scores = defaultdict(float)
+    for destination_id, neighbours in DestinationCooccurrence.objects.filter(liked).values_list(
+        'destination_id', 'neighbours'
+    ):
+        seen.add(destination_id)
+        for other, score in neighbours:
+            scores[other] += score
+    for destination_id in seen:
+        scores.pop(destination_id, None)
+    return heapq.nlargest(limit, scores.items(), key=lambda item: (item[1], -item[0]))
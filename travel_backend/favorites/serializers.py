@@ -43,7 +43,7 @@ class FavoriteListSerializer(serializers.ModelSerializer):
     
     def get_destinations(self, obj):
         # Return only first 3 destinations for list view
-        items = FavoriteListItem.objects.filter(favorite_list=obj)[:3]
+        items = FavoriteListItem.objects.filter(favorite_list=obj).select_related('destination__category')[:3]
         return FavoriteListItemSerializer(items, many=True).data
     
     def create(self, validated_data):
@@ -55,7 +55,7 @@ class FavoriteListDetailSerializer(FavoriteListSerializer):
     
     def get_destinations(self, obj):
         # Return all destinations for detail view
-        items = FavoriteListItem.objects.filter(favorite_list=obj)
+        items = FavoriteListItem.objects.filter(favorite_list=obj).select_related('destination__category')
         return FavoriteListItemSerializer(items, many=True).data
 
 class FavoriteToggleSerializer(serializers.Serializer):
@@ -1,3 +1,100 @@
-from django.test import TestCase
+from datetime import date
+from io import StringIO
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from bookings.models import Booking
+from destinations.models import Category, Destination
+from . import recommendations
+from .models import DestinationCooccurrence, Favorite, FavoriteList, FavoriteListItem
+
+User = get_user_model()
+
+
+class CooccurrenceMatrixTests(SimpleTestCase):
+    """Neighbour scores are cosine similarities of the traveler x destination matrix's columns"""
+
+    def test_strongest_interaction_wins(self):
+        rows = recommendations.traveler_rows([(1, 10, 1.0), (1, 10, 2.0), (1, 10, 1.0), (2, 10, 1.0)])
+        self.assertEqual(rows, {1: {10: 2.0}, 2: {10: 1.0}})
+
+    def test_neighbours_are_cosine_similarities_best_first(self):
+        matrix = recommendations.cooccurrence({1: {10: 1.0, 20: 1.0}, 2: {10: 1.0, 20: 1.0, 30: 1.0}})
+        self.assertEqual(matrix[10][20], matrix[20][10])
+        neighbours = dict(recommendations.neighbour_lists(matrix))
+        self.assertEqual(neighbours[10], [[20, 1.0], [30, 0.7071]])
+        # Ties go to the lower id
+        self.assertEqual(neighbours[30], [[10, 0.7071], [20, 0.7071]])
+        self.assertEqual(dict(recommendations.neighbour_lists(matrix, count=1))[30], [[10, 0.7071]])
+
+    def test_travelers_with_too_many_destinations_are_left_out(self):
+        row = {destination: 1.0 for destination in range(recommendations.MAX_DESTINATIONS_PER_TRAVELER + 1)}
+        self.assertEqual(recommendations.cooccurrence({1: row}), {})
+
+
+class RecommendationTests(TestCase):
+    """Neighbour lists are built from favorites, lists and bookings and recommend what a traveler has not liked"""
+
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(name='Beach', icon='beach')
+        cls.a, cls.b, cls.c, cls.d = [
+            Destination.objects.create(
+                name=name, city=name, country='Country', category=category,
+                short_description='A short description', long_description='A long description',
+                price_per_person=100, duration_days=3,
+            )
+            for name in 'ABCD'
+        ]
+        cls.first, cls.second, cls.third, cls.fourth = [
+            User.objects.create_user(username=f'traveler{n}', email=f'traveler{n}@example.com', password='password')
+            for n in range(4)
+        ]
+        Favorite.objects.create(user=cls.first, destination=cls.a)
+        Favorite.objects.create(user=cls.first, destination=cls.b)
+        favorite_list = FavoriteList.objects.create(user=cls.second, name='Summer')
+        for destination in (cls.a, cls.b):
+            FavoriteListItem.objects.create(favorite_list=favorite_list, destination=destination)
+        cls.book(cls.second, cls.c)
+        Favorite.objects.create(user=cls.third, destination=cls.c)
+        # Cancelled bookings tie a traveler to nothing
+        Favorite.objects.create(user=cls.fourth, destination=cls.a)
+        cls.book(cls.fourth, cls.d, status='cancelled')
+
+    @classmethod
+    def book(cls, user, destination, status='confirmed'):
+        return Booking.objects.create(
+            user=user, destination=destination, start_date=date(2030, 1, 1), end_date=date(2030, 1, 4),
+            number_of_travelers=1, total_price=100, status=status, primary_contact_name='Test Traveler',
+            primary_contact_email=user.email, primary_contact_phone='+15550100',
+        )
+
+    def setUp(self):
+        call_command('build_favorite_recommendations', stdout=StringIO())
+
+    def neighbours(self, destination):
+        return DestinationCooccurrence.objects.get(destination=destination).neighbours
+
+    def test_rebuild_combines_every_source(self):
+        self.assertEqual(self.neighbours(self.b)[0][0], self.a.pk)
+        # B shares C's booker and has fewer other fans than A
+        self.assertEqual([pk for pk, _ in self.neighbours(self.c)], [self.b.pk, self.a.pk])
+        self.assertFalse(DestinationCooccurrence.objects.filter(destination=self.d).exists())
+        self.assertNotIn(self.d.pk, [pk for pk, _ in self.neighbours(self.a)])
+
+    def test_recommendations_leave_out_liked_destinations(self):
+        self.assertEqual([pk for pk, _ in recommendations.recommend_for_user(self.first)], [self.c.pk])
+        self.assertEqual([pk for pk, _ in recommendations.recommend_for_user(self.third)], [self.b.pk, self.a.pk])
+        self.assertEqual(recommendations.recommend_for_user(self.second), [])
+
+    def test_endpoint_serializes_ranked_destinations(self):
+        client = APIClient()
+        client.force_authenticate(self.third)
+        data = client.get(reverse('favorites:favorite_recommendations'), {'limit': 1}).json()
+        self.assertEqual(data['count'], 1)
+        self.assertEqual(data['recommendations'][0]['id'], self.b.pk)
+        self.assertGreater(data['recommendations'][0]['score'], 0)
@@ -9,6 +9,7 @@ urlpatterns = [
     path('status/', views.check_favorites_status, name='check_favorites_status'),
     path('', views.FavoriteListView.as_view(), name='favorite_list'),
     path('destinations/', views.FavoriteDestinationListView.as_view(), name='favorite_destinations'),
+    path('recommendations/', views.favorite_recommendations, name='favorite_recommendations'),
     
     # Favorite lists operations
     path('lists/', views.UserFavoriteListsView.as_view(), name='user_favorite_lists'),
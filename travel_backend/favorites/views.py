@@ -11,7 +11,9 @@ from .serializers import (
     FavoriteSerializer, FavoriteListSerializer, FavoriteListDetailSerializer,
     FavoriteToggleSerializer, FavoriteStatusSerializer, FavoriteListItemSerializer
 )
+from .recommendations import recommend_for_user
 from destinations.models import Destination
+from destinations.serializers import DestinationSerializer
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
@@ -89,7 +91,7 @@ class FavoriteListView(generics.ListAPIView):
     permission_classes = [IsAuthenticated]
     
     def get_queryset(self):
-        return Favorite.objects.filter(user=self.request.user).select_related('destination')
+        return Favorite.objects.filter(user=self.request.user).select_related('destination__category')
 
 class FavoriteDestinationListView(generics.ListAPIView):
     """
@@ -99,7 +101,7 @@ class FavoriteDestinationListView(generics.ListAPIView):
     permission_classes = [IsAuthenticated]
     
     def get(self, request, *args, **kwargs):
-        favorites = Favorite.objects.filter(user=request.user).select_related('destination')
+        favorites = Favorite.objects.filter(user=request.user).select_related('destination__category')
         
         # Get destination data with favorite info
         destinations_data = []
@@ -116,7 +118,8 @@ class FavoriteDestinationListView(generics.ListAPIView):
                 'price_range': str(favorite.destination.price_per_person),  # For compatibility
                 'duration_days': favorite.destination.duration_days,
                 'difficulty': favorite.destination.difficulty,
-                'rating': 4.5,  # Default rating since it's not in the model
+                'rating': float(favorite.destination.average_rating),
+                'total_reviews': favorite.destination.total_reviews,
                 'main_image_url': favorite.destination.main_image.url if favorite.destination.main_image else None,
                 'image_url': favorite.destination.main_image.url if favorite.destination.main_image else None,  # For compatibility
                 'category': favorite.destination.category.name if favorite.destination.category else None,
@@ -140,6 +143,7 @@ class UserFavoriteListsView(generics.ListCreateAPIView):
     """
     serializer_class = FavoriteListSerializer
     permission_classes = [IsAuthenticated]
+    cursor_ordering = ('-updated_at', '-id')
     
     def get_queryset(self):
         return FavoriteList.objects.filter(user=self.request.user)
@@ -233,3 +237,35 @@ def remove_from_favorite_list(request, list_id, destination_id):
             'success': False,
             'message': 'Destination not found in this list'
         }, status=status.HTTP_404_NOT_FOUND)
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def favorite_recommendations(request):
+    """
+    Destinations liked by travelers who like the same places as this user
+    GET /api/favorites/recommendations/?limit=10
+    """
+    try:
+        limit = min(max(int(request.GET.get('limit', 10)), 1), 50)
+    except ValueError:
+        limit = 10
+    
+    ranked = recommend_for_user(request.user, limit)
+    destinations = DestinationSerializer.setup_eager_loading(Destination.objects.all()).in_bulk(
+        [destination_id for destination_id, _ in ranked]
+    )
+    
+    recommendations = []
+    for destination_id, score in ranked:
+        destination = destinations.get(destination_id)
+        if destination is None:
+            continue
+        data = DestinationSerializer(destination, context={'request': request}).data
+        data['score'] = round(score, 4)
+        recommendations.append(data)
+    
+    return Response({
+        'success': True,
+        'count': len(recommendations),
+        'recommendations': recommendations
+    })
@@ -0,0 +1,20 @@
+from django.contrib import admin
+from django.utils import timezone
+from .models import Job
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ['id', 'task', 'status', 'attempts', 'max_attempts', 'run_at', 'updated_at']
+    list_filter = ['status', 'task']
+    search_fields = ['task', 'last_error']
+    readonly_fields = ['locked_by', 'locked_at', 'last_error', 'created_at', 'updated_at']
+    ordering = ['-created_at']
+    actions = ['requeue']
+
+    @admin.action(description='Requeue selected jobs with fresh attempts')
+    def requeue(self, request, queryset):
+        requeued = queryset.exclude(status=Job.RUNNING).update(
+            status=Job.QUEUED, attempts=0, run_at=timezone.now(), locked_by='', locked_at=None,
+            updated_at=timezone.now(),
+        )
+        self.message_user(request, f'Requeued {requeued} job(s)')
@@ -0,0 +1,99 @@
+import signal
+import threading
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, close_old_connections, connection
+from jobs.models import Job
+from jobs.queue import claim, prune, run_job
+
+
+class Command(BaseCommand):
+    help = 'Run queued background jobs with N concurrent workers until stopped, or once with --once'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=2, help='Concurrent worker threads')
+        parser.add_argument('--batch-size', type=int, default=10, help='Jobs a worker claims at a time')
+        parser.add_argument('--poll-interval', type=float, default=1.0, help='Seconds to wait when idle')
+        parser.add_argument('--once', action='store_true', help='Exit once no job is due instead of waiting')
+        parser.add_argument(
+            '--prune-interval', type=float, default=3600,
+            help='Seconds between deletions of old succeeded jobs; 0 to never prune'
+        )
+
+    def handle(self, *args, **options):
+        if options['workers'] < 1 or options['batch_size'] < 1:
+            raise CommandError('--workers and --batch-size must be at least 1')
+
+        stop = threading.Event()
+        lock = threading.Lock()
+        outcomes = {Job.SUCCEEDED: 0, Job.QUEUED: 0, Job.DEAD: 0}
+        pruned = {'at': None, 'count': 0}
+
+        def prune_if_due():
+            # One idle worker at a time does it, at most once per interval
+            interval = options['prune_interval']
+            with lock:
+                if not interval or (pruned['at'] is not None and time.monotonic() - pruned['at'] < interval):
+                    return
+                pruned['at'] = time.monotonic()
+            count = prune()
+            with lock:
+                pruned['count'] += count
+
+        def run_worker(close=True):
+            try:
+                while not stop.is_set():
+                    if close:
+                        close_old_connections()
+                    try:
+                        jobs = claim(options['batch_size'])
+                    except OperationalError:
+                        # e.g. SQLite busy with another worker's write
+                        stop.wait(options['poll_interval'])
+                        continue
+                    if not jobs:
+                        try:
+                            prune_if_due()
+                        except OperationalError:
+                            pass
+                        if options['once']:
+                            return
+                        stop.wait(options['poll_interval'])
+                        continue
+                    for job in jobs:
+                        outcome = run_job(job)
+                        with lock:
+                            outcomes[outcome] += 1
+            finally:
+                if close:
+                    connection.close()
+
+        def request_stop(signum, frame):
+            self.stdout.write('Stopping after the jobs in hand...')
+            stop.set()
+
+        handlers = {signum: signal.signal(signum, request_stop) for signum in (signal.SIGINT, signal.SIGTERM)}
+        began = time.perf_counter()
+        self.stdout.write(f"Running jobs with {options['workers']} worker(s)")
+        try:
+            if options['workers'] == 1:
+                # No thread needed, and the jobs run on this thread's connection
+                run_worker(close=False)
+            else:
+                threads = [threading.Thread(target=run_worker, daemon=True) for _ in range(options['workers'])]
+                for thread in threads:
+                    thread.start()
+                for thread in threads:
+                    # Short joins keep the main thread free to handle signals
+                    while thread.is_alive():
+                        thread.join(0.5)
+        finally:
+            for signum, handler in handlers.items():
+                signal.signal(signum, handler)
+
+        elapsed = time.perf_counter() - began
+        self.stdout.write(self.style.SUCCESS(
+            f"{outcomes[Job.SUCCEEDED]} succeeded, {outcomes[Job.QUEUED]} to retry, "
+            f"{outcomes[Job.DEAD]} dead in {elapsed:.1f}s; pruned {pruned['count']} old succeeded job(s)"
+        ))
@@ -0,0 +1,170 @@
+"""
+A durable job queue in the database.
+
+Producers enqueue jobs inside their own transaction, so a job exists
+exactly when the write that caused it commits, and enqueueing any number
+of jobs is one INSERT. Workers (``run_jobs``) claim due jobs with a
+conditional UPDATE that only matches rows still queued, so two workers
+never run the same job, and this works on SQLite, which has no
+SELECT ... FOR UPDATE SKIP LOCKED.
+
+A failed job is retried with exponential backoff until it has used its
+attempts, then kept as dead for an operator to inspect and requeue from
+the admin. Succeeded jobs are deleted once they are JOBS_KEEP_SUCCEEDED
+seconds old, so the table only grows with the backlog. A job left running by a worker that died is claimed again
+once JOBS_LOCK_TIMEOUT has passed, so handlers must be safe to run twice.
+"""
+import logging
+import random
+import traceback
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+_tasks = {}
+
+
+class Task:
+    def __init__(self, name, handler, max_attempts):
+        self.name = name
+        self.handler = handler
+        self.max_attempts = max_attempts
+
+    def __call__(self, **payload):
+        return self.handler(**payload)
+
+
+def register_task(name=None, max_attempts=None):
+    """
+    Register the decorated function as a task.
+
+    It is called with the job's payload as keyword arguments, so the
+    payload must be JSON: pass ids rather than model instances.
+    """
+    def decorator(handler):
+        task_name = name or f'{handler.__module__}.{handler.__name__}'
+        if task_name in _tasks and _tasks[task_name].handler is not handler:
+            raise ValueError(f'Task {task_name!r} is already registered')
+        _tasks[task_name] = Task(task_name, handler, max_attempts)
+        return handler
+    return decorator
+
+
+def get_task(name):
+    return _tasks.get(name)
+
+
+def _job(task, payload, delay, max_attempts):
+    if task not in _tasks:
+        raise ValueError(f'Unknown task {task!r}')
+    return Job(
+        task=task,
+        payload=payload or {},
+        run_at=timezone.now() + timedelta(seconds=delay) if delay else timezone.now(),
+        max_attempts=(
+            max_attempts or _tasks[task].max_attempts or getattr(settings, 'JOBS_MAX_ATTEMPTS', 5)
+        ),
+    )
+
+
+def enqueue(task, payload=None, delay=None, max_attempts=None):
+    """Queue one run of ``task``; it commits or rolls back with the caller's transaction."""
+    job = _job(task, payload, delay, max_attempts)
+    job.save()
+    return job
+
+
+def enqueue_many(jobs):
+    """Queue several ``(task, payload)`` pairs in one INSERT."""
+    return Job.objects.bulk_create([_job(task, payload, None, None) for task, payload in jobs])
+
+
+def retry_delay(attempts):
+    """Seconds to wait after the ``attempts``-th failure: doubling, capped, with jitter."""
+    base = getattr(settings, 'JOBS_RETRY_BACKOFF', 30)
+    delay = min(base * 2 ** (attempts - 1), getattr(settings, 'JOBS_RETRY_BACKOFF_MAX', 3600))
+    # Jobs that failed together should not all retry in the same instant
+    return delay * random.uniform(0.8, 1.2)
+
+
+def claim(limit=10, now=None):
+    """
+    Take up to ``limit`` due jobs for this worker, oldest first.
+
+    Returns the claimed jobs, which may be fewer than were due when other
+    workers got to some of them first.
+    """
+    now = now or timezone.now()
+    stale = now - timedelta(seconds=getattr(settings, 'JOBS_LOCK_TIMEOUT', 600))
+    due = Q(status=Job.QUEUED, run_at__lte=now) | Q(status=Job.RUNNING, locked_at__lt=stale)
+    candidates = list(Job.objects.filter(due).order_by('run_at', 'id').values_list('id', flat=True)[:limit])
+    if not candidates:
+        return []
+
+    token = uuid.uuid4().hex
+    # Only rows nobody claimed in the meantime still match
+    claimed = Job.objects.filter(due, pk__in=candidates).update(
+        status=Job.RUNNING, locked_by=token, locked_at=now, updated_at=now,
+    )
+    if not claimed:
+        return []
+    return list(Job.objects.filter(locked_by=token, status=Job.RUNNING).order_by('run_at', 'id'))
+
+
+def _finish(job, **fields):
+    # Only if this worker still holds the job, i.e. it was not reclaimed as stale
+    fields['updated_at'] = timezone.now()
+    return Job.objects.filter(pk=job.pk, locked_by=job.locked_by, status=Job.RUNNING).update(**fields)
+
+
+def run_job(job):
+    """Run one claimed job and record the outcome; returns its new status."""
+    task = get_task(job.task)
+    attempts = job.attempts + 1
+    if task is None:
+        _finish(job, status=Job.DEAD, attempts=attempts, last_error=f'Unknown task {job.task!r}')
+        logger.error('Job %s: unknown task %r', job.pk, job.task)
+        return Job.DEAD
+
+    try:
+        with transaction.atomic():
+            task(**job.payload)
+    except Exception as e:
+        error = traceback.format_exc()
+        if attempts >= job.max_attempts:
+            _finish(job, status=Job.DEAD, attempts=attempts, last_error=error)
+            logger.error('Job %s (%s) failed for good after %d attempts: %s', job.pk, job.task, attempts, e)
+            return Job.DEAD
+        delay = retry_delay(attempts)
+        _finish(
+            job, status=Job.QUEUED, attempts=attempts, last_error=error, locked_by='', locked_at=None,
+            run_at=timezone.now() + timedelta(seconds=delay),
+        )
+        logger.warning('Job %s (%s) failed, retrying in %.0fs: %s', job.pk, job.task, delay, e)
+        return Job.QUEUED
+
+    _finish(job, status=Job.SUCCEEDED, attempts=attempts, last_error='')
+    return Job.SUCCEEDED
+
+
+def prune(keep=None, batch_size=1000, now=None):
+    """Delete succeeded jobs finished more than ``keep`` seconds ago; returns how many went."""
+    keep = getattr(settings, 'JOBS_KEEP_SUCCEEDED', 7 * 24 * 3600) if keep is None else keep
+    cutoff = (now or timezone.now()) - timedelta(seconds=keep)
+    deleted = 0
+    while True:
+        # Small batches keep each delete's write lock short for the workers
+        batch = list(
+            Job.objects.filter(status=Job.SUCCEEDED, updated_at__lt=cutoff).values_list('id', flat=True)[:batch_size]
+        )
+        if not batch:
+            return deleted
+        deleted += Job.objects.filter(pk__in=batch).delete()[0]
@@ -0,0 +1,167 @@
+import tempfile
+from datetime import date, timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from bookings.models import Booking
+from bookings.tasks import BOOKING_CREATED_TASKS, invoice_path, invoice_storage
+from destinations.models import Category, Destination
+from .models import Job
+from .queue import claim, enqueue, prune, register_task, run_job
+
+calls = []
+
+
+@register_task('jobs.tests.record')
+def record(value):
+    calls.append(value)
+
+
+@register_task('jobs.tests.fail', max_attempts=3)
+def fail():
+    raise RuntimeError('always fails')
+
+
+class JobQueueTests(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_claimed_job_runs_once(self):
+        job = enqueue('jobs.tests.record', {'value': 42})
+        claimed = claim()
+        self.assertEqual([j.pk for j in claimed], [job.pk])
+        # Nothing left for a second worker
+        self.assertEqual(claim(), [])
+
+        self.assertEqual(run_job(claimed[0]), Job.SUCCEEDED)
+        self.assertEqual(calls, [42])
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.SUCCEEDED, 1))
+
+    def test_delayed_job_waits(self):
+        enqueue('jobs.tests.record', {'value': 1}, delay=60)
+        self.assertEqual(claim(), [])
+        self.assertEqual(len(claim(now=timezone.now() + timedelta(seconds=61))), 1)
+
+    @override_settings(JOBS_RETRY_BACKOFF=10)
+    def test_failures_back_off_then_dead_letter(self):
+        job = enqueue('jobs.tests.fail')
+        self.assertEqual(job.max_attempts, 3)
+        later = timezone.now()
+        for attempt in (1, 2):
+            claimed, = claim(now=later)
+            with self.assertLogs('jobs.queue', 'WARNING'):
+                self.assertEqual(run_job(claimed), Job.QUEUED)
+            job.refresh_from_db()
+            self.assertEqual(job.attempts, attempt)
+            self.assertIn('always fails', job.last_error)
+            # Doubling from 10s, give or take the jitter
+            delay = (job.run_at - timezone.now()).total_seconds()
+            self.assertGreater(delay, 10 * 2 ** (attempt - 1) * 0.75)
+            self.assertEqual(claim(now=later), [])
+            later = job.run_at
+
+        claimed, = claim(now=later)
+        with self.assertLogs('jobs.queue', 'ERROR'):
+            self.assertEqual(run_job(claimed), Job.DEAD)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.DEAD, 3))
+        self.assertEqual(claim(now=later + timedelta(days=1)), [])
+
+    @override_settings(JOBS_LOCK_TIMEOUT=60)
+    def test_stale_claims_are_taken_over(self):
+        enqueue('jobs.tests.record', {'value': 7})
+        first, = claim()
+        self.assertEqual(claim(now=timezone.now() + timedelta(seconds=30)), [])
+        second, = claim(now=timezone.now() + timedelta(seconds=61))
+        self.assertNotEqual(first.locked_by, second.locked_by)
+        # The first worker no longer holds it, so its outcome is not recorded
+        run_job(first)
+        self.assertEqual(Job.objects.get().status, Job.RUNNING)
+        self.assertEqual(run_job(second), Job.SUCCEEDED)
+
+
+class BookingCreatedJobsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(name='Beach', icon='beach')
+        cls.destination = Destination.objects.create(
+            name='Destination', city='City', country='Country', category=category,
+            short_description='A short description', long_description='A long description',
+            price_per_person=100, duration_days=5,
+        )
+        # Only the booking's own jobs are under test
+        Job.objects.all().delete()
+        cls.user = get_user_model().objects.create_user(
+            username='traveler', email='traveler@example.com', password='password'
+        )
+
+    def book(self):
+        return Booking.objects.create(
+            user=self.user, destination=self.destination, start_date=date(2030, 1, 1),
+            end_date=date(2030, 1, 8), number_of_travelers=2, total_price=180,
+            primary_contact_name='Test <b>Traveler</b>', primary_contact_email='traveler@example.com',
+            primary_contact_phone='+15550100',
+        )
+
+    def test_booking_queues_its_follow_up_work(self):
+        booking = self.book()
+        self.assertEqual(
+            sorted(Job.objects.values_list('task', flat=True)), sorted(BOOKING_CREATED_TASKS)
+        )
+        self.assertEqual({job.payload['booking_id'] for job in Job.objects.all()}, {booking.pk})
+
+        # Saving it again queues nothing more
+        booking.status = 'cancelled'
+        booking.save()
+        self.assertEqual(Job.objects.count(), len(BOOKING_CREATED_TASKS))
+
+    def test_worker_runs_booking_jobs(self):
+        booking = self.book()
+        client = APIClient()
+        client.force_authenticate(self.user)
+        url = reverse('booking-invoice', args=[booking.pk])
+        with tempfile.TemporaryDirectory() as root, override_settings(INVOICE_ROOT=root):
+            self.assertEqual(client.get(url).status_code, 404)
+            call_command('run_jobs', '--once', '--workers', '1', stdout=StringIO())
+            with invoice_storage().open(invoice_path(booking)) as invoice:
+                invoice = invoice.read().decode()
+            # The file name cannot be guessed from the sequential reference
+            self.assertNotEqual(invoice_path(booking), f'{booking.booking_id}.html')
+
+            response = client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(b''.join(response.streaming_content).decode(), invoice)
+
+            client.force_authenticate(get_user_model().objects.create_user(username='someone', password='password'))
+            self.assertEqual(client.get(url).status_code, 404)
+        # Priced by the rules, not the destination's list price of 100, and escaped
+        self.assertIn('2 traveler(s) at $90.00 each', invoice)
+        self.assertIn('Test &lt;b&gt;Traveler&lt;/b&gt;', invoice)
+        self.assertNotIn('<b>', invoice)
+
+        self.assertEqual(set(Job.objects.values_list('status', flat=True)), {Job.SUCCEEDED})
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertIn(booking.booking_id, mail.outbox[0].subject)
+
+
+class PruneTests(TestCase):
+    def test_only_old_succeeded_jobs_are_deleted(self):
+        now = timezone.now()
+        old = enqueue('jobs.tests.record', {'value': 1})
+        recent = enqueue('jobs.tests.record', {'value': 2})
+        dead = enqueue('jobs.tests.record', {'value': 3})
+        queued = enqueue('jobs.tests.record', {'value': 4})
+        Job.objects.filter(pk__in=[old.pk, recent.pk]).update(status=Job.SUCCEEDED)
+        Job.objects.filter(pk=dead.pk).update(status=Job.DEAD)
+        Job.objects.exclude(pk=recent.pk).update(updated_at=now - timedelta(days=30))
+
+        self.assertEqual(prune(keep=7 * 24 * 3600, batch_size=1, now=now), 1)
+        self.assertEqual(set(Job.objects.values_list('pk', flat=True)), {recent.pk, dead.pk, queued.pk})
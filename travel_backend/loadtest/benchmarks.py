@@ -0,0 +1,343 @@
+"""
+End-to-end API benchmarks.
+
+Every scenario drives one route through the Django test client, so each
+request goes through URL routing, middleware, JWT authentication,
+serializers and the database the way a real one does, minus the network.
+A scenario runs in two passes over fresh request numbers: a timed pass
+for latency percentiles, then a shorter instrumented pass that counts
+queries and traces allocations. tracemalloc slows Python down several
+times over, so it never runs during the timed requests.
+
+Request bodies and targets are drawn from a ``random.Random(seed)``, so two
+runs against copies of the same dataset send the same requests.
+"""
+import io
+import json
+import math
+import random
+import statistics
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import redirect_stdout
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.db.models import Count
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from bookings.models import Booking
+from destinations.models import Category, Destination
+
+from .dataset import CONTACT_SUBJECTS, EMAIL_DOMAIN, PASSWORD, PLACES, WORDS, ZIPF_DESTINATIONS, ZipfSampler
+
+User = get_user_model()
+
+PERCENTILES = (50, 95, 99)
+# Bookings per bookings.batch request
+BATCH_SIZE = 10
+
+
+class Scenario:
+    """
+    One benchmarked route.
+
+    ``build(fixtures, number)`` returns ``(path, body)`` for the
+    ``number``-th request; ``body`` is sent as JSON. ``max_requests`` caps
+    routes too slow to repeat as often as the rest.
+    """
+
+    def __init__(self, name, method, route, build, authenticated=True, max_requests=None):
+        self.name = name
+        self.method = method
+        self.route = route
+        self.build = build
+        self.authenticated = authenticated
+        self.max_requests = max_requests
+
+
+class Fixtures:
+    """Deterministic request targets drawn from the dataset being benchmarked."""
+
+    def __init__(self, seed=0):
+        self.rng = random.Random(seed)
+        # The generated user with the most bookings: list and summary
+        # endpoints are benchmarked at their worst, not their average
+        self.user = (
+            User.objects.filter(email__endswith=f'@{EMAIL_DOMAIN}')
+            .annotate(booking_count=Count('booking'))
+            .order_by('-booking_count', 'pk')
+            .first()
+        )
+        if self.user is None:
+            raise ValueError('No generated users in this database; run generate_dataset first')
+        destination_ids = list(Destination.objects.order_by('pk').values_list('pk', flat=True))
+        if not destination_ids:
+            raise ValueError('No destinations in this database')
+        self.destinations = ZipfSampler(self.rng, destination_ids, ZIPF_DESTINATIONS)
+        # Many more destinations than requests, so favorites are toggled on
+        # a rotating set rather than on whatever the sampler favours
+        self.toggle_targets = self.rng.sample(destination_ids, min(len(destination_ids), 50))
+        self.categories = list(Category.objects.order_by('pk').values_list('name', flat=True))
+        self.search_terms = [city for city, _, _, _ in PLACES] + WORDS
+        self.rng.shuffle(self.search_terms)
+        self.today = timezone.localdate()
+
+    def destination(self):
+        return self.destinations.draw()[0]
+
+    def search_term(self, number):
+        return self.search_terms[number % len(self.search_terms)]
+
+
+def _destination_list(fixtures, number):
+    lat, lon = PLACES[number % len(PLACES)][2:]
+    variants = [
+        '',
+        '?page=5',
+        f'?category={fixtures.categories[number % len(fixtures.categories)]}' if fixtures.categories else '',
+        f'?search={fixtures.search_term(number)}',
+        f'?near={lat},{lon}&radius=250',
+    ]
+    return '/api/destinations/' + variants[number % len(variants)], None
+
+
+def _booking(fixtures, number):
+    start = fixtures.today + timedelta(days=30 + number % 300)
+    travelers = fixtures.rng.randint(1, 4)
+    return '/api/bookings/', {
+        'destination': fixtures.destination(),
+        'start_date': start.isoformat(),
+        'end_date': (start + timedelta(days=fixtures.rng.randint(3, 14))).isoformat(),
+        'number_of_travelers': travelers,
+        'primary_contact_name': f'{fixtures.user.first_name} {fixtures.user.last_name}',
+        'primary_contact_email': fixtures.user.email,
+        'primary_contact_phone': '+15550100',
+        'travelers': [
+            {
+                'first_name': f'Traveler{position}',
+                'last_name': fixtures.user.last_name or 'Benchmark',
+                'date_of_birth': '1990-01-01',
+                'nationality': 'Testland',
+            }
+            for position in range(travelers)
+        ],
+    }
+
+
+def _contact(fixtures, number):
+    return '/api/contacts/submit/', {
+        'name': 'Benchmark Visitor',
+        'email': f'visitor{number}@{EMAIL_DOMAIN}',
+        'subject': CONTACT_SUBJECTS[number % len(CONTACT_SUBJECTS)],
+        'category': 'general',
+        'message': 'Benchmark message asking about availability for next season.',
+    }
+
+
+# Read-only routes run first so the writes below cannot change what they see
+SCENARIOS = [
+    Scenario(
+        'auth.login', 'post', '/api/auth/login/',
+        lambda f, n: ('/api/auth/login/', {'email': f.user.email, 'password': PASSWORD}),
+        # Dominated by password hashing, which is slow on purpose
+        authenticated=False, max_requests=20,
+    ),
+    Scenario('destinations.list', 'get', '/api/destinations/', _destination_list, authenticated=False),
+    Scenario(
+        'destinations.search', 'get', '/api/destinations/search/?q=',
+        lambda f, n: (f'/api/destinations/search/?q={f.search_term(n)}', None), authenticated=False,
+    ),
+    Scenario(
+        'destinations.featured', 'get', '/api/destinations/featured/',
+        lambda f, n: ('/api/destinations/featured/', None), authenticated=False,
+    ),
+    Scenario(
+        'reviews.list', 'get', '/api/reviews/?destination=',
+        lambda f, n: (f'/api/reviews/?destination={f.destination()}', None), authenticated=False,
+    ),
+    Scenario(
+        'destinations.availability', 'get', '/api/destinations/<pk>/availability/',
+        lambda f, n: (
+            f'/api/destinations/{f.destination()}/availability/?from={f.today}&to={f.today + timedelta(days=364)}',
+            None,
+        ),
+        authenticated=False,
+    ),
+    Scenario(
+        'bookings.quote', 'get', '/api/bookings/quote/?destination=',
+        lambda f, n: (f'/api/bookings/quote/?destination={f.destination()}&travelers=1,2,3,4', None),
+        authenticated=False,
+    ),
+    Scenario('bookings.list', 'get', '/api/bookings/', lambda f, n: ('/api/bookings/', None)),
+    Scenario('bookings.summary', 'get', '/api/bookings/summary/', lambda f, n: ('/api/bookings/summary/', None)),
+    Scenario(
+        'favorites.status', 'post', '/api/favorites/status/',
+        lambda f, n: ('/api/favorites/status/', {'destination_ids': sorted(set(f.destinations.draw(20)))}),
+    ),
+    Scenario(
+        'favorites.toggle', 'post', '/api/favorites/toggle/',
+        # Consecutive requests add then remove the same favorite
+        lambda f, n: ('/api/favorites/toggle/', {
+            'destination_id': f.toggle_targets[(n // 2) % len(f.toggle_targets)]
+        }),
+    ),
+    Scenario('bookings.create', 'post', '/api/bookings/', _booking),
+    Scenario(
+        'bookings.batch', 'post', '/api/bookings/batch/',
+        lambda f, n: ('/api/bookings/batch/', {
+            'bookings': [_booking(f, n * BATCH_SIZE + position)[1] for position in range(BATCH_SIZE)]
+        }),
+    ),
+    Scenario('contacts.submit', 'post', '/api/contacts/submit/', _contact, authenticated=False),
+]
+
+
+def scenario_names():
+    return [scenario.name for scenario in SCENARIOS]
+
+
+def percentile_summary(values, digits=3):
+    if len(values) > 1:
+        cuts = statistics.quantiles(values, n=100, method='inclusive')
+        summary = {f'p{p}': cuts[p - 1] for p in PERCENTILES}
+    else:
+        summary = {f'p{p}': values[0] for p in PERCENTILES}
+    summary['mean'] = statistics.fmean(values)
+    summary['max'] = max(values)
+    return {key: round(value, digits) for key, value in summary.items()}
+
+
+class Runner:
+    """Sends scenario requests through one test client signed in as the fixtures' user."""
+
+    def __init__(self, fixtures, requests=200, warmup=10, instrumented=20):
+        self.fixtures = fixtures
+        self.requests = requests
+        self.warmup = warmup
+        self.instrumented = instrumented
+        # The test client's default host is not in a production ALLOWED_HOSTS
+        host = next(
+            (host for host in settings.ALLOWED_HOSTS if host and '*' not in host and not host.startswith('.')),
+            'testserver',
+        )
+        self.client = Client(HTTP_HOST=host)
+        self.headers = {}
+        response = self._send('post', '/api/auth/login/', {'email': fixtures.user.email, 'password': PASSWORD})
+        if response.status_code != 200:
+            raise ValueError(f'Could not sign in as {fixtures.user.email}: HTTP {response.status_code}')
+        self.headers = {'HTTP_AUTHORIZATION': f"Bearer {response.json()['access']}"}
+
+    def _send(self, method, path, body, authenticated=True):
+        extra = self.headers if authenticated else {}
+        # Several views print debugging output on every request
+        with redirect_stdout(io.StringIO()):
+            if body is None:
+                return getattr(self.client, method)(path, **extra)
+            return getattr(self.client, method)(
+                path, data=json.dumps(body), content_type='application/json', **extra
+            )
+
+    def run(self, scenario):
+        requests = min(self.requests, scenario.max_requests or self.requests)
+        instrumented = min(self.instrumented, requests)
+        warmup = min(self.warmup, requests)
+        number = 0
+
+        def send():
+            nonlocal number
+            path, body = scenario.build(self.fixtures, number)
+            number += 1
+            return self._send(scenario.method, path, body, scenario.authenticated)
+
+        for _ in range(warmup):
+            send()
+
+        timings = []
+        statuses = Counter()
+        for _ in range(requests):
+            started = time.perf_counter()
+            response = send()
+            timings.append((time.perf_counter() - started) * 1000)
+            statuses[str(response.status_code)] += 1
+
+        queries, allocated = [], []
+        tracemalloc.start()
+        try:
+            for _ in range(instrumented):
+                tracemalloc.reset_peak()
+                baseline = tracemalloc.get_traced_memory()[0]
+                with CaptureQueriesContext(connection) as captured:
+                    send()
+                allocated.append((tracemalloc.get_traced_memory()[1] - baseline) / 1024)
+                queries.append(len(captured))
+        finally:
+            tracemalloc.stop()
+
+        return {
+            'method': scenario.method.upper(),
+            'route': scenario.route,
+            'requests': requests,
+            'status_codes': dict(sorted(statuses.items())),
+            'latency_ms': percentile_summary(timings),
+            'requests_per_second': round(1000 * len(timings) / math.fsum(timings), 1),
+            'queries_per_request': percentile_summary(queries, digits=1) if queries else None,
+            'peak_allocated_kb': percentile_summary(allocated, digits=1) if allocated else None,
+        }
+
+
+def dataset_profile():
+    """Row counts of the tables the scenarios read, to tell datasets apart in results."""
+    from contacts.models import Contact
+    from favorites.models import Favorite
+    from reviews.models import Review
+
+    return {
+        model._meta.label: model.objects.count()
+        for model in (User, Destination, Booking, Review, Favorite, Contact)
+    }
+
+
+def run(names=None, seed=0, requests=200, warmup=10, instrumented=20, log=print):
+    """Benchmark the configured database; returns a dict of results keyed by scenario name."""
+    fixtures = Fixtures(seed)
+    runner = Runner(fixtures, requests=requests, warmup=warmup, instrumented=instrumented)
+    results = {
+        'rows': dataset_profile(),
+        'user_bookings': fixtures.user.booking_set.count(),
+        'scenarios': {},
+    }
+    for scenario in SCENARIOS:
+        if names and scenario.name not in names:
+            continue
+        result = runner.run(scenario)
+        results['scenarios'][scenario.name] = result
+        latency = result['latency_ms']
+        log(
+            f"{scenario.name:<24} p50 {latency['p50']:>8.2f} ms  p95 {latency['p95']:>8.2f} ms  "
+            f"p99 {latency['p99']:>8.2f} ms  {result['queries_per_request']['mean']:>5.1f} queries  "
+            f"{result['peak_allocated_kb']['mean']:>8.1f} KB"
+        )
+    return results
+
+
+def compare(previous, current, metric='p95'):
+    """Rows of (dataset, scenario, before, after, change %) for latency and query counts."""
+    rows = []
+    for label, dataset in current.get('datasets', {}).items():
+        before_dataset = previous.get('datasets', {}).get(label, {})
+        for name, result in dataset['scenarios'].items():
+            before = before_dataset.get('scenarios', {}).get(name)
+            if before is None:
+                continue
+            for key, unit in (('latency_ms', 'ms'), ('queries_per_request', 'queries')):
+                old = before[key]['p50' if key == 'queries_per_request' else metric]
+                new = result[key]['p50' if key == 'queries_per_request' else metric]
+                change = (new - old) / old * 100 if old else 0.0
+                rows.append((label, name, unit, old, new, change))
+    return rows
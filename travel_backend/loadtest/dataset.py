@@ -0,0 +1,533 @@
+"""
+Seeded synthetic data for load testing.
+
+Everything is drawn from one ``random.Random(seed)``, so the same seed and
+reference date against the same starting database produce the same rows.
+Activity is skewed the way production traffic is: destination and user
+popularity follow a Zipf distribution and departures follow a seasonal
+curve. Rows are written with ``executemany`` in chunks, skipping model
+instances entirely, and get explicit primary keys so children can point
+at their parents without reading anything back.
+"""
+import random
+import time
+from array import array
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.color import no_style
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.models import Max
+
+from bookings.models import Booking, BookingTraveler
+from contacts.models import Contact
+from destinations.models import Category, Destination
+from favorites.models import Favorite, FavoriteList, FavoriteListItem
+from reviews.models import Review, ReviewHelpful
+
+User = get_user_model()
+
+PASSWORD = 'loadtest-password'
+EMAIL_DOMAIN = 'loadtest.example.com'
+
+# Share of a --rows total given to each generated table. Travelers, helpful
+# votes and list items follow from their parents and make up the rest.
+ROW_SHARES = {
+    'users': 0.05,
+    'destinations': 0.01,
+    'bookings': 0.20,
+    'reviews': 0.08,
+    'favorites': 0.10,
+    'lists': 0.01,
+    'contacts': 0.01,
+}
+
+ZIPF_DESTINATIONS = 1.1
+ZIPF_USERS = 0.8
+
+# Relative demand for departures in each month, January first
+MONTH_WEIGHTS = [5, 4, 6, 7, 8, 11, 14, 13, 8, 6, 5, 9]
+
+FIRST_NAMES = [
+    'Aarav', 'Olivia', 'Liam', 'Emma', 'Noah', 'Ava', 'Mateo', 'Sofia', 'Yuki', 'Hana',
+    'Chen', 'Mei', 'Arjun', 'Priya', 'Lucas', 'Chloe', 'Omar', 'Layla', 'Ivan', 'Anya',
+    'Kofi', 'Amara', 'Diego', 'Lucia', 'Finn', 'Freya', 'Ravi', 'Isha', 'Leo', 'Zoe',
+]
+LAST_NAMES = [
+    'Sharma', 'Smith', 'Garcia', 'Mueller', 'Rossi', 'Tanaka', 'Kim', 'Nguyen', 'Patel', 'Silva',
+    'Dubois', 'Kowalski', 'Jensen', 'Okafor', 'Haddad', 'Ivanova', 'Murphy', 'Cohen', 'Lopez', 'Chen',
+]
+# (city, country, latitude, longitude)
+PLACES = [
+    ('Paris', 'France', 48.8566, 2.3522), ('Nice', 'France', 43.7102, 7.2620),
+    ('Rome', 'Italy', 41.9028, 12.4964), ('Florence', 'Italy', 43.7696, 11.2558),
+    ('Barcelona', 'Spain', 41.3874, 2.1686), ('Seville', 'Spain', 37.3891, -5.9845),
+    ('Lisbon', 'Portugal', 38.7223, -9.1393), ('Interlaken', 'Switzerland', 46.6863, 7.8632),
+    ('Reykjavik', 'Iceland', 64.1466, -21.9426), ('Santorini', 'Greece', 36.3932, 25.4615),
+    ('Istanbul', 'Turkey', 41.0082, 28.9784), ('Marrakesh', 'Morocco', 31.6295, -7.9811),
+    ('Cairo', 'Egypt', 30.0444, 31.2357), ('Cape Town', 'South Africa', -33.9249, 18.4241),
+    ('Zanzibar', 'Tanzania', -6.1659, 39.2026), ('Nairobi', 'Kenya', -1.2921, 36.8219),
+    ('Dubai', 'UAE', 25.2048, 55.2708), ('Jaipur', 'India', 26.9124, 75.7873),
+    ('Goa', 'India', 15.2993, 74.1240), ('Kathmandu', 'Nepal', 27.7172, 85.3240),
+    ('Male', 'Maldives', 4.1755, 73.5093), ('Bangkok', 'Thailand', 13.7563, 100.5018),
+    ('Chiang Mai', 'Thailand', 18.7883, 98.9853), ('Hanoi', 'Vietnam', 21.0278, 105.8342),
+    ('Ubud', 'Indonesia', -8.5069, 115.2625), ('Tokyo', 'Japan', 35.6762, 139.6503),
+    ('Kyoto', 'Japan', 35.0116, 135.7681), ('Seoul', 'South Korea', 37.5665, 126.9780),
+    ('Sydney', 'Australia', -33.8688, 151.2093), ('Queenstown', 'New Zealand', -45.0312, 168.6626),
+    ('New York', 'USA', 40.7128, -74.0060), ('San Francisco', 'USA', 37.7749, -122.4194),
+    ('Banff', 'Canada', 51.1784, -115.5708), ('Cancun', 'Mexico', 21.1619, -86.8515),
+    ('Cusco', 'Peru', -13.5320, -71.9675), ('Rio de Janeiro', 'Brazil', -22.9068, -43.1729),
+    ('Buenos Aires', 'Argentina', -34.6037, -58.3816), ('Patagonia', 'Chile', -51.7300, -72.5000),
+]
+CATEGORIES = [
+    ('Adventure', 'mountain', 'Thrilling outdoor adventures'),
+    ('Beach', 'umbrella-beach', 'Beautiful beaches and tropical paradises'),
+    ('Cultural', 'landmark', 'Rich cultural experiences'),
+    ('City', 'city', 'Urban experiences'),
+    ('Nature', 'tree', 'Natural wonders'),
+    ('Luxury', 'crown', 'Premium experiences'),
+]
+ADJECTIVES = [
+    'Hidden', 'Grand', 'Classic', 'Wild', 'Serene', 'Royal', 'Coastal', 'Alpine', 'Ancient',
+    'Vibrant', 'Secret', 'Golden', 'Misty', 'Sunlit', 'Rustic', 'Iconic',
+]
+NOUNS = [
+    'Escape', 'Explorer', 'Trek', 'Retreat', 'Discovery', 'Odyssey', 'Getaway', 'Journey',
+    'Safari', 'Voyage', 'Highlights', 'Adventure',
+]
+WORDS = (
+    'temple market harbour mountain river valley glacier beach reef lagoon village vineyard '
+    'cuisine festival museum palace canyon desert forest waterfall island volcano trail '
+    'sunset sunrise cruise kayak hike cycle guided private boutique local heritage wildlife '
+    'spa yoga street food tasting old town quarter cathedral castle garden lake fjord'
+).split()
+REVIEW_TITLES = [
+    'Trip of a lifetime', 'Great value', 'Well organised', 'Not what we expected',
+    'Amazing guides', 'Would go again', 'Too rushed', 'Perfect for families',
+]
+CONTACT_SUBJECTS = [
+    'Question about my booking', 'Group discount', 'Change travel dates', 'Visa requirements',
+    'Partnership enquiry', 'Website problem', 'Dietary requirements', 'Feedback on my trip',
+]
+
+
+class TableWriter:
+    """
+    Buffers rows for one model and writes them with executemany in chunks.
+
+    A writer for child rows names its parent's writer, which is flushed
+    first so foreign keys always point at rows that exist.
+    """
+
+    def __init__(self, model, fields, chunk_size, parent=None):
+        opts = model._meta
+        self.model = model
+        self.chunk_size = chunk_size
+        self.parent = parent
+        # The connection itself rather than the django.db.connection proxy,
+        # whose every attribute lookup goes through a thread-local
+        self.connection = connection = connections[DEFAULT_DB_ALIAS]
+        given = [opts.get_field(name) for name in fields]
+        # Columns not generated take the field default, computed once; an
+        # omitted primary key is left to the database
+        rest = [field for field in opts.concrete_fields if field not in given and not field.primary_key]
+        for field in rest:
+            if field.get_default() is None and not field.null:
+                raise ValueError(f'{opts.label}.{field.name} needs a generated value')
+        self.constants = tuple(field.get_db_prep_save(field.get_default(), connection) for field in rest)
+        columns = [field.column for field in given + rest]
+        self.sql = 'INSERT INTO {} ({}) VALUES ({})'.format(
+            connection.ops.quote_name(opts.db_table),
+            ', '.join(connection.ops.quote_name(column) for column in columns),
+            ', '.join(['%s'] * len(columns)),
+        )
+        # Only values the database adapter cannot take as they are go
+        # through the field's own preparation
+        self.converters = [
+            (position, field) for position, field in enumerate(given)
+            if field.get_internal_type() in ('DateTimeField', 'DateField', 'DecimalField', 'JSONField')
+        ]
+        self.rows = []
+        self.written = 0
+
+    def add(self, *values):
+        self.rows.append(values)
+        if len(self.rows) >= self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        if not self.rows:
+            return
+        if self.parent is not None:
+            self.parent.flush()
+        prepared = []
+        for row in self.rows:
+            row = list(row)
+            for position, field in self.converters:
+                row[position] = field.get_db_prep_save(row[position], self.connection)
+            prepared.append(tuple(row) + self.constants)
+        with transaction.atomic(), self.connection.cursor() as cursor:
+            cursor.executemany(self.sql, prepared)
+        self.written += len(prepared)
+        self.rows = []
+
+
+class ZipfSampler:
+    """Draws items with probability proportional to 1 / rank ** exponent."""
+
+    def __init__(self, rng, items, exponent):
+        self.items = list(items)
+        rng.shuffle(self.items)
+        total = 0.0
+        self.cumulative = []
+        for rank in range(1, len(self.items) + 1):
+            total += 1 / rank ** exponent
+            self.cumulative.append(total)
+        self.rng = rng
+
+    def draw(self, k=1):
+        return self.rng.choices(self.items, cum_weights=self.cumulative, k=k)
+
+
+def _next_id(model):
+    return (model.objects.aggregate(last=Max('pk'))['last'] or 0) + 1
+
+
+def counts_for_rows(total):
+    return {name: max(1, int(total * share)) for name, share in ROW_SHARES.items()}
+
+
+class DatasetGenerator:
+    def __init__(self, seed=0, today=None, chunk_size=5000, log=print):
+        self.rng = random.Random(seed)
+        self.today = today or date.today()
+        self.now = datetime.combine(self.today, datetime.min.time(), tzinfo=dt_timezone.utc)
+        self.chunk_size = chunk_size
+        self.log = log
+        self.written = {}
+
+    # Helpers
+
+    def _writer(self, model, fields, parent=None):
+        return TableWriter(model, fields, self.chunk_size, parent)
+
+    def _finish(self, label, *writers):
+        for writer in writers:
+            writer.flush()
+            self.written[writer.model._meta.label] = self.written.get(writer.model._meta.label, 0) + writer.written
+        self.log(f"  {label}: {', '.join(f'{w.written:,} {w.model._meta.verbose_name_plural}' for w in writers)}")
+
+    def _moment(self, days_back):
+        """A datetime up to ``days_back`` days before the reference date."""
+        return self.now - timedelta(seconds=self.rng.randrange(max(1, int(days_back * 86400))))
+
+    def _name(self):
+        return self.rng.randrange(len(FIRST_NAMES)), self.rng.randrange(len(LAST_NAMES))
+
+    # Tables
+
+    def categories(self):
+        existing = dict(Category.objects.values_list('name', 'id'))
+        missing = [Category(name=name, icon=icon, description=description)
+                   for name, icon, description in CATEGORIES if name not in existing]
+        Category.objects.bulk_create(missing)
+        return list(Category.objects.order_by('id').values_list('id', flat=True))
+
+    def users(self, count):
+        first_id = _next_id(User)
+        password = make_password(PASSWORD)
+        writer = self._writer(User, [
+            'id', 'password', 'username', 'email', 'first_name', 'last_name',
+            'is_active', 'is_staff', 'is_superuser', 'date_joined', 'city', 'country',
+        ])
+        self.user_first = array('B')
+        self.user_last = array('B')
+        for pk in range(first_id, first_id + count):
+            first, last = self._name()
+            city, country = PLACES[self.rng.randrange(len(PLACES))][:2]
+            self.user_first.append(first)
+            self.user_last.append(last)
+            writer.add(
+                pk, password, f'loadtest{pk}', f'loadtest{pk}@{EMAIL_DOMAIN}',
+                FIRST_NAMES[first], LAST_NAMES[last], True, False, False,
+                self._moment(3 * 365), city, country,
+            )
+        self._finish('users', writer)
+        self.user_ids = range(first_id, first_id + count)
+
+    def destinations(self, count, category_ids):
+        first_id = _next_id(Destination)
+        writer = self._writer(Destination, [
+            'id', 'name', 'slug', 'city', 'country', 'latitude', 'longitude', 'category',
+            'short_description', 'long_description', 'price_per_person', 'duration_days',
+            'difficulty', 'best_time_to_visit', 'is_featured', 'created_at', 'updated_at',
+        ])
+        difficulties = [choice for choice, _ in Destination.DIFFICULTY_CHOICES]
+        rng = self.rng
+        self.destination_days = array('H')
+        self.destination_prices = array('d')
+        for pk in range(first_id, first_id + count):
+            city, country, lat, lon = PLACES[rng.randrange(len(PLACES))]
+            name = f'{rng.choice(ADJECTIVES)} {city} {rng.choice(NOUNS)}'
+            days = min(max(int(rng.lognormvariate(1.9, 0.45)), 1), 30)
+            price = round(min(max(rng.lognormvariate(7.0, 0.6), 150), 20000), 2)
+            self.destination_days.append(days)
+            self.destination_prices.append(price)
+            best_from = rng.randrange(12)
+            created = self._moment(4 * 365)
+            writer.add(
+                pk, name, f'loadtest-{pk}', city, country,
+                Decimal(f'{lat + rng.uniform(-0.5, 0.5):.6f}'), Decimal(f'{lon + rng.uniform(-0.5, 0.5):.6f}'),
+                rng.choice(category_ids),
+                f'{name}: ' + ' '.join(rng.choices(WORDS, k=12)),
+                ' '.join(rng.choices(WORDS, k=80)),
+                Decimal(f'{price:.2f}'), days, rng.choice(difficulties),
+                f'{date(2000, best_from + 1, 1):%B} to {date(2000, (best_from + 3) % 12 + 1, 1):%B}',
+                rng.random() < 0.01, created, created,
+            )
+        self._finish('destinations', writer)
+        self.destination_ids = range(first_id, first_id + count)
+        self.destination_positions = None
+
+    def _departure_days(self):
+        # Departures from two years back to one year ahead, weighted by season
+        start = self.today - timedelta(days=2 * 365)
+        days = [start + timedelta(days=offset) for offset in range(3 * 365)]
+        cumulative = []
+        total = 0.0
+        for day in days:
+            total += MONTH_WEIGHTS[day.month - 1] * (1.2 if day.weekday() >= 4 else 1.0)
+            cumulative.append(total)
+        return days, cumulative
+
+    def bookings(self, count, users, destinations):
+        rng = self.rng
+        booking_writer = self._writer(Booking, [
+            'id', 'user', 'booking_id', 'destination', 'start_date', 'end_date',
+            'number_of_travelers', 'total_price', 'primary_contact_name', 'primary_contact_email',
+            'primary_contact_phone', 'special_requirements', 'dietary_restrictions',
+            'status', 'payment_status', 'created_at', 'updated_at',
+        ])
+        traveler_writer = self._writer(BookingTraveler, [
+            'booking', 'first_name', 'last_name', 'date_of_birth', 'passport_number', 'nationality',
+        ], parent=booking_writer)
+        departure_days, departure_weights = self._departure_days()
+        first_id = _next_id(Booking)
+        for offset in range(0, count, self.chunk_size):
+            size = min(self.chunk_size, count - offset)
+            user_draws = users.draw(size)
+            destination_draws = destinations.draw(size)
+            starts = rng.choices(departure_days, cum_weights=departure_weights, k=size)
+            for index in range(size):
+                pk = first_id + offset + index
+                user_id = user_draws[index]
+                destination_id = destination_draws[index]
+                start = starts[index]
+                days, unit_price = self._destination(destination_id)
+                travelers = rng.choices((1, 2, 3, 4, 5, 6), weights=(25, 40, 12, 13, 6, 4))[0]
+                created = datetime.combine(
+                    start - timedelta(days=min(int(rng.expovariate(1 / 45)), 365)),
+                    datetime.min.time(), tzinfo=dt_timezone.utc,
+                ) + timedelta(seconds=rng.randrange(86400))
+                if created > self.now:
+                    created = self._moment(30)
+                end = start + timedelta(days=days)
+                if rng.random() < 0.08:
+                    status, payment = 'cancelled', 'refunded'
+                elif end < self.today:
+                    status, payment = 'completed', 'paid'
+                else:
+                    status, payment = 'confirmed', 'paid' if rng.random() < 0.7 else 'pending'
+                first, last = self._user_name(user_id)
+                price = unit_price * travelers
+                booking_writer.add(
+                    pk, user_id, f'LT{pk:010d}', destination_id, start, end, travelers,
+                    Decimal(f'{price:.2f}'), f'{FIRST_NAMES[first]} {LAST_NAMES[last]}',
+                    f'loadtest{user_id}@{EMAIL_DOMAIN}', f'+1555{pk % 10000000:07d}',
+                    '', '', status, payment, created, created,
+                )
+                for position in range(travelers):
+                    if position:
+                        first, last = self._name()
+                    traveler_writer.add(
+                        pk, FIRST_NAMES[first], LAST_NAMES[last],
+                        date(1950 + rng.randrange(55), rng.randrange(1, 13), rng.randrange(1, 29)),
+                        '', PLACES[rng.randrange(len(PLACES))][1],
+                    )
+        self._finish('bookings', booking_writer, traveler_writer)
+
+    def reviews(self, count, users, destinations):
+        rng = self.rng
+        review_writer = self._writer(Review, [
+            'id', 'user', 'destination', 'rating', 'title', 'comment', 'value_for_money',
+            'service_quality', 'cleanliness', 'location', 'helpful_votes', 'total_votes',
+            'is_verified', 'is_approved', 'created_at', 'updated_at',
+        ])
+        vote_writer = self._writer(ReviewHelpful, ['review', 'user', 'is_helpful', 'created_at'], parent=review_writer)
+        first_id = _next_id(Review)
+        user_ids = self.user_ids
+        seen = set()
+        pk = first_id
+        attempts = 0
+        while pk < first_id + count and attempts < count * 5:
+            attempts += 1
+            user_id = users.draw()[0]
+            destination_id = destinations.draw()[0]
+            if (user_id, destination_id) in seen:
+                continue
+            seen.add((user_id, destination_id))
+            rating = rng.choices((1, 2, 3, 4, 5), weights=(3, 5, 12, 35, 45))[0]
+
+            def aspect():
+                return min(5, max(1, rating + rng.choice((-1, 0, 0, 1))))
+
+            created = self._moment(2 * 365)
+            # A few reviews attract most of the votes
+            voters = min(int(rng.paretovariate(1.3)) - 1, 40, len(user_ids) - 1)
+            votes = [
+                (voter, rng.random() < 0.8)
+                for voter in (rng.sample(user_ids, voters) if voters > 0 else ())
+                if voter != user_id
+            ]
+            review_writer.add(
+                pk, user_id, destination_id, rating, rng.choice(REVIEW_TITLES),
+                ' '.join(rng.choices(WORDS, k=40)), aspect(), aspect(), aspect(), aspect(),
+                sum(is_helpful for _, is_helpful in votes), len(votes),
+                rng.random() < 0.3, rng.random() < 0.95, created, created,
+            )
+            for voter, is_helpful in votes:
+                vote_writer.add(pk, voter, is_helpful, created + timedelta(hours=rng.randrange(1, 2000)))
+            pk += 1
+        self._finish('reviews', review_writer, vote_writer)
+
+    def favorites(self, count, users, destinations):
+        writer = self._writer(Favorite, ['user', 'destination', 'created_at'])
+        seen = set()
+        attempts = 0
+        while len(seen) < count and attempts < count * 5:
+            attempts += 1
+            pair = (users.draw()[0], destinations.draw()[0])
+            if pair in seen:
+                continue
+            seen.add(pair)
+            writer.add(pair[0], pair[1], self._moment(2 * 365))
+        self._finish('favorites', writer)
+
+    def favorite_lists(self, count, users, destinations):
+        rng = self.rng
+        list_writer = self._writer(FavoriteList, [
+            'id', 'user', 'name', 'description', 'is_public', 'created_at', 'updated_at',
+        ])
+        item_writer = self._writer(
+            FavoriteListItem, ['favorite_list', 'destination', 'notes', 'added_at'], parent=list_writer
+        )
+        first_id = _next_id(FavoriteList)
+        per_user = {}
+        for pk in range(first_id, first_id + count):
+            user_id = users.draw()[0]
+            number = per_user[user_id] = per_user.get(user_id, 0) + 1
+            created = self._moment(2 * 365)
+            list_writer.add(
+                pk, user_id, f'Trip ideas {number}', '', rng.random() < 0.2, created, created,
+            )
+            for destination_id in set(destinations.draw(min(int(rng.paretovariate(1.2)), 25))):
+                item_writer.add(pk, destination_id, '', created)
+        self._finish('favorite lists', list_writer, item_writer)
+
+    def contacts(self, count):
+        rng = self.rng
+        writer = self._writer(Contact, [
+            'name', 'email', 'phone', 'subject', 'category', 'message', 'newsletter',
+            'status', 'created_at', 'updated_at', 'responded_at',
+        ])
+        categories = [choice for choice, _ in Contact.CATEGORY_CHOICES]
+        statuses = [choice for choice, _ in Contact.STATUS_CHOICES]
+        for index in range(count):
+            first, last = self._name()
+            created = self._moment(2 * 365)
+            status = rng.choices(statuses, weights=(20, 10, 55, 15))[0]
+            responded = created + timedelta(hours=rng.randrange(1, 96)) if status in ('resolved', 'closed') else None
+            writer.add(
+                f'{FIRST_NAMES[first]} {LAST_NAMES[last]}', f'contact{index}@{EMAIL_DOMAIN}', None,
+                rng.choice(CONTACT_SUBJECTS), rng.choice(categories), ' '.join(rng.choices(WORDS, k=30)),
+                rng.random() < 0.3, status, created, responded or created, responded,
+            )
+        self._finish('contacts', writer)
+
+    # Everything
+
+    def generate(self, counts):
+        started = time.perf_counter()
+        category_ids = self.categories()
+        if counts.get('users'):
+            self.users(counts['users'])
+        else:
+            self._adopt_existing_users()
+        if counts.get('destinations'):
+            self.destinations(counts['destinations'], category_ids)
+        else:
+            self._adopt_existing_destinations()
+
+        needs_parents = any(counts.get(name) for name in ('bookings', 'reviews', 'favorites', 'lists'))
+        if needs_parents and (not self.user_ids or not self.destination_ids):
+            raise ValueError('Bookings, reviews, favorites and lists need at least one user and destination')
+        if needs_parents:
+            users = ZipfSampler(self.rng, self.user_ids, ZIPF_USERS)
+            destinations = ZipfSampler(self.rng, self.destination_ids, ZIPF_DESTINATIONS)
+            if counts.get('bookings'):
+                self.bookings(counts['bookings'], users, destinations)
+            if counts.get('reviews'):
+                self.reviews(counts['reviews'], users, destinations)
+            if counts.get('favorites'):
+                self.favorites(counts['favorites'], users, destinations)
+            if counts.get('lists'):
+                self.favorite_lists(counts['lists'], users, destinations)
+        if counts.get('contacts'):
+            self.contacts(counts['contacts'])
+
+        self._reset_sequences()
+        return sum(self.written.values()), time.perf_counter() - started
+
+    def _user_name(self, user_id):
+        position = user_id - self.user_ids.start if self.user_first is not None else -1
+        if 0 <= position < len(self.user_first):
+            return self.user_first[position], self.user_last[position]
+        return self._name()
+
+    def _destination(self, destination_id):
+        """(duration in days, price per person) of a destination being sampled."""
+        if self.destination_positions is None:
+            position = destination_id - self.destination_ids.start
+        else:
+            position = self.destination_positions[destination_id]
+        return self.destination_days[position], self.destination_prices[position]
+
+    def _adopt_existing_users(self):
+        # Users generated by earlier runs, without their names
+        self.user_ids = list(
+            User.objects.filter(email__endswith=f'@{EMAIL_DOMAIN}').order_by('pk').values_list('pk', flat=True)
+        )
+        self.user_first = self.user_last = None
+
+    def _adopt_existing_destinations(self):
+        rows = list(
+            Destination.objects.filter(slug__startswith='loadtest-')
+            .order_by('pk').values_list('pk', 'duration_days', 'price_per_person')
+        )
+        self.destination_ids = [pk for pk, _, _ in rows]
+        self.destination_positions = {pk: position for position, pk in enumerate(self.destination_ids)}
+        self.destination_days = array('H', [days for _, days, _ in rows])
+        self.destination_prices = array('d', [float(price) for _, _, price in rows])
+
+    def _reset_sequences(self):
+        # PostgreSQL sequences do not see explicit primary keys
+        models = [User, Destination, Booking, BookingTraveler, Review, ReviewHelpful,
+                  Favorite, FavoriteList, FavoriteListItem, Contact]
+        connection = connections[DEFAULT_DB_ALIAS]
+        statements = connection.ops.sequence_reset_sql(no_style(), models)
+        if statements:
+            with connection.cursor() as cursor:
+                for statement in statements:
+                    cursor.execute(statement)
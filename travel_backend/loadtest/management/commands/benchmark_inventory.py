@@ -0,0 +1,126 @@
+import threading
+import time
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection
+from bookings.inventory import SoldOut, reserve
+from bookings.models import DepartureInventory
+from destinations.models import Destination
+from loadtest.benchmarks import percentile_summary
+
+# Far enough ahead that no real booking departs then
+BENCHMARK_DATE = date(2099, 12, 31)
+
+
+def naive_reserve(destination_id, departure_date, seats):
+    """Read, check, then write: what reserve() replaces, kept to show why."""
+    departure = DepartureInventory.objects.filter(destination_id=destination_id, departure_date=departure_date)
+    remaining = departure.values_list('remaining', flat=True).get()
+    if remaining < seats:
+        raise SoldOut(departure_date, seats, remaining)
+    departure.update(remaining=remaining - seats)
+    return seats
+
+
+STRATEGIES = {'atomic': reserve, 'naive': naive_reserve}
+
+
+class Command(BaseCommand):
+    help = (
+        'Have many threads reserve seats on one departure at once and check that exactly '
+        'its capacity is sold, reporting throughput and reservation latency'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=32, help='Concurrent clients')
+        parser.add_argument('--attempts', type=int, default=50, help='Reservations each thread tries')
+        parser.add_argument('--capacity', type=int, default=500, help='Seats on the departure')
+        parser.add_argument('--seats', type=int, default=1, help='Seats per reservation')
+        parser.add_argument(
+            '--strategy', choices=sorted(STRATEGIES), default='atomic',
+            help="'naive' reads then writes, to compare against the conditional update"
+        )
+        parser.add_argument('--destination', type=int, help='Destination id (default: the first one)')
+
+    def handle(self, *args, **options):
+        destination = Destination.objects.order_by('pk')
+        if options['destination']:
+            destination = destination.filter(pk=options['destination'])
+        destination_id = destination.values_list('pk', flat=True).first()
+        if destination_id is None:
+            raise CommandError('No such destination')
+        if DepartureInventory.objects.filter(destination_id=destination_id, departure_date=BENCHMARK_DATE).exists():
+            raise CommandError(f'Destination {destination_id} already has inventory on {BENCHMARK_DATE}')
+
+        capacity, seats = options['capacity'], options['seats']
+        DepartureInventory.objects.create(
+            destination_id=destination_id, departure_date=BENCHMARK_DATE, capacity=capacity, remaining=capacity
+        )
+        strategy = STRATEGIES[options['strategy']]
+        lock = threading.Lock()
+        outcomes = {'reserved': 0, 'sold_out': 0, 'errors': 0}
+        timings = []
+        start = threading.Barrier(options['threads'])
+
+        def client():
+            reserved = sold_out = errors = 0
+            latencies = []
+            try:
+                start.wait()
+                for _ in range(options['attempts']):
+                    began = time.perf_counter()
+                    try:
+                        strategy(destination_id, BENCHMARK_DATE, seats)
+                        reserved += 1
+                    except SoldOut:
+                        sold_out += 1
+                    except OperationalError:
+                        # e.g. SQLite giving up on a lock after its timeout
+                        errors += 1
+                    latencies.append((time.perf_counter() - began) * 1000)
+            finally:
+                connection.close()
+            with lock:
+                outcomes['reserved'] += reserved
+                outcomes['sold_out'] += sold_out
+                outcomes['errors'] += errors
+                timings.extend(latencies)
+
+        threads = [threading.Thread(target=client) for _ in range(options['threads'])]
+        began = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - began
+
+        departure = DepartureInventory.objects.get(destination_id=destination_id, departure_date=BENCHMARK_DATE)
+        departure.delete()
+
+        attempts = options['threads'] * options['attempts']
+        sold = outcomes['reserved'] * seats
+        latency = percentile_summary(timings) if timings else {}
+        self.stdout.write(
+            f"{options['strategy']}: {options['threads']} threads, {attempts} attempts in {elapsed:.2f}s "
+            f"({attempts / elapsed:,.0f} attempts/s)"
+        )
+        self.stdout.write(
+            f"  {outcomes['reserved']} reserved, {outcomes['sold_out']} sold out, {outcomes['errors']} errors; "
+            f"{sold} seats sold of {capacity}, {departure.remaining} left"
+        )
+        if latency:
+            self.stdout.write(
+                f"  latency p50 {latency['p50']:.2f} ms, p95 {latency['p95']:.2f} ms, p99 {latency['p99']:.2f} ms"
+            )
+
+        # Every seat sold must be missing from the departure, and none beyond capacity
+        expected_sold = min(capacity - capacity % seats, attempts * seats)
+        if sold != capacity - departure.remaining or sold > capacity:
+            self.stdout.write(self.style.ERROR(
+                f'Inconsistent: {sold} seats sold but the departure lost {capacity - departure.remaining}'
+            ))
+        elif sold != expected_sold and not outcomes['errors']:
+            self.stdout.write(self.style.WARNING(f'Sold {sold} seats, expected {expected_sold}'))
+        else:
+            self.stdout.write(self.style.SUCCESS('Seat counts are consistent'))
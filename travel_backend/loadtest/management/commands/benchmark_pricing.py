@@ -0,0 +1,89 @@
+import random
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from bookings.models import PricingRule
+from bookings.pricing import compile_from, price_cell, quote
+from loadtest.benchmarks import percentile_summary
+
+
+def sample_rules(rng, today, count):
+    """``count`` unsaved rules of every kind, as a busy destination might have."""
+    rules = []
+    for number in range(count):
+        kind = PricingRule.KIND_CHOICES[number % len(PricingRule.KIND_CHOICES)][0]
+        percent = Decimal(rng.randint(-2000, 3000)) / 100
+        rule = PricingRule(name=f'Rule {number}', kind=kind, adjustment_percent=percent)
+        if kind == PricingRule.SEASONAL:
+            rule.start_date = today + timedelta(days=rng.randint(0, 330))
+            rule.end_date = rule.start_date + timedelta(days=rng.randint(7, 90))
+        elif kind == PricingRule.OCCUPANCY:
+            rule.min_occupancy_percent = rng.randint(30, 95)
+        elif kind == PricingRule.GROUP:
+            rule.min_travelers = rng.randint(3, 10)
+        else:
+            rule.min_days_ahead = rng.randint(14, 240)
+        rules.append(rule)
+    return rules
+
+
+class Command(BaseCommand):
+    help = (
+        'Time pricing a grid of start dates by party sizes with compiled rules against '
+        'pricing each cell rule by rule, and check both give the same prices'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=365, help='Start dates in the grid')
+        parser.add_argument('--party-sizes', type=int, default=10, help='Party sizes 1..N in the grid')
+        parser.add_argument('--rules', type=int, default=12, help='Rules on the destination')
+        parser.add_argument('--repeat', type=int, default=50, help='Timed grid evaluations')
+        parser.add_argument('--price', type=Decimal, default=Decimal('149.99'), help='Base price per person')
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        days, sizes = options['days'], list(range(1, options['party_sizes'] + 1))
+        if days < 1 or not sizes or options['repeat'] < 1:
+            raise CommandError('--days, --party-sizes and --repeat must be at least 1')
+
+        rng = random.Random(options['seed'])
+        today = timezone.localdate()
+        rules = sample_rules(rng, today, options['rules'])
+        base_cents = int(options['price'] * 100)
+        occupancy = [rng.randint(0, 100) for _ in range(days)]
+
+        began = time.perf_counter()
+        compiled = compile_from(base_cents, rules)
+        compile_ms = (time.perf_counter() - began) * 1000
+
+        timings = []
+        for _ in range(options['repeat']):
+            began = time.perf_counter()
+            result = quote(compiled, today, days, sizes, today, occupancy)
+            timings.append((time.perf_counter() - began) * 1000)
+
+        began = time.perf_counter()
+        reference = [
+            [price_cell(rules, base_cents, today + timedelta(days=day), size, today, occupancy[day])
+             for day in range(days)]
+            for size in sizes
+        ]
+        reference_ms = (time.perf_counter() - began) * 1000
+
+        latency = percentile_summary(timings)
+        cells = days * len(sizes)
+        self.stdout.write(
+            f"{days}x{len(sizes)} grid ({cells:,} prices), {len(rules)} rules; compiled in {compile_ms:.3f} ms"
+        )
+        self.stdout.write(
+            f"  compiled: p50 {latency['p50']:.3f} ms, p95 {latency['p95']:.3f} ms "
+            f"({cells / latency['p50'] * 1000:,.0f} prices/s)"
+        )
+        self.stdout.write(f"  rule by rule: {reference_ms:.3f} ms ({reference_ms / latency['p50']:.1f}x slower)")
+        if result.totals != reference:
+            self.stdout.write(self.style.ERROR('Compiled prices differ from rule-by-rule prices'))
+        else:
+            self.stdout.write(self.style.SUCCESS('Prices match'))
@@ -0,0 +1,66 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from destinations import autocomplete, geo, similarity
+from destinations.cache import invalidate_responses
+from destinations.facets import invalidate_catalog_facets
+from loadtest.dataset import PASSWORD, ROW_SHARES, DatasetGenerator, counts_for_rows
+from reviews.aggregates import rebuild_all_ratings
+
+
+class Command(BaseCommand):
+    help = (
+        'Generate a seeded synthetic dataset (users, destinations, bookings with travelers, '
+        'reviews with helpful votes, favorites, favorite lists and contacts) for load testing'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rows', type=int,
+            help='Approximate total rows; split across tables in production-like proportions'
+        )
+        for name in ROW_SHARES:
+            parser.add_argument(f'--{name}', type=int, help=f'Number of {name} (overrides --rows)')
+        parser.add_argument('--seed', type=int, default=0, help='Random seed')
+        parser.add_argument(
+            '--today', type=date.fromisoformat,
+            help='Reference date (YYYY-MM-DD) for booking and review dates; fix it to reproduce a dataset exactly'
+        )
+        parser.add_argument('--chunk-size', type=int, default=5000, help='Rows per INSERT batch')
+
+    def handle(self, *args, **options):
+        counts = counts_for_rows(options['rows']) if options['rows'] else dict.fromkeys(ROW_SHARES, 0)
+        for name in ROW_SHARES:
+            if options[name] is not None:
+                counts[name] = options[name]
+        if not any(counts.values()):
+            raise CommandError('Nothing to generate; pass --rows or per-table counts')
+
+        self.stdout.write(f"Generating with seed {options['seed']}: " + ', '.join(
+            f'{count:,} {name}' for name, count in counts.items() if count
+        ))
+        generator = DatasetGenerator(
+            seed=options['seed'], today=options['today'],
+            chunk_size=options['chunk_size'], log=self.stdout.write,
+        )
+        try:
+            written, elapsed = generator.generate(counts)
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        self.stdout.write('Refreshing ratings, autocomplete, map, facets and cached responses...')
+        rebuild_all_ratings()
+        autocomplete.build_snapshot()
+        geo.invalidate()
+        similarity.invalidate_model()
+        invalidate_catalog_facets()
+        invalidate_responses('featured', 'trending', 'categories')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Wrote {written:,} rows in {elapsed:.1f}s ({written / elapsed if elapsed else 0:,.0f} rows/s). '
+            f"Generated users sign in with the password '{PASSWORD}'."
+        ))
+        self.stdout.write(
+            'Batch jobs to run next if needed: rebuild_similar_destinations, '
+            'build_favorite_recommendations, compact_popularity, rebuild_booking_summaries'
+        )
@@ -0,0 +1,180 @@
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from loadtest import benchmarks
+
+SIZE_SUFFIXES = {'k': 1000, 'm': 1000000}
+# Datasets are generated relative to a fixed day so they are identical
+# whenever and wherever they are built
+DATASET_DATE = '2025-06-01'
+
+
+def parse_size(label):
+    label = label.strip().lower()
+    multiplier = SIZE_SUFFIXES.get(label[-1:], 1)
+    digits = label[:-1] if label[-1:] in SIZE_SUFFIXES else label
+    try:
+        rows = int(float(digits) * multiplier)
+    except ValueError:
+        raise CommandError(f'Invalid dataset size {label!r}; use e.g. 1k, 100k or 1m')
+    if rows <= 0:
+        raise CommandError(f'Invalid dataset size {label!r}')
+    return label, rows
+
+
+def git_commit():
+    try:
+        result = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=settings.BASE_DIR,
+            capture_output=True, text=True, check=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return result.stdout.strip() or None
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark the API end to end through the test client against generated datasets '
+        'and write p50/p95/p99 latency, queries per request and allocations to a JSON file'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes', nargs='+', default=['1k', '100k', '1m'],
+            help='Dataset sizes in rows (default: 1k 100k 1m); each is generated on first use'
+        )
+        parser.add_argument(
+            '--data-dir', default=str(settings.BASE_DIR / 'var' / 'loadtest'),
+            help='Where generated datasets are kept between runs'
+        )
+        parser.add_argument(
+            '--current', action='store_true',
+            help='Benchmark the configured database in place instead; its writes are kept'
+        )
+        parser.add_argument('--output', default='benchmark-results.json', help='JSON results file')
+        parser.add_argument('--compare', help='Earlier results file to print p95 and query changes against')
+        parser.add_argument('--only', nargs='+', choices=benchmarks.scenario_names(), help='Scenarios to run')
+        parser.add_argument('--requests', type=int, default=200, help='Timed requests per scenario')
+        parser.add_argument('--warmup', type=int, default=10, help='Untimed requests per scenario first')
+        parser.add_argument(
+            '--instrumented', type=int, default=20,
+            help='Requests per scenario that count queries and trace allocations'
+        )
+        parser.add_argument('--seed', type=int, default=0, help='Seed for datasets and request targets')
+        parser.add_argument('--label', default='current', help='Name of the dataset in results with --current')
+
+    def handle(self, *args, **options):
+        if options['requests'] < 1 or options['instrumented'] < 1 or options['warmup'] < 0:
+            raise CommandError('--requests and --instrumented must be at least 1')
+
+        results = {
+            'commit': git_commit(),
+            'created_at': timezone.now().replace(microsecond=0).isoformat(),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'database': settings.DATABASES['default']['ENGINE'],
+            'options': {
+                key: options[key] for key in ('requests', 'warmup', 'instrumented', 'seed')
+            },
+            'datasets': {},
+        }
+        if options['current']:
+            results['datasets'][options['label']] = self.run_here(options)
+        else:
+            for size in options['sizes']:
+                label, rows = parse_size(size)
+                results['datasets'][label] = self.run_dataset(label, rows, options)
+
+        output = Path(options['output'])
+        output.parent.mkdir(parents=True, exist_ok=True)
+        # Sorted and indented so two result files diff line by line
+        output.write_text(json.dumps(results, indent=2, sort_keys=True) + '\n')
+        self.stdout.write(self.style.SUCCESS(f'Wrote {output}'))
+
+        if options['compare']:
+            self.print_comparison(options['compare'], results)
+
+    def run_here(self, options):
+        try:
+            return benchmarks.run(
+                names=options['only'], seed=options['seed'], requests=options['requests'],
+                warmup=options['warmup'], instrumented=options['instrumented'], log=self.stdout.write,
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+
+    def manage(self, database, snapshots, *arguments):
+        """Run another management command in a child process against ``database``."""
+        environment = dict(os.environ, DATABASE_PATH=str(database), AUTOCOMPLETE_SNAPSHOT_DIR=str(snapshots))
+        command = [sys.executable, str(Path(settings.BASE_DIR) / 'manage.py'), *arguments]
+        if subprocess.run(command, env=environment, cwd=settings.BASE_DIR).returncode:
+            raise CommandError(f"'{' '.join(arguments[:1])}' failed for {database}")
+
+    def run_dataset(self, label, rows, options):
+        # Each dataset runs in its own process: the database path is fixed at
+        # startup, and in-process caches and indexes must not leak across sizes
+        data_dir = Path(options['data_dir'])
+        data_dir.mkdir(parents=True, exist_ok=True)
+        database = data_dir / f'{label}.sqlite3'
+        snapshots = data_dir / f'{label}-autocomplete'
+
+        if not database.exists():
+            self.stdout.write(f'Generating the {label} dataset ({rows:,} rows)...')
+            partial = data_dir / f'{label}.partial.sqlite3'
+            partial.unlink(missing_ok=True)
+            self.manage(partial, snapshots, 'migrate', '--noinput', '--verbosity', '0')
+            self.manage(
+                partial, snapshots, 'generate_dataset', '--rows', str(rows),
+                '--seed', str(options['seed']), '--today', DATASET_DATE,
+            )
+            partial.rename(database)
+
+        # Benchmark a copy so the writes of one run never reach the next
+        working = data_dir / f'{label}.run.sqlite3'
+        shutil.copyfile(database, working)
+        handle, output = tempfile.mkstemp(suffix='.json')
+        os.close(handle)
+        try:
+            # Datasets outlive commits; bring the copy up to this one's schema
+            self.manage(working, snapshots, 'migrate', '--noinput', '--verbosity', '0')
+            self.stdout.write(f'Benchmarking the {label} dataset...')
+            arguments = [
+                'run_benchmarks', '--current', '--label', label, '--output', output,
+                '--requests', str(options['requests']), '--warmup', str(options['warmup']),
+                '--instrumented', str(options['instrumented']), '--seed', str(options['seed']),
+            ]
+            if options['only']:
+                arguments += ['--only', *options['only']]
+            self.manage(working, snapshots, *arguments)
+            return json.loads(Path(output).read_text())['datasets'][label]
+        finally:
+            os.unlink(output)
+            working.unlink(missing_ok=True)
+
+    def print_comparison(self, path, results):
+        try:
+            previous = json.loads(Path(path).read_text())
+        except (OSError, ValueError) as e:
+            raise CommandError(f'Cannot read {path}: {e}')
+        rows = benchmarks.compare(previous, results)
+        if not rows:
+            self.stdout.write('Nothing in common to compare')
+            return
+        self.stdout.write(f"Changes since {previous.get('commit') or path} (latency p95, queries p50):")
+        for label, name, unit, old, new, change in rows:
+            line = f'{label:>6} {name:<24} {old:>10.2f} -> {new:>10.2f} {unit:<8} {change:+7.1f}%'
+            # Flag anything more than 10% slower or doing more queries
+            if (unit == 'queries' and new > old) or (unit == 'ms' and change > 10):
+                line = self.style.WARNING(line)
+            self.stdout.write(line)
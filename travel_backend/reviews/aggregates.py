@@ -0,0 +1,77 @@
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Avg, Count
+
+from destinations.cache import invalidate_responses
+from destinations.models import Destination
+from .models import Review
+
+# Review field -> Destination field holding its average
+DIMENSIONS = {
+    'value_for_money': 'value_for_money_rating',
+    'service_quality': 'service_quality_rating',
+    'cleanliness': 'cleanliness_rating',
+    'location': 'location_rating',
+}
+
+AGGREGATES = {
+    'total_reviews': Count('id'),
+    'average_rating': Avg('rating'),
+    **{field: Avg(dimension) for dimension, field in DIMENSIONS.items()},
+}
+
+RATING_FIELDS = list(AGGREGATES)
+
+
+def _to_decimal(value):
+    if value is None:
+        return None
+    return Decimal(str(value)).quantize(Decimal('0.01'))
+
+
+def _destination_values(row):
+    values = {field: _to_decimal(row.get(field)) for field in DIMENSIONS.values()}
+    values['total_reviews'] = row.get('total_reviews') or 0
+    values['average_rating'] = _to_decimal(row.get('average_rating')) or Decimal('0')
+    return values
+
+
+def refresh_destination_rating(destination_id):
+    """Recompute one destination's rating aggregates from its approved reviews."""
+    row = Review.objects.filter(
+        destination_id=destination_id, is_approved=True
+    ).aggregate(**AGGREGATES)
+    Destination.objects.filter(pk=destination_id).update(**_destination_values(row))
+    # Queryset updates skip Destination's signals, and the featured and
+    # trending responses include the rating
+    transaction.on_commit(lambda: invalidate_responses('featured', 'trending'))
+
+
+def rebuild_all_ratings(batch_size=1000):
+    """
+    Recompute every destination's aggregates with a single grouped query.
+
+    Returns the number of destinations that have at least one approved review.
+    """
+    rows = (
+        Review.objects.filter(is_approved=True)
+        .order_by()
+        .values('destination_id')
+        .annotate(**AGGREGATES)
+    )
+    with transaction.atomic():
+        Destination.objects.update(**_destination_values({}))
+        batch = []
+        updated = 0
+        for row in rows.iterator(chunk_size=batch_size):
+            batch.append(Destination(pk=row['destination_id'], **_destination_values(row)))
+            if len(batch) >= batch_size:
+                Destination.objects.bulk_update(batch, RATING_FIELDS)
+                updated += len(batch)
+                batch = []
+        if batch:
+            Destination.objects.bulk_update(batch, RATING_FIELDS)
+            updated += len(batch)
+    invalidate_responses('featured', 'trending')
+    return updated
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+from reviews.aggregates import rebuild_all_ratings
+
+class Command(BaseCommand):
+    help = 'Recompute the denormalized rating aggregates on every destination'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Destinations per bulk update')
+
+    def handle(self, *args, **options):
+        updated = rebuild_all_ratings(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt rating aggregates ({updated} reviewed destinations)'))
@@ -0,0 +1,58 @@
+from decimal import Decimal
+
+from django.db import migrations
+from django.db.models import Avg, Count
+
+# Review field -> Destination field holding its average, as in reviews.aggregates
+DIMENSIONS = {
+    'value_for_money': 'value_for_money_rating',
+    'service_quality': 'service_quality_rating',
+    'cleanliness': 'cleanliness_rating',
+    'location': 'location_rating',
+}
+
+
+def _to_decimal(value):
+    if value is None:
+        return None
+    return Decimal(str(value)).quantize(Decimal('0.01'))
+
+
+def backfill_rating_aggregates(apps, schema_editor):
+    """Fill in the aggregates of destinations reviewed before they were denormalized."""
+    Destination = apps.get_model('destinations', 'Destination')
+    Review = apps.get_model('reviews', 'Review')
+    rows = (
+        Review.objects.filter(is_approved=True)
+        .order_by()
+        .values('destination_id')
+        .annotate(
+            total_reviews=Count('id'),
+            average_rating=Avg('rating'),
+            **{field: Avg(dimension) for dimension, field in DIMENSIONS.items()},
+        )
+    )
+    batch = []
+    for row in rows.iterator(chunk_size=1000):
+        destination = Destination(pk=row['destination_id'], total_reviews=row['total_reviews'])
+        destination.average_rating = _to_decimal(row['average_rating']) or Decimal('0')
+        for field in DIMENSIONS.values():
+            setattr(destination, field, _to_decimal(row[field]))
+        batch.append(destination)
+        if len(batch) >= 1000:
+            Destination.objects.bulk_update(batch, ['total_reviews', 'average_rating', *DIMENSIONS.values()])
+            batch = []
+    if batch:
+        Destination.objects.bulk_update(batch, ['total_reviews', 'average_rating', *DIMENSIONS.values()])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('destinations', '0004_destination_rating_aggregates'),
+        ('reviews', '0002_keyset_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_rating_aggregates, migrations.RunPython.noop),
+    ]
@@ -47,6 +47,10 @@ class Review(models.Model):
     class Meta:
         unique_together = ['user', 'destination']
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['is_approved', '-created_at', '-id']),
+            models.Index(fields=['destination', 'is_approved', '-created_at', '-id']),
+        ]
 
     def __str__(self):
         return f"{self.user.full_name} - {self.destination.name} ({self.rating}★)"
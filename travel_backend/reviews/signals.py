@@ -0,0 +1,25 @@
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from .aggregates import refresh_destination_rating
+from .models import Review
+
+
+@receiver(post_init, sender=Review)
+def remember_destination(sender, instance, **kwargs):
+    instance._loaded_destination_id = instance.destination_id
+
+
+@receiver(post_save, sender=Review)
+def review_saved(sender, instance, **kwargs):
+    # Covers creates, edits and approval changes alike
+    refresh_destination_rating(instance.destination_id)
+    previous = instance._loaded_destination_id
+    if previous and previous != instance.destination_id:
+        refresh_destination_rating(previous)
+    instance._loaded_destination_id = instance.destination_id
+
+
+@receiver(post_delete, sender=Review)
+def review_deleted(sender, instance, **kwargs):
+    refresh_destination_rating(instance.destination_id)
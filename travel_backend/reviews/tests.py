@@ -1,3 +1,99 @@
+from decimal import Decimal
+from importlib import import_module
+
+from django.apps import apps
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.test import TestCase
 
-# Create your tests here.
+from destinations.models import Category, Destination
+from .aggregates import rebuild_all_ratings
+from .models import Review
+
+User = get_user_model()
+
+
+class RatingAggregateTests(TestCase):
+    """A destination's rating aggregates follow every review save and delete"""
+
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(name='Beach', icon='beach')
+        cls.destination, cls.other = [
+            Destination.objects.create(
+                name=name, city='City', country='Country', category=category,
+                short_description='A short description', long_description='A long description',
+                price_per_person=100, duration_days=3,
+            )
+            for name in ['Destination', 'Other']
+        ]
+        cls.users = [
+            User.objects.create_user(username=f'reviewer{n}', email=f'reviewer{n}@example.com', password='password')
+            for n in range(3)
+        ]
+
+    def setUp(self):
+        cache.clear()
+
+    def review(self, user, rating, destination=None, **values):
+        return Review.objects.create(
+            user=user, destination=destination or self.destination, rating=rating,
+            title='Title', comment='Comment', **values
+        )
+
+    def ratings(self, destination=None):
+        destination = Destination.objects.get(pk=(destination or self.destination).pk)
+        return (
+            destination.total_reviews, destination.average_rating,
+            destination.value_for_money_rating, destination.cleanliness_rating,
+        )
+
+    def test_saves_update_the_aggregates(self):
+        self.review(self.users[0], 5, value_for_money=4)
+        self.assertEqual(self.ratings(), (1, Decimal('5.00'), Decimal('4.00'), None))
+        second = self.review(self.users[1], 4, value_for_money=3, cleanliness=5)
+        self.assertEqual(self.ratings(), (2, Decimal('4.50'), Decimal('3.50'), Decimal('5.00')))
+
+        second.rating = 2
+        second.save()
+        self.assertEqual(self.ratings(), (2, Decimal('3.50'), Decimal('3.50'), Decimal('5.00')))
+
+        second.is_approved = False
+        second.save()
+        self.assertEqual(self.ratings(), (1, Decimal('5.00'), Decimal('4.00'), None))
+
+    def test_moving_a_review_updates_both_destinations(self):
+        review = self.review(self.users[0], 4)
+        self.review(self.users[1], 2)
+        review = Review.objects.get(pk=review.pk)
+        review.destination = self.other
+        review.save()
+        self.assertEqual(self.ratings(), (1, Decimal('2.00'), None, None))
+        self.assertEqual(self.ratings(self.other), (1, Decimal('4.00'), None, None))
+
+    def test_deletes_update_the_aggregates(self):
+        first = self.review(self.users[0], 5)
+        self.review(self.users[1], 3)
+        first.delete()
+        self.assertEqual(self.ratings(), (1, Decimal('3.00'), None, None))
+        Review.objects.get().delete()
+        self.assertEqual(self.ratings(), (0, Decimal('0.00'), None, None))
+
+    def test_rebuild_and_backfill_recompute_from_reviews(self):
+        self.review(self.users[0], 5, cleanliness=4)
+        self.review(self.users[1], 2, cleanliness=3)
+        self.review(self.users[2], 1, destination=self.other, is_approved=False)
+        expected = (2, Decimal('3.50'), None, Decimal('3.50'))
+        self.assertEqual(self.ratings(), expected)
+
+        # Queryset updates skip the signals, as for destinations reviewed
+        # before the aggregates existed
+        Destination.objects.update(total_reviews=7, average_rating=1, cleanliness_rating=None)
+        self.assertEqual(rebuild_all_ratings(), 1)
+        self.assertEqual(self.ratings(), expected)
+        self.assertEqual(self.ratings(self.other), (0, Decimal('0.00'), None, None))
+
+        Destination.objects.filter(pk=self.destination.pk).update(total_reviews=0, average_rating=0, cleanliness_rating=None)
+        migration = import_module('reviews.migrations.0003_backfill_rating_aggregates')
+        migration.backfill_rating_aggregates(apps, None)
+        self.assertEqual(self.ratings(), expected)
@@ -0,0 +1,176 @@
+"""
+Streaming CSV and JSON Lines exports.
+
+An Export names a queryset and the columns to project from it. Rows come
+from ``values_list(...).iterator(chunk_size=...)``, are encoded a chunk at
+a time and handed on straight away, so memory use stays flat however many
+rows there are, whether they go to an HTTP response or to a file.
+Compression is a gzip stream over the same chunks.
+"""
+import csv
+import io
+import sys
+import time as timer
+import zlib
+from collections import namedtuple
+from datetime import date, datetime, time, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+
+FORMATS = {
+    'csv': 'text/csv',
+    'jsonl': 'application/x-ndjson',
+}
+CHUNK_SIZE = 2000
+# Encoded bytes gathered before a chunk is handed on
+BUFFER_SIZE = 64 * 1024
+
+# ``queryset`` is a callable so definitions can live at module level;
+# ``columns`` are (header, lookup) pairs; ``date_field`` is what since/until filter
+Export = namedtuple('Export', 'name queryset columns date_field')
+
+
+def rows(export, since=None, until=None, chunk_size=CHUNK_SIZE):
+    """The export's rows as tuples, oldest first; ``since`` and ``until`` are inclusive dates."""
+    queryset = export.queryset()
+    if since:
+        queryset = queryset.filter(**{f'{export.date_field}__gte': _start_of(since)})
+    if until:
+        queryset = queryset.filter(**{f'{export.date_field}__lt': _start_of(until + timedelta(days=1))})
+    lookups = [lookup for _, lookup in export.columns]
+    return queryset.values_list(*lookups).iterator(chunk_size=chunk_size)
+
+
+def _start_of(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def _csv_chunks(headers, records):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(headers)
+    for record in records:
+        writer.writerow(
+            '' if value is None else value.isoformat() if hasattr(value, 'isoformat') else value
+            for value in record
+        )
+        if buffer.tell() >= BUFFER_SIZE:
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode()
+
+
+def _jsonl_chunks(headers, records):
+    encoder = DjangoJSONEncoder()
+    lines = []
+    size = 0
+    for record in records:
+        line = encoder.encode(dict(zip(headers, record)))
+        lines.append(line)
+        size += len(line)
+        if size >= BUFFER_SIZE:
+            lines.append('')
+            yield '\n'.join(lines).encode()
+            lines, size = [], 0
+    if lines:
+        lines.append('')
+        yield '\n'.join(lines).encode()
+
+
+def _gzip(chunks):
+    # wbits=31 writes a gzip header and trailer around the deflate stream
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def encode(export, records, file_format, compress=False):
+    """The export's rows as a stream of ``file_format`` bytes, gzipped if ``compress``."""
+    headers = [header for header, _ in export.columns]
+    chunks = _csv_chunks(headers, records) if file_format == 'csv' else _jsonl_chunks(headers, records)
+    return _gzip(chunks) if compress else chunks
+
+
+def filename(export, file_format, compress=False, since=None, until=None):
+    parts = [export.name] + [day.isoformat() for day in (since, until) if day]
+    return '_'.join(parts) + f'.{file_format}' + ('.gz' if compress else '')
+
+
+def streaming_response(export, file_format, compress=False, since=None, until=None):
+    """A download of the export, produced while it is sent."""
+    if file_format not in FORMATS:
+        raise ValueError(f"Unknown format {file_format!r}; use {' or '.join(FORMATS)}")
+    response = StreamingHttpResponse(
+        encode(export, rows(export, since, until), file_format, compress),
+        content_type='application/gzip' if compress else f'{FORMATS[file_format]}; charset=utf-8',
+    )
+    response['Content-Disposition'] = (
+        f'attachment; filename="{filename(export, file_format, compress, since, until)}"'
+    )
+    return response
+
+
+def parse_export_request(request):
+    """``(file_format, compress, since, until)`` from the query string; raises ValueError."""
+    file_format = request.GET.get('type', 'csv')
+    if file_format not in FORMATS:
+        raise ValueError(f"type must be {' or '.join(FORMATS)}")
+    compress = request.GET.get('gzip', '').lower() in ('1', 'true', 'yes')
+    try:
+        since, until = (
+            date.fromisoformat(request.GET[name]) if request.GET.get(name) else None
+            for name in ('since', 'until')
+        )
+    except ValueError:
+        raise ValueError('since and until must be dates like 2025-07-01')
+    return file_format, compress, since, until
+
+
+def write(export, output, file_format, compress=False, since=None, until=None):
+    """Write the export to the binary file ``output``; returns the bytes written."""
+    written = 0
+    for chunk in encode(export, rows(export, since, until), file_format, compress):
+        output.write(chunk)
+        written += len(chunk)
+    return written
+
+
+class ExportCommand(BaseCommand):
+    """Writes an export to a file or stdout; set ``export`` or override get_export."""
+    export = None
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', choices=sorted(FORMATS), default='csv')
+        parser.add_argument('--gzip', action='store_true', help='Compress the output with gzip')
+        parser.add_argument('--since', type=date.fromisoformat, help='First day, e.g. 2025-06-01')
+        parser.add_argument('--until', type=date.fromisoformat, help='Last day, inclusive')
+        parser.add_argument('--output', help="File to write (default: a dated name here); '-' for stdout")
+
+    def get_export(self, options):
+        return self.export
+
+    def handle(self, *args, **options):
+        export = self.get_export(options)
+        file_format, compress = options['format'], options['gzip']
+        since, until = options['since'], options['until']
+        path = options['output'] or filename(export, file_format, compress, since, until)
+        began = timer.perf_counter()
+        try:
+            if path == '-':
+                written = write(export, sys.stdout.buffer, file_format, compress, since, until)
+            else:
+                with open(path, 'wb') as output:
+                    written = write(export, output, file_format, compress, since, until)
+        except OSError as e:
+            raise CommandError(f'Cannot write {path}: {e}')
+        if path != '-':
+            self.stdout.write(self.style.SUCCESS(
+                f'Wrote {written:,} bytes to {path} in {timer.perf_counter() - began:.1f}s'
+            ))
@@ -0,0 +1,130 @@
+"""
+Idempotency keys for POST endpoints that create things.
+
+A client sends the same ``Idempotency-Key`` header with every retry of
+one logical request. The first request runs normally and its successful
+response is stored in the cache with a fingerprint of the body, for
+IDEMPOTENCY_TTL seconds. A retry with the same key gets the stored
+response back as is, before authentication touches the database and
+before any serializer runs. Reusing a key with a different body is
+refused with 422.
+
+A retry that arrives while the original is still running waits for it
+rather than running alongside it: only the request holding the key's
+lock (a ``cache.add``) runs the view, and the others poll for its
+response. If the original fails, its lock is released and the next
+request with the key runs in its place.
+
+Keys are scoped to the signed-in user, taken from the JWT without a
+database lookup, so two users can never see each other's responses.
+"""
+import hashlib
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse, JsonResponse
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+HEADER = 'Idempotency-Key'
+MAX_KEY_LENGTH = 255
+# Seconds between checks for the response of an in-flight request
+POLL_INTERVAL = 0.05
+
+
+def _scope(request):
+    """Whose key this is: the JWT's user, 'anonymous', or None for a bad token."""
+    authentication = JWTAuthentication()
+    header = authentication.get_header(request)
+    if not header:
+        return 'anonymous'
+    try:
+        raw_token = authentication.get_raw_token(header)
+        if raw_token is None:
+            return None
+        token = authentication.get_validated_token(raw_token)
+    except (AuthenticationFailed, InvalidToken):
+        return None
+    return f'user:{token[api_settings.USER_ID_CLAIM]}'
+
+
+def _keys(scope, path, key):
+    name = hashlib.sha256(f'{scope}:{path}:{key}'.encode()).hexdigest()
+    return f'idempotency:{name}', f'idempotency:{name}:lock'
+
+
+def _replay(stored, fingerprint):
+    stored_fingerprint, status, content, content_type = stored
+    if stored_fingerprint != fingerprint:
+        return JsonResponse(
+            {'error': f'This {HEADER} was already used with a different request'}, status=422
+        )
+    response = HttpResponse(content, status=status, content_type=content_type)
+    response['Idempotent-Replayed'] = 'true'
+    return response
+
+
+def idempotent(view):
+    """
+    Honour ``Idempotency-Key`` on POSTs to ``view``.
+
+    Apply it on top of ``@api_view``, or to a class-based view's
+    ``dispatch``, so the view returns a finalized response that can be
+    rendered and stored. Only 2xx responses are stored; anything else
+    may be retried with the same key.
+    """
+    @wraps(view)
+    def wrapped(request, *args, **kwargs):
+        key = request.headers.get(HEADER)
+        if request.method != 'POST' or not key:
+            return view(request, *args, **kwargs)
+        if len(key) > MAX_KEY_LENGTH:
+            return JsonResponse(
+                {'error': f'{HEADER} must be at most {MAX_KEY_LENGTH} characters'}, status=400
+            )
+        scope = _scope(request)
+        if scope is None:
+            # Let authentication turn the request away as usual
+            return view(request, *args, **kwargs)
+
+        fingerprint = hashlib.sha256(request.body).hexdigest()
+        response_key, lock_key = _keys(scope, request.path, key)
+
+        stored = cache.get(response_key)
+        if stored is not None:
+            return _replay(stored, fingerprint)
+
+        deadline = time.monotonic() + getattr(settings, 'IDEMPOTENCY_WAIT', 10)
+        lock_timeout = getattr(settings, 'IDEMPOTENCY_LOCK_TIMEOUT', 30)
+        while not cache.add(lock_key, fingerprint, lock_timeout):
+            if time.monotonic() > deadline:
+                return JsonResponse(
+                    {'error': f'A request with this {HEADER} is still in progress'}, status=409
+                )
+            time.sleep(POLL_INTERVAL)
+            stored = cache.get(response_key)
+            if stored is not None:
+                return _replay(stored, fingerprint)
+
+        try:
+            # The original may have finished between the first look and the lock
+            stored = cache.get(response_key)
+            if stored is not None:
+                return _replay(stored, fingerprint)
+
+            response = view(request, *args, **kwargs)
+            if 200 <= response.status_code < 300 and not response.streaming:
+                if hasattr(response, 'render'):
+                    response.render()
+                cache.set(
+                    response_key,
+                    (fingerprint, response.status_code, response.content, response['Content-Type']),
+                    getattr(settings, 'IDEMPOTENCY_TTL', 86400),
+                )
+            return response
+        finally:
+            cache.delete(lock_key)
+    return wrapped
@@ -0,0 +1,49 @@
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+
+
+class OffsetPagination(PageNumberPagination):
+    """Classic ?page=N pagination, kept for the admin UI and ranked results."""
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+
+class KeysetPagination(CursorPagination):
+    """
+    Cursor pagination keyed on (created_at, id).
+
+    Each page is an indexed range scan starting where the previous one ended,
+    so deep pages cost the same as the first. Staff can opt into offset
+    pagination with ?pagination=offset, and views whose results are ranked
+    rather than time-ordered (e.g. search) set ``offset_pagination = True``.
+    Views paginating on another timestamp can set ``cursor_ordering``.
+    """
+    ordering = ('-created_at', '-id')
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    offset_pagination_class = OffsetPagination
+
+    def use_offset(self, request, view):
+        if getattr(view, 'offset_pagination', False):
+            return True
+        return (
+            request.query_params.get('pagination') == 'offset'
+            and request.user.is_authenticated
+            and request.user.is_staff
+        )
+
+    def get_ordering(self, request, queryset, view):
+        return getattr(view, 'cursor_ordering', self.ordering)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.offset_paginator = None
+        if self.use_offset(request, view):
+            self.offset_paginator = self.offset_pagination_class()
+            return self.offset_paginator.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.offset_paginator is not None:
+            return self.offset_paginator.get_paginated_response(data)
+        return super().get_paginated_response(data)
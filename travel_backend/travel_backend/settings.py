@@ -51,6 +51,8 @@ INSTALLED_APPS = [
     'reviews',
     'contacts',
     'favorites',
+    'loadtest',
+    'jobs',
 ]
 
 MIDDLEWARE = [
@@ -90,7 +92,8 @@ WSGI_APPLICATION = 'travel_backend.wsgi.application'
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        # Point DATABASE_PATH elsewhere to keep e.g. a large load-test dataset apart
+        'NAME': os.getenv('DATABASE_PATH', BASE_DIR / 'db.sqlite3'),
     }
 }
 
@@ -141,9 +144,86 @@ MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# Cache
+# LocMemCache is per process; point CACHE_BACKEND/CACHE_LOCATION at a shared
+# backend (e.g. django.core.cache.backends.filebased.FileBasedCache) when
+# running several workers so signal-driven invalidation reaches all of them
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', 'travel-backend'),
+    }
+}
+
+# Seconds a cached public response may live even without an invalidation
+RESPONSE_CACHE_TIMEOUT = int(os.getenv('RESPONSE_CACHE_TIMEOUT', '300'))
+
 # Custom user model
 AUTH_USER_MODEL = 'users.User'
 
+# Destination search
+# Use the full-text index (SQLite FTS5 / PostgreSQL GIN) for destination search
+# instead of substring matching; falls back automatically if the index is missing
+DESTINATION_FULL_TEXT_SEARCH = os.getenv('DESTINATION_FULL_TEXT_SEARCH', 'True').lower() == 'true'
+
+# Grid size of the in-process destination spatial index, and how often (in
+# seconds) a worker checks whether another worker changed any coordinates
+GEO_INDEX_CELL_DEGREES = 0.5
+GEO_INDEX_CHECK_INTERVAL = 5
+
+# Neighbours stored per destination by destinations.similarity
+SIMILAR_DESTINATIONS_COUNT = 10
+
+# Hours for a destination's trending score to halve, see destinations.popularity
+TRENDING_HALF_LIFE_HOURS = float(os.getenv('TRENDING_HALF_LIFE_HOURS', '72'))
+
+# Seats on a departure that has no DepartureInventory row yet; such a row is
+# created on the first booking. 0 leaves departures without a row unlimited
+DEPARTURE_CAPACITY = int(os.getenv('DEPARTURE_CAPACITY', '0'))
+
+# Days from today covered by the cached availability calendars, and how long
+# an entry may live without a write invalidating it, see bookings.availability
+AVAILABILITY_DAYS = 365
+AVAILABILITY_CACHE_TIMEOUT = 3600
+
+# Seconds compiled pricing rules stay cached without a rule change, see bookings.pricing
+PRICING_CACHE_TIMEOUT = 3600
+
+# Booking references each process reserves at a time, see bookings.ids
+BOOKING_ID_BLOCK_SIZE = 100
+
+# Keep a per-user BookingSummary row current on every booking write so the
+# booking dashboard is a single primary-key read; backfill existing users
+# with rebuild_booking_summaries after turning it on
+BOOKING_SUMMARY_MATERIALIZED = os.getenv('BOOKING_SUMMARY_MATERIALIZED', 'False').lower() == 'true'
+
+# Background jobs, see jobs.queue: attempts before a job is dead, the delay
+# before its first retry (doubling each time, up to the max) and how long a
+# job may stay claimed before another worker takes it over, and how long
+# succeeded jobs are kept before run_jobs deletes them, all in seconds
+JOBS_MAX_ATTEMPTS = 5
+JOBS_RETRY_BACKOFF = 30
+JOBS_RETRY_BACKOFF_MAX = 3600
+JOBS_LOCK_TIMEOUT = 600
+JOBS_KEEP_SUCCEEDED = 7 * 24 * 60 * 60
+
+# Generated invoices; private, outside MEDIA_ROOT, served by the owner-checked
+# /api/bookings/<id>/invoice/ view
+INVOICE_ROOT = Path(os.getenv('INVOICE_ROOT', BASE_DIR / 'var' / 'invoices'))
+
+# Partner endpoint told about every new booking; empty to skip
+BOOKING_PARTNER_WEBHOOK_URL = os.getenv('BOOKING_PARTNER_WEBHOOK_URL', '')
+
+# Idempotency-Key handling, see travel_backend.idempotency: how long a
+# response is kept for retries, how long a retry waits for the original
+# request, and when the lock of a request that died is given up
+IDEMPOTENCY_TTL = 24 * 60 * 60
+IDEMPOTENCY_WAIT = 10
+IDEMPOTENCY_LOCK_TIMEOUT = 30
+
+# Autocomplete snapshot and change journal, shared by all workers on a host
+AUTOCOMPLETE_SNAPSHOT_DIR = Path(os.getenv('AUTOCOMPLETE_SNAPSHOT_DIR', BASE_DIR / 'var' / 'autocomplete'))
+
 # REST Framework configuration
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
@@ -152,6 +232,8 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
+    'DEFAULT_PAGINATION_CLASS': 'travel_backend.pagination.KeysetPagination',
+    'PAGE_SIZE': 20,
 }
 
 # JWT Configuration
@@ -182,6 +264,7 @@ CORS_ALLOWED_HEADERS = [
     'user-agent',
     'x-csrftoken',
     'x-requested-with',
+    'idempotency-key',
 ]
 
 CORS_ALLOW_METHODS = [
@@ -18,11 +18,17 @@ from django.contrib import admin
 from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
+from bookings.views import destination_availability
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/auth/', include('users.urls')),
     path('api/destinations/', include('destinations.urls')),
+    # Served by bookings, which owns departure inventory
+    path(
+        'api/destinations/<int:pk>/availability/', destination_availability,
+        name='destination-availability'
+    ),
     path('api/bookings/', include('bookings.urls')),
     path('api/reviews/', include('reviews.urls')),
     path('api/contacts/', include('contacts.urls')),